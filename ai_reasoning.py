@@ -2,14 +2,25 @@
 # AI Reasoning Module - Enhanced for Better Meal Plans
 # """
 
+import asyncio
 import pandas as pd
-from typing import Dict, Optional, Tuple, List
+from typing import AsyncIterator, Dict, Optional, Tuple, List
 from google import genai
-from google.genai.types import GenerateContentConfig
-from config import GEMINI_API_KEY, GEMINI_MODEL
+from google.genai.types import GenerateContentConfig, HttpOptions
+from config import (GEMINI_API_KEY, GEMINI_MODEL, GEMINI_BASE_URL, PLAN_DAYS, PLAN_SHARD_DAYS,
+                    PLAN_CONCURRENCY, PLAN_SHARD_RETRIES, LLM_PROVIDERS, ASK_TIMEOUT)
+from llm_governor import governor
 
-# Initialize Gemini client
-client = genai.Client(api_key=GEMINI_API_KEY)
+# Initialize Gemini client (GEMINI_BASE_URL points it at a stand-in server for tests).
+# Every call goes through the governor; the client timeout (ms) matches its deadline.
+client = genai.Client(
+    api_key=GEMINI_API_KEY,
+    http_options=HttpOptions(base_url=GEMINI_BASE_URL or None,
+                             timeout=int(LLM_PROVIDERS["gemini"]["timeout"] * 1000)),
+)
+gemini = governor["gemini"]
+
+PLAN_CONFIG = GenerateContentConfig(temperature=0.3, max_output_tokens=8000)
 
 
 def validate_profile(user_profile: Dict) -> Tuple[bool, str]:
@@ -73,20 +84,9 @@ def validate_profile(user_profile: Dict) -> Tuple[bool, str]:
     return True, "Profile Validated"
 
 
-def generate_meal_plan(user_profile: Dict, data_loader, start_day: int = 1) -> str:
-    """
-    Generates a STRICT 6-Day Meal Plan WITH SPORT GEAR.
-    Args:
-        start_day: The day number to start generating from (default 1).
-    """
-
-    # --- STEP 1: STRICT VALIDATION ---
-    is_valid, error_msg = validate_profile(user_profile)
-    if not is_valid:
-        print(f"[AI] ⛔ Validation Failed: {error_msg}")
-        return f"ERROR: {error_msg}\nPlease provide a correct answer."
-
-    # --- STEP 2: DATA PREPARATION ---
+def build_plan_prompt(user_profile: Dict, data_loader, start_day: int = 1,
+                      end_day: Optional[int] = None, include_gear: bool = True) -> str:
+    """Prompt for a validated profile: condition info, sport gear and the recipe pool"""
 
     # Get condition info
     condition_info = None
@@ -98,40 +98,48 @@ def generate_meal_plan(user_profile: Dict, data_loader, start_day: int = 1) -> s
     sport_gear_list = data_loader.get_sport_gear(
         user_profile.get('sport', 'general'))
 
-    # Filter recipes
-    safe_recipes = data_loader.filter_by_allergies(
-        user_profile.get('allergies', []))
-
-    # Sort based on goal
+    # Select top matches based on goal (only these rows are read from the recipe
+    # table). Recipes carry no allergen data, so allergies reach Gemini through
+    # the prompt's restrictions instead of filtering this pool.
     user_goal = user_profile.get('goal', '').lower()
     if 'muscle' in user_goal or 'gain' in user_goal:
-        sorted_recipes = safe_recipes.sort_values(
-            by='protein', ascending=False)
+        final_recipe_pool = data_loader.top_recipes('protein', ascending=False, limit=25)
     elif 'loss' in user_goal:
-        valid_cal = safe_recipes[safe_recipes['calories'] > 0]
-        sorted_recipes = valid_cal.sort_values(by='calories', ascending=True)
+        final_recipe_pool = data_loader.top_recipes('calories', ascending=True, limit=25,
+                                                    positive_only=True)
     else:
-        sorted_recipes = safe_recipes
+        final_recipe_pool = data_loader.top_recipes(limit=25)
+
+    return _build_strict_prompt(
+        user_profile, condition_info, final_recipe_pool, sport_gear_list, start_day,
+        end_day, include_gear)
+
+
+def generate_meal_plan(user_profile: Dict, data_loader, start_day: int = 1) -> str:
+    """
+    Generates a STRICT 6-Day Meal Plan WITH SPORT GEAR.
+    Args:
+        start_day: The day number to start generating from (default 1).
+    """
 
-    # Select top matches
-    final_recipe_pool = sorted_recipes.head(25)
+    # --- STEP 1: STRICT VALIDATION ---
+    is_valid, error_msg = validate_profile(user_profile)
+    if not is_valid:
+        print(f"[AI] ⛔ Validation Failed: {error_msg}")
+        return f"ERROR: {error_msg}\nPlease provide a correct answer."
 
-    # --- STEP 3: BUILD STRICT PROMPT ---
-    prompt = _build_strict_prompt(
-        user_profile, condition_info, final_recipe_pool, sport_gear_list, start_day)
+    # --- STEP 2 & 3: DATA PREPARATION AND STRICT PROMPT ---
+    prompt = build_plan_prompt(user_profile, data_loader, start_day)
 
     try:
         print(
             f"[AI] Generating Days {start_day} to {start_day + 5} + Gear Recommendations...")
 
-        response = client.models.generate_content(
+        response = gemini.call_sync(lambda: client.models.generate_content(
             model=GEMINI_MODEL,
             contents=prompt,
-            config=GenerateContentConfig(
-                temperature=0.3,
-                max_output_tokens=8000
-            )
-        )
+            config=PLAN_CONFIG
+        ))
         return response.text
 
     except Exception as e:
@@ -139,8 +147,113 @@ def generate_meal_plan(user_profile: Dict, data_loader, start_day: int = 1) -> s
         return "System Error: Unable to generate plan. Please try again."
 
 
+async def stream_meal_plan(user_profile: Dict, data_loader, start_day: int = 1) -> AsyncIterator[str]:
+    """
+    Same plan as generate_meal_plan, yielded as text chunks while Gemini
+    produces them. Uses the async client, so it never blocks the event loop.
+    Upstream errors are raised so the caller can report them to the client.
+    """
+    is_valid, error_msg = validate_profile(user_profile)
+    if not is_valid:
+        print(f"[AI] ⛔ Validation Failed: {error_msg}")
+        yield f"ERROR: {error_msg}\nPlease provide a correct answer."
+        return
+
+    prompt = build_plan_prompt(user_profile, data_loader, start_day)
+    try:
+        print(
+            f"[AI] Streaming Days {start_day} to {start_day + 5} + Gear Recommendations...")
+
+        stream = gemini.stream(lambda: client.aio.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=PLAN_CONFIG
+        ))
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+    except Exception as e:
+        print(f"[AI] ✗ Error: {e}")
+        raise
+
+
+def plan_shards(days: int, shard_days: int) -> List[Tuple[int, int]]:
+    """(start_day, end_day) ranges covering days 1..days"""
+    return [(start, min(start + shard_days - 1, days))
+            for start in range(1, days + 1, shard_days)]
+
+
+async def _generate_shard(prompt: str, start_day: int, end_day: int,
+                          semaphore: asyncio.Semaphore, retries: int) -> str:
+    """One day range; only this range is retried (by the governor) when its call fails"""
+
+    async def generate():
+        response = await client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=PLAN_CONFIG
+        )
+        if not response.text:
+            raise RuntimeError("empty response")
+        return response.text
+
+    async with semaphore:
+        try:
+            return await gemini.call(generate, retries=retries)
+        except Exception as e:
+            print(f"[AI] ✗ Days {start_day}-{end_day} failed: {e!r}")
+            raise
+
+
+async def stream_meal_plan_sharded(user_profile: Dict, data_loader, days: int = PLAN_DAYS,
+                                   shard_days: int = PLAN_SHARD_DAYS,
+                                   concurrency: int = PLAN_CONCURRENCY) -> AsyncIterator[str]:
+    """
+    The plan split into day ranges of shard_days, generated concurrently
+    (at most `concurrency` calls at once). Each range is yielded once it and
+    every earlier range are done, so the output is always in day order; the
+    SPORT GEAR CHECKLIST is built locally and appended once at the end.
+    """
+    is_valid, error_msg = validate_profile(user_profile)
+    if not is_valid:
+        print(f"[AI] ⛔ Validation Failed: {error_msg}")
+        yield f"ERROR: {error_msg}\nPlease provide a correct answer."
+        return
+
+    shards = plan_shards(days, shard_days)
+    print(f"[AI] Generating Days 1 to {days} as {len(shards)} ranges "
+          f"({concurrency} at a time) + Gear Recommendations...")
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.create_task(_generate_shard(
+            build_plan_prompt(user_profile, data_loader, start, end, include_gear=False),
+            start, end, semaphore, PLAN_SHARD_RETRIES))
+        for start, end in shards
+    ]
+    try:
+        for task in tasks:
+            text = await task
+            yield text.strip("\n") + "\n\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    yield gear_checklist(data_loader.get_sport_gear(user_profile.get('sport', 'general')))
+
+
+async def generate_meal_plan_sharded(user_profile: Dict, data_loader, days: int = PLAN_DAYS,
+                                     shard_days: int = PLAN_SHARD_DAYS,
+                                     concurrency: int = PLAN_CONCURRENCY) -> str:
+    """stream_meal_plan_sharded joined into one text"""
+    parts = [part async for part in stream_meal_plan_sharded(
+        user_profile, data_loader, days, shard_days, concurrency)]
+    return "".join(parts)
+
+
 def _build_strict_prompt(user_profile: Dict, condition_info: Optional[Dict],
-                         available_recipes: pd.DataFrame, sport_gear: List[str], start_day: int) -> str:
+                         available_recipes: pd.DataFrame, sport_gear: List[str], start_day: int,
+                         end_day: Optional[int] = None, include_gear: bool = True) -> str:
 
     # Format Recipe String
     recipe_text = "Standard healthy options."
@@ -153,17 +266,52 @@ def _build_strict_prompt(user_profile: Dict, condition_info: Optional[Dict],
     cond_str = "None"
     if condition_info:
         cond_str = f"{condition_info['name']}\n   (Must Eat: {', '.join(condition_info['recommended'])})\n   (Avoid: {', '.join(condition_info['restricted'])})"
+    elif user_profile.get('condition') and user_profile['condition'].lower() not in ['none', 'no', 'nothing']:
+        # Not a known condition: pass on what the user wrote rather than a guess
+        cond_str = user_profile['condition']
 
     # Format Sport Gear String
     gear_str = ", ".join(
         sport_gear) if sport_gear else "Standard Athletic Wear"
 
-    # Calculate End Day
-    end_day = start_day + 5
+    # Calculate End Day (a 6-day plan unless a day range is given)
+    if end_day is None:
+        end_day = start_day + 5
+    num_days = end_day - start_day + 1
+
+    # Day-range shards leave the checklist out; it is appended once after merging
+    if include_gear:
+        task = f"{start_day}-Day to {end_day}-Day Meal Plan + Sport Gear Checklist"
+        gear_data = f"RECOMMENDED SPORT GEAR: {gear_str}"
+        gear_rule = f'AFTER DAY {end_day}, ADD A "SPORT GEAR CHECKLIST" SECTION based on the data provided above.'
+        gear_template = """SPORT GEAR CHECKLIST
+    (List the recommended gear items provided in the prompt)"""
+    else:
+        task = f"{start_day}-Day to {end_day}-Day Meal Plan"
+        gear_data = ""
+        gear_rule = f"STOP RIGHT AFTER DAY {end_day}. NO SPORT GEAR section, NO summary."
+        gear_template = ""
+
+    # Template: the first day in full, then the remaining day headers
+    later_days = ""
+    if num_days > 1:
+        later_days = f"""
+    Day {start_day + 1}
+    (Repeat Format)
+"""
+    if num_days > 3:
+        later_days += """
+    ...
+"""
+    if num_days > 2:
+        later_days += f"""
+    Day {end_day}
+    (Repeat Format)
+"""
 
     prompt = f"""
     ROLE: Strict Clinical Nutrition & Sports Engine.
-    TASK: Generate a {start_day}-Day to {end_day}-Day Meal Plan + Sport Gear Checklist.
+    TASK: Generate a {task}.
 
     USER DATA (VALIDATED):
     - Goal: {user_profile.get('goal')}
@@ -175,17 +323,17 @@ def _build_strict_prompt(user_profile: Dict, condition_info: Optional[Dict],
 
     AVAILABLE RECIPES: {recipe_text}
     
-    RECOMMENDED SPORT GEAR: {gear_str}
+    {gear_data}
 
     ==================================================
     CRITICAL GENERATION RULES:
-    1. Generate EXACTLY 6 DAYS (Day {start_day} to Day {end_day}).
+    1. Generate EXACTLY {num_days} DAYS (Day {start_day} to Day {end_day}).
     2. DO NOT STOP GENERATING UNTIL DAY {end_day} IS COMPLETE.
     3. Start directly with Day {start_day}.
     4. PLAIN TEXT ONLY. NO Markdown, NO Emojis, NO Bullets.
     5. Each day MUST include: Breakfast, Mid-Morning Snack, Lunch, Evening Snack, Dinner.
     6. Include Calorie counts and Prep Time for main meals.
-    7. AFTER DAY {end_day}, ADD A "SPORT GEAR CHECKLIST" SECTION based on the data provided above.
+    7. {gear_rule}
     ==================================================
 
     OUTPUT TEMPLATE (Must follow strict format):
@@ -196,33 +344,51 @@ def _build_strict_prompt(user_profile: Dict, condition_info: Optional[Dict],
     Lunch: [Meal] | [Cal] cal | [Time] min
     Evening Snack: [Meal] | [Cal] cal
     Dinner: [Meal] | [Cal] cal | [Time] min
+    {later_days}
 
-    Day {start_day + 1}
-    (Repeat Format)
-
-    ...
-
-    Day {end_day}
-    (Repeat Format)
-    
-
-    SPORT GEAR CHECKLIST
-    (List the recommended gear items provided in the prompt)
+    {gear_template}
 
     (STOP GENERATION HERE)
     """
     return prompt
 
 
+def gear_checklist(sport_gear: List[str]) -> str:
+    """The SPORT GEAR CHECKLIST section, built locally for sharded plans"""
+    items = sport_gear or ["Standard Athletic Wear"]
+    return "SPORT GEAR CHECKLIST\n" + "\n".join(items) + "\n"
+
+
+ADVICE_CONFIG = GenerateContentConfig(temperature=0.5, max_output_tokens=300)
+
+
 def get_quick_nutrition_advice(question: str) -> str:
     """Quick Q&A - Text Only"""
     try:
-        response = client.models.generate_content(
+        response = gemini.call_sync(lambda: client.models.generate_content(
             model=GEMINI_MODEL,
             contents=f"Answer strictly in plain text (no markdown): {question}",
-            config=GenerateContentConfig(
-                temperature=0.5, max_output_tokens=300)
-        )
+            config=ADVICE_CONFIG
+        ), timeout=ASK_TIMEOUT)
         return response.text
     except:
         return "Service unavailable."
+
+
+async def ask_nutrition_advice(question: str) -> str:
+    """
+    Quick Q&A on the async client, with the short ASK_TIMEOUT deadline.
+    Raises on upstream errors (GovernorError when shed or the circuit is
+    open) so failures are not cached.
+    """
+    async def ask():
+        response = await client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=f"Answer strictly in plain text (no markdown): {question}",
+            config=ADVICE_CONFIG
+        )
+        if not response.text:
+            raise RuntimeError("Empty answer")
+        return response.text
+
+    return await gemini.call(ask, timeout=ASK_TIMEOUT)
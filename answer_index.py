@@ -0,0 +1,334 @@
+# ============================================================================
+# Answer Index - local answers for /ask before anything goes to Gemini
+# Questions are normalized and turned into character-trigram vectors; a
+# question whose cosine similarity with a known one reaches
+# ANSWER_MATCH_THRESHOLD gets that answer straight away, as long as both ask
+# the same thing: negations and numbers must be equal and every topic word
+# needs a counterpart. Known questions start with a small seed FAQ, and every
+# answer fetched from Gemini is appended to answers.jsonl (shared by all
+# workers, bounded by a TTL and an entry limit) and indexed.
+# ============================================================================
+
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from config import ANSWER_MATCH_THRESHOLD, ANSWER_MAX_ENTRIES, ANSWER_TTL_DAYS
+from shared_files import file_lock
+
+ANSWERS_PATH = os.path.join("cache", "answers.jsonl")
+
+# Common questions answered without a model call
+SEED_FAQ = [
+    ("How much protein is in an egg?",
+     "One large egg has about 6 grams of protein, a little over half of it in the white."),
+    ("How many calories are in an egg?",
+     "One large egg has about 70 to 80 calories."),
+    ("How many calories are in a banana?",
+     "A medium banana has about 105 calories, mostly from carbohydrates."),
+    ("How much protein is in chicken breast?",
+     "Cooked skinless chicken breast has about 31 grams of protein per 100 grams."),
+    ("How much protein do I need per day?",
+     "Most adults need about 0.8 grams of protein per kilogram of body weight a day. "
+     "People who train regularly usually aim for 1.2 to 2.0 grams per kilogram."),
+    ("How much water should I drink a day?",
+     "A common target is about 2.7 liters of total fluids a day for women and 3.7 liters for men, "
+     "including water from food. Drink more when you sweat a lot."),
+    ("How many calories should I eat to lose weight?",
+     "A deficit of about 500 calories a day below your maintenance needs leads to roughly "
+     "0.5 kilograms of weight loss per week for most people."),
+    ("What should I eat before a workout?",
+     "Eat easy-to-digest carbohydrates such as a banana, toast or oats 30 to 60 minutes before "
+     "training, with a little protein if the meal is larger."),
+    ("What should I eat after a workout?",
+     "Have protein and carbohydrates within about two hours after training, for example "
+     "yogurt with fruit, eggs on toast or rice with chicken or lentils."),
+    ("Is rice good for weight loss?",
+     "Rice can fit a weight-loss diet in measured portions. Brown rice has more fiber, "
+     "which helps keep you full."),
+    ("How much fiber should I eat per day?",
+     "Aim for about 25 grams of fiber a day for women and 38 grams for men, from whole grains, "
+     "legumes, vegetables and fruit."),
+    ("What are good vegetarian protein sources?",
+     "Lentils, chickpeas, beans, tofu, tempeh, paneer, Greek yogurt, eggs, milk, nuts and seeds "
+     "are all good vegetarian protein sources."),
+    ("How many calories are in an apple?",
+     "A medium apple has about 95 calories and 4 grams of fiber."),
+    ("How much sugar should I eat per day?",
+     "Keep added sugar below 10 percent of your daily calories, ideally under about 25 grams a day."),
+    ("Are eggs bad for cholesterol?",
+     "For most healthy people, an egg a day does not raise heart disease risk. "
+     "If you have high cholesterol or diabetes, ask your doctor how many to eat."),
+]
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_NOT_CONTRACTION = re.compile(r"n['’]t\b")
+
+# Question words that say little about the topic ("how many calories are in an
+# apple" vs "... an egg" should differ by the food, not match on the phrasing)
+STOP_WORDS = set(
+    "a an the is are am be do does i my me you your in of for to on at per much many "
+    "how what which should can could would will it there please tell about with and or "
+    "has have contain contains".split())
+
+# Words that turn a question around; a cached answer needs the same ones
+NEGATIONS = {"not", "no", "never", "without", "avoid", "dont", "cannot"}
+NUMBER_WORDS = {"one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6",
+                "seven": "7", "eight": "8", "nine": "9", "ten": "10", "twelve": "12",
+                "half": "0.5", "dozen": "12"}
+WORD_MATCH_RATIO = 0.8  # Min difflib ratio for a misspelled word to count as the same word
+
+
+def normalize_question(question: str) -> str:
+    """
+    Lowercase, accents and punctuation removed, "n't" spelled "not", stop words
+    dropped (unless nothing else is left), whitespace collapsed
+    """
+    text = _NOT_CONTRACTION.sub(" not", question.lower())
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    words = _NON_WORD.sub(" ", text).split()
+    return " ".join([w for w in words if w not in STOP_WORDS] or words)
+
+
+def question_terms(normalized: str) -> Tuple[frozenset, Tuple[str, ...]]:
+    """Negation words and numbers of a normalized question, which must match exactly"""
+    words = normalized.split()
+    negations = frozenset(w for w in words if w in NEGATIONS)
+    numbers = tuple(sorted(NUMBER_WORDS.get(w, w) for w in words
+                           if w.isdigit() or w in NUMBER_WORDS))
+    return negations, numbers
+
+
+def _covers(words: List[str], others: List[str]) -> bool:
+    """True if every word has the same or a close (misspelled) word among others"""
+    for word in words:
+        if word in others:
+            continue
+        if not any(SequenceMatcher(None, word, other).ratio() >= WORD_MATCH_RATIO
+                   for other in others):
+            return False
+    return True
+
+
+def same_question(query: str, known: str) -> bool:
+    """
+    Whether a normalized query asks what a similar known question asks: same
+    negations and numbers, and no topic word on either side without a match
+    ("white rice" is not "rice", "2 bananas" is not "a banana")
+    """
+    if question_terms(query) != question_terms(known):
+        return False
+    query_words, known_words = query.split(), known.split()
+    return _covers(query_words, known_words) and _covers(known_words, query_words)
+
+
+def trigram_vector(normalized: str) -> Dict[str, float]:
+    """L2-normalized character-trigram counts (words padded with spaces)"""
+    counts = Counter()
+    for word in normalized.split():
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            counts[padded[i:i + 3]] += 1
+    norm = math.sqrt(sum(c * c for c in counts.values()))
+    return {gram: c / norm for gram, c in counts.items()} if norm else {}
+
+
+class AnswerIndex:
+    """
+    Known questions and answers with a trigram inverted index for near-duplicate
+    lookup. Fetched answers expire after ANSWER_TTL_DAYS, and the file (and with
+    it the index) is compacted to the newest ANSWER_MAX_ENTRIES once it holds a
+    quarter more than that.
+    """
+
+    def __init__(self, path: str = ANSWERS_PATH, threshold: float = ANSWER_MATCH_THRESHOLD,
+                 max_entries: int = ANSWER_MAX_ENTRIES, ttl_days: float = ANSWER_TTL_DAYS):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl_days * 86400
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.added = 0
+        self.compactions = 0
+        self.lookup_time = 0.0
+
+        self._reset()
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def _reset(self):
+        """Only the seed FAQ indexed, the answers file not read yet"""
+        self._questions: List[str] = []
+        self._answers: List[str] = []
+        self._normalized: List[str] = []
+        self._created: List[Optional[float]] = []  # None for the seed FAQ, which never expires
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        self._by_text: Dict[str, int] = {}
+        self._offset = 0
+        self._inode = None
+        self._file_records = 0
+        for question, answer in SEED_FAQ:
+            self._index(question, answer)
+
+    def _index(self, question: str, answer: str, created: Optional[float] = None):
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        existing = self._by_text.get(normalized)
+        if existing is not None:
+            self._answers[existing] = answer
+            self._created[existing] = created
+            return
+        entry = len(self._questions)
+        self._questions.append(question)
+        self._answers.append(answer)
+        self._normalized.append(normalized)
+        self._created.append(created)
+        self._by_text[normalized] = entry
+        for gram, weight in trigram_vector(normalized).items():
+            self._postings[gram].append((entry, weight))
+
+    def refresh(self):
+        """Index answers appended to the file since the last look (by any worker)"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        with self._lock:
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # Compacted by another worker: start again from the new file
+                self._reset()
+                self._inode = stat.st_ino
+            if stat.st_size <= self._offset:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                f.seek(self._offset)
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break  # partial line still being written
+                    self._offset = f.tell()
+                    try:
+                        record = json.loads(line)
+                        self._index(record["question"], record["answer"], record.get("created", 0.0))
+                        self._file_records += 1
+                    except (ValueError, KeyError):
+                        continue
+
+    def _expired(self, entry: int, now: float) -> bool:
+        created = self._created[entry]
+        return created is not None and now - created > self.ttl
+
+    def search(self, question: str, threshold: float = 0.0) -> Optional[Tuple[str, str, float]]:
+        """
+        Closest known question at or above threshold that asks the same thing
+        (see same_question), as (question, answer, similarity), or None
+        """
+        normalized = normalize_question(question)
+        now = time.time()
+        exact = self._by_text.get(normalized)
+        if exact is not None and not self._expired(exact, now):
+            return self._questions[exact], self._answers[exact], 1.0
+
+        scores = defaultdict(float)
+        for gram, weight in trigram_vector(normalized).items():
+            for entry, entry_weight in self._postings.get(gram, ()):
+                scores[entry] += weight * entry_weight
+        for entry in sorted(scores, key=scores.get, reverse=True):
+            if scores[entry] < threshold:
+                break
+            if self._expired(entry, now):
+                continue
+            if same_question(normalized, self._normalized[entry]):
+                return self._questions[entry], self._answers[entry], scores[entry]
+            self.rejected += 1
+        return None
+
+    def lookup(self, question: str, threshold: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """
+        (answer, similarity) if a known question is close enough, else None.
+        Reads the shared file, so async callers run it in an executor (as add)
+        """
+        threshold = self.threshold if threshold is None else threshold
+        started = time.perf_counter()
+        self.refresh()
+        with self._lock:
+            found = self.search(question, threshold)
+            self.lookup_time += time.perf_counter() - started
+            if found is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return found[1], found[2]
+
+    def add(self, question: str, answer: str):
+        """Index an upstream answer and append it to the shared file"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        line = json.dumps({"question": question, "answer": answer, "created": time.time()})
+        # A separate lock file, since compaction replaces the answers file itself
+        with file_lock(self.path + ".lock"):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        with self._lock:
+            self.added += 1
+        self.refresh()
+        if self._file_records > self.max_entries + self.max_entries // 4:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the file with the newest unexpired answers, at most max_entries"""
+        with file_lock(self.path + ".lock"):
+            records = {}
+            now = time.time()
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                            key = normalize_question(record["question"])
+                        except (ValueError, KeyError):
+                            continue
+                        if key and now - record.get("created", 0.0) <= self.ttl:
+                            records.pop(key, None)
+                            records[key] = record  # later answers win, as in _index
+            except OSError:
+                return
+            kept = list(records.values())[-self.max_entries:]
+            temp = self.path + ".tmp"
+            with open(temp, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in kept)
+            os.replace(temp, self.path)
+        with self._lock:
+            self.compactions += 1
+        self.refresh()  # new inode: the index is rebuilt from the compacted file
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._questions),
+            "file_records": self._file_records,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "rejected": self.rejected,
+            "added": self.added,
+            "compactions": self.compactions,
+            "avg_lookup_us": round(1e6 * self.lookup_time / lookups, 1) if lookups else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+answer_index = AnswerIndex()
@@ -0,0 +1,254 @@
+# ============================================================================
+# Auth Engine - concurrent blink-and-match face authentication sessions
+# Every /register or /login call opens its own session with its own blink
+# counters, deadline and result. Sessions live in the shared store, so any
+# worker can poll them, and are swept from it AUTH_STATE_TTL after their
+# last change. Frame processing (detection, landmarks, encoding,
+# JPEG) runs on a worker pool shared by all sessions.
+# ============================================================================
+
+import asyncio
+import contextlib
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from imutils import face_utils
+
+import face_models  # registers the face models
+from blink import BlinkStateMachine, eye_aspect_ratio
+from config import REQUIRED_BLINKS, AUTH_SESSION_TIMEOUT, AUTH_STATE_TTL, AUTH_WORKERS, FACE_TRACKING
+from face_tracker import FaceTracker
+from model_registry import registry
+from preview_encoder import PreviewEncoder
+from shared_state import shared_state
+
+
+def face_descriptor(rgb: np.ndarray, landmarks) -> np.ndarray:
+    """
+    128-d encoding from landmarks the blink loop already predicted, passed
+    straight to face_recognition's ResNet instead of letting
+    face_encodings() run its own landmark model on the same face.
+    """
+    face_recognition = registry.get("face_recognition")
+    return np.array(face_recognition.api.face_encoder.compute_face_descriptor(rgb, landmarks, 1))
+
+
+class AuthSession:
+    """Per-attempt state; frames of one session are processed one at a time"""
+
+    def __init__(self, session_id: str, mode: str, user: Optional[str], deadline: float):
+        self.session_id = session_id
+        self.mode = mode
+        self.user = user
+        self.deadline = deadline
+        self.blinks = BlinkStateMachine()
+        self.result: Optional[Dict] = None
+        self.lock = threading.Lock()
+        self.tracker = FaceTracker() if FACE_TRACKING else None
+
+    @property
+    def total_blinks(self) -> int:
+        return self.blinks.total
+
+    @property
+    def expired(self) -> bool:
+        return time.time() > self.deadline
+
+    @property
+    def active(self) -> bool:
+        return self.result is None and not self.expired
+
+
+class AuthEngine:
+    """Opens sessions, runs their frames on a shared pool and records results"""
+
+    def __init__(self, workers: int = AUTH_WORKERS, timeout: float = AUTH_SESSION_TIMEOUT):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth")
+        self.timeout = timeout
+        self._sessions: Dict[str, AuthSession] = {}
+        self._lock = threading.Lock()
+
+        self.started = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.frames = 0
+        self.frame_time_total = 0.0
+        self._finished_at = deque(maxlen=1000)
+        self._swept_at = 0.0
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"auth:{session_id}"
+
+    def start(self, mode: str, user: Optional[str] = None) -> str:
+        """Open a session and return its ID"""
+        session_id = uuid.uuid4().hex
+        shared_state.set(self._key(session_id), {
+            "mode": mode, "user": user,
+            "deadline": time.time() + self.timeout, "result": None,
+        })
+        with self._lock:
+            self.started += 1
+        self._sweep()
+        return session_id
+
+    def _sweep(self):
+        """Drop the shared state of sessions long finished or expired (at most once a minute)"""
+        now = time.time()
+        if now - self._swept_at < 60:
+            return
+        self._swept_at = now
+        removed = shared_state.delete_stale(self._key(""), max(AUTH_STATE_TTL, self.timeout))
+        if removed:
+            print(f"[Auth] Removed {removed} old sessions from shared state")
+
+    def session(self, session_id: str) -> Optional[AuthSession]:
+        """The local session object, created from the shared store on first use"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                state = shared_state.get(self._key(session_id))
+                if state is None:
+                    return None
+                session = AuthSession(session_id, state["mode"], state["user"], state["deadline"])
+                session.result = state["result"]
+                self._sessions[session_id] = session
+            return session
+
+    def result(self, session_id: str) -> Optional[Dict]:
+        """Result of a session for /result (a timeout counts as a failed result)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        # Frames of a local session finish under its lock; other workers'
+        # results are kept safe by the conditional update
+        with session.lock if session is not None else contextlib.nullcontext():
+            state, timed_out = shared_state.update_if(
+                self._key(session_id),
+                lambda state: bool(state) and state["result"] is None and time.time() > state["deadline"],
+                result={"status": "failed", "message": "Authentication timed out"})
+            if timed_out:
+                with self._lock:
+                    self.timed_out += 1
+                if session is not None:
+                    session.result = state["result"]
+        if not state:
+            return {"status": "failed", "message": "Unknown session"}
+        return state["result"]
+
+    def _finish(self, session: AuthSession, result: Dict):
+        """Record a result unless the session already has one (e.g. a timeout); caller holds session.lock"""
+        state, finished = shared_state.update_if(
+            self._key(session.session_id), lambda state: state.get("result") is None, result=result)
+        session.result = state.get("result", result)
+        with self._lock:
+            if finished:
+                self.completed += 1
+                self._finished_at.append(time.time())
+            self._sessions.pop(session.session_id, None)
+
+    def fail(self, session: AuthSession, message: str):
+        """End a session with a failed result, e.g. when its frames cannot be analyzed"""
+        with session.lock:
+            self._finish(session, {"status": "failed", "message": message})
+
+    def close(self, session: AuthSession):
+        """Forget the local state of a session whose stream has ended"""
+        with self._lock:
+            self._sessions.pop(session.session_id, None)
+
+    def _decide(self, session: AuthSession, encoding: np.ndarray) -> Dict:
+        users_db = registry.get("users_db")
+        if session.mode == "register":
+            if session.user in users_db:
+                return {"status": "failed", "message": "User already exists"}
+            users_db.add(session.user, encoding)
+            return {"status": "success", "message": f"Registered as {session.user}",
+                    "user": session.user, "redirect": True}
+
+        if not len(users_db.index):
+            return {"status": "failed", "message": "No registered users found"}
+        matched_name, _ = users_db.match(encoding)
+        if matched_name is None:
+            return {"status": "failed", "message": "Face not recognized"}
+        return {"status": "success", "message": f"Welcome back {matched_name}!",
+                "user": matched_name, "redirect": True}
+
+    def analyze_frame(self, session: AuthSession, frame: np.ndarray) -> Tuple[np.ndarray, int]:
+        """
+        Run blink detection (and matching once blinks are done) on one frame.
+        Returns the resized frame and the number of faces found in it.
+        """
+        started = time.perf_counter()
+        detector = registry.get("face_detector")
+        predictor = registry.get("shape_predictor")
+
+        with session.lock:
+            frame = cv2.resize(frame, None, fx=0.75, fy=0.75)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+            if session.tracker is not None:
+                rects = session.tracker.update(gray)
+            else:
+                rects = detector(gray, 0)
+
+            for rect in rects:
+                landmarks = predictor(gray, rect)
+                session.blinks.update(eye_aspect_ratio(face_utils.shape_to_np(landmarks)))
+
+                if session.total_blinks >= REQUIRED_BLINKS and session.active:
+                    # RGB is only needed for the one frame that gets encoded
+                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    self._finish(session, self._decide(session, face_descriptor(rgb, landmarks)))
+
+        elapsed = time.perf_counter() - started
+        with self._lock:  # frames of several sessions finish on the pool at once
+            self.frames += 1
+            self.frame_time_total += elapsed
+        return frame, len(rects)
+
+    @staticmethod
+    def render_preview(session: AuthSession, frame: np.ndarray, faces: int,
+                       encoder: PreviewEncoder) -> bytes:
+        """Draw the blink overlay on a preview-size copy of the frame and encode it as JPEG"""
+        frame = encoder.resize(frame)
+        if faces:
+            cv2.putText(frame, f"Blinks: {session.total_blinks}/{REQUIRED_BLINKS}",
+                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+            cv2.putText(frame, "Blink Twice to Authenticate",
+                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+        return encoder.encode(frame)
+
+    def process_jpeg(self, session: AuthSession, data: bytes) -> bool:
+        """Decode a frame sent by the browser and analyze it, False if undecodable"""
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            return False
+        self.analyze_frame(session, frame)
+        return True
+
+    async def process_encoded(self, session: AuthSession, data: bytes) -> bool:
+        """process_jpeg on the shared worker pool"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pool, self.process_jpeg, session, data)
+
+    def stats(self) -> Dict:
+        now = time.time()
+        recent = sum(1 for t in self._finished_at if now - t <= 60)
+        return {
+            "active_sessions": len(self._sessions),
+            "started": self.started,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "completed_per_s_1m": round(recent / 60.0, 3),
+            "frames": self.frames,
+            "avg_frame_ms": round(1000 * self.frame_time_total / self.frames, 2) if self.frames else 0.0,
+        }
+
+
+engine = AuthEngine()
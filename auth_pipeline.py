@@ -0,0 +1,182 @@
+# ============================================================================
+# Auth Pipeline - concurrent capture / analyze / preview stages for /video
+# Each stage runs on its own thread and hands frames to the next through a
+# one-slot "latest frame wins" queue. Blink analysis therefore samples at
+# its own steady rate even when JPEG encoding or the client falls behind;
+# a slow stage only drops frames, it never stalls the stage before it.
+# The preview stage also paces itself to PREVIEW_FPS and skips encoding
+# while the client has not taken the previous JPEG.
+# ============================================================================
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+from auth_engine import AuthSession, engine
+from preview_encoder import PreviewEncoder
+
+
+class LatestSlot:
+    """Thread-safe one-item queue where a new put replaces an untaken item"""
+
+    def __init__(self):
+        self._item = None
+        self._cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """The newest item, or None on timeout or once closed"""
+        with self._cond:
+            if self._item is None and not self.closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    @property
+    def pending(self) -> bool:
+        """Whether an item is waiting to be taken"""
+        return self._item is not None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class StageTimer:
+    """Frames handled and busy time for one pipeline stage"""
+
+    def __init__(self):
+        self.frames = 0
+        self.busy = 0.0
+        self.started = time.perf_counter()
+
+    def record(self, seconds: float):
+        self.frames += 1
+        self.busy += seconds
+
+    def stats(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "frames": self.frames,
+            "avg_ms": round(1000 * self.busy / self.frames, 2) if self.frames else 0.0,
+            "fps": round(self.frames / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+active_pipelines = weakref.WeakSet()  # pipelines currently streaming, for /metrics/auth
+
+
+class AuthPipeline:
+    """capture -> analyze -> preview for one session, each stage on its own thread"""
+
+    def __init__(self, session: AuthSession, source):
+        self.session = session
+        self.source = source
+        self.analyze_in = LatestSlot()
+        self.preview_in = LatestSlot()
+        self.preview_out = LatestSlot()
+        self.timers = {name: StageTimer() for name in ("capture", "analyze", "preview")}
+        self.encoder = PreviewEncoder()
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture, name="auth-capture", daemon=True),
+            threading.Thread(target=self._analyze, name="auth-analyze", daemon=True),
+            threading.Thread(target=self._preview, name="auth-preview", daemon=True),
+        ]
+
+    @property
+    def running(self) -> bool:
+        return self._running and self.session.active
+
+    def start(self):
+        active_pipelines.add(self)
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._running = False
+        for slot in (self.analyze_in, self.preview_in, self.preview_out):
+            slot.close()
+
+    def _capture(self):
+        try:
+            while self.running:
+                started = time.perf_counter()
+                success, frame = self.source.read()
+                if not success:
+                    break
+                self.timers["capture"].record(time.perf_counter() - started)
+                self.analyze_in.put(frame)
+        finally:
+            self.source.release()
+            self.stop()
+
+    def _analyze(self):
+        try:
+            while self.running:
+                frame = self.analyze_in.get(timeout=0.5)
+                if frame is None:
+                    continue
+                started = time.perf_counter()
+                analyzed = engine.analyze_frame(self.session, frame)
+                self.timers["analyze"].record(time.perf_counter() - started)
+                self.preview_in.put(analyzed)
+        except Exception as e:
+            # e.g. a model still failed; end the session instead of leaving /video waiting
+            print(f"[Auth] ✗ Analysis failed for {self.session.session_id[:8]}: {e}")
+            engine.fail(self.session, f"Face analysis failed: {e}")
+        finally:
+            self.stop()
+
+    def _preview(self):
+        while self.running:
+            item = self.preview_in.get(timeout=0.5)
+            if item is None or not self.encoder.due():
+                continue
+            if self.preview_out.pending:
+                self.encoder.skip_backlog()
+                continue
+            started = time.perf_counter()
+            frame, faces = item
+            jpeg = engine.render_preview(self.session, frame, faces, self.encoder)
+            self.timers["preview"].record(time.perf_counter() - started)
+            self.preview_out.put(jpeg)
+
+    async def frames(self):
+        """Preview JPEGs as an async iterator for the MJPEG response"""
+        loop = asyncio.get_running_loop()
+        self.start()
+        try:
+            while True:
+                jpeg = await loop.run_in_executor(None, self.preview_out.get, 0.5)
+                if jpeg is not None:
+                    yield jpeg
+                elif self.preview_out.closed:
+                    break
+        finally:
+            self.stop()
+            active_pipelines.discard(self)
+            print(f"[Auth] Pipeline for {self.session.session_id[:8]} finished: {self.stats()}")
+
+    def stats(self) -> Dict:
+        return {
+            "session": self.session.session_id[:8],
+            "stages": {name: timer.stats() for name, timer in self.timers.items()},
+            "dropped": {
+                "before_analyze": self.analyze_in.dropped,
+                "before_preview": self.preview_in.dropped,
+                "before_send": self.preview_out.dropped,
+            },
+            "preview": self.encoder.stats(),
+        }
@@ -0,0 +1,128 @@
+# ============================================================================
+# Auth Routes - face login pages and endpoints, shared by main.py and login.py
+# ============================================================================
+
+import asyncio
+import time
+
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+from auth_engine import engine
+from auth_pipeline import AuthPipeline, active_pipelines
+from config import AUTH_FRAME_SOURCE, REQUIRED_BLINKS
+from embedding_store import NAME_BYTES
+from frame_sources import LatestFrame, open_frame_source
+from http_cache import pages
+from model_registry import registry
+
+router = APIRouter()
+
+
+@router.get("/", response_class=HTMLResponse)
+def index(request: Request):
+    return pages.response(request, "login.html")
+
+
+async def camera_frames(session):
+    try:
+        # Opening a camera blocks (cv2.VideoCapture), so not on the event loop
+        source = await asyncio.get_running_loop().run_in_executor(
+            None, open_frame_source, AUTH_FRAME_SOURCE)
+        pipeline = AuthPipeline(session, source)
+        async for frame_bytes in pipeline.frames():
+            yield (b"--frame\r\n"
+                   b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n")
+    finally:
+        engine.close(session)
+
+
+@router.get("/video")
+def video(session_id: str):
+    session = engine.session(session_id)
+    if session is None or not session.active:
+        return JSONResponse({"error": "Camera not active"}, status_code=400)
+
+    return StreamingResponse(
+        camera_frames(session),
+        media_type="multipart/x-mixed-replace; boundary=frame"
+    )
+
+
+@router.websocket("/ws/auth/{session_id}")
+async def auth_socket(websocket: WebSocket, session_id: str):
+    """
+    Frame ingestion from the browser: the client sends JPEG frames as binary
+    messages and gets blink progress and the final result back as JSON.
+    Frames that arrive while one is being processed replace each other, so
+    a slow server always works on the newest frame.
+    """
+    await websocket.accept()
+    session = engine.session(session_id)
+    if session is None or not session.active:
+        await websocket.send_json({"result": engine.result(session_id)})
+        await websocket.close()
+        return
+
+    mailbox = LatestFrame()
+
+    async def receive():
+        try:
+            while True:
+                mailbox.put(await websocket.receive_bytes())
+        except (WebSocketDisconnect, KeyError, RuntimeError):
+            mailbox.close()
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while session.active:
+            try:
+                data = await asyncio.wait_for(
+                    mailbox.get(), timeout=max(0.1, session.deadline - time.time()))
+            except asyncio.TimeoutError:
+                continue
+            if data is None:
+                return
+            await engine.process_encoded(session, data)
+            await websocket.send_json({
+                "blinks": session.total_blinks,
+                "required": REQUIRED_BLINKS,
+                "dropped": mailbox.dropped,
+                "result": session.result,
+            })
+        await websocket.send_json({"result": engine.result(session_id)})
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        receiver.cancel()
+        engine.close(session)
+
+
+@router.post("/register")
+def register(username: str):
+    if not username or len(username.encode("utf-8")) > NAME_BYTES:
+        return JSONResponse({"error": f"Username must be 1-{NAME_BYTES} bytes"}, status_code=400)
+    if username in registry.get("users_db"):
+        return JSONResponse({"error": "User already exists"}, status_code=400)
+
+    session_id = engine.start("register", username)
+    return {"status": "Camera started for registration", "session_id": session_id}
+
+
+@router.post("/login")
+def login():
+    session_id = engine.start("login")
+    return {"status": "Camera started for login", "session_id": session_id}
+
+
+@router.get("/result")
+def result(session_id: str):
+    return JSONResponse({"result": engine.result(session_id)})
+
+
+@router.get("/metrics/auth")
+def auth_metrics():
+    stats = engine.stats()
+    stats["pipelines"] = [pipeline.stats() for pipeline in list(active_pipelines)]
+    return JSONResponse(stats)
@@ -0,0 +1,111 @@
+# ============================================================================
+# Condition lookup benchmark
+# Builds a conditions table of --size names (the built-in ones plus generated
+# ones), then times the old per-call column scan (lowercase the whole name
+# column and compare) against ConditionIndex exact, alias and fuzzy lookups.
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_condition_index --size 10000 --lookups 2000
+# ============================================================================
+
+import argparse
+import random
+import time
+
+from condition_index import ALIASES, ConditionIndex
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+ADJECTIVES = ["Chronic", "Acute", "Juvenile", "Hereditary", "Idiopathic", "Secondary",
+              "Primary", "Autoimmune", "Congenital", "Allergic", "Seasonal", "Reactive"]
+ORGANS = ["Renal", "Hepatic", "Cardiac", "Gastric", "Pulmonary", "Thyroid", "Pancreatic",
+          "Intestinal", "Dermal", "Neural", "Vascular", "Adrenal", "Biliary", "Bone"]
+KINDS = ["Insufficiency", "Inflammation", "Syndrome", "Disorder", "Deficiency",
+         "Hyperplasia", "Dysfunction", "Sensitivity", "Intolerance", "Fibrosis"]
+
+
+def make_names(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    names = sorted(set(ALIASES.values()))
+    seen = {n.lower() for n in names}
+    while len(names) < size:
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(ORGANS)} {rng.choice(KINDS)} {rng.randint(1, 999)}"
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1:]  # one character dropped
+
+
+def timed(fn, queries):
+    found = 0
+    started = time.perf_counter()
+    for query in queries:
+        found += fn(query) is not None
+    elapsed = time.perf_counter() - started
+    return 1e6 * elapsed / len(queries), found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    names = make_names(args.size)
+    n = len(names)
+    recommended = [["Whole Foods", "Vegetables"]] * n
+    restricted = [["Processed Foods"]] * n
+    severity = ["medium"] * n
+
+    started = time.perf_counter()
+    index = ConditionIndex(names, recommended, restricted, severity)
+    build_ms = 1e3 * (time.perf_counter() - started)
+
+    exact = [rng.choice(names).upper() for _ in range(args.lookups)]
+    aliases = [rng.choice(list(ALIASES)) for _ in range(args.lookups)]
+    typos = [misspell(rng.choice(names), rng) for _ in range(args.lookups)]
+
+    if pd is not None:
+        frame = pd.DataFrame({"name": names, "recommended_foods": recommended,
+                              "restricted_foods": restricted, "severity_level": severity})
+
+        def column_scan(query):
+            rows = frame[frame["name"].str.lower() == query.lower()]
+            return None if rows.empty else rows.iloc[0]["recommended_foods"]
+        baseline = "pandas .str.lower() scan"
+    else:
+        def column_scan(query):
+            lowered = [name.lower() for name in names]
+            query = query.lower()
+            for i, name in enumerate(lowered):
+                if name == query:
+                    return recommended[i]
+            return None
+        baseline = "list lowercase scan (pandas not installed)"
+
+    print(f"{n} conditions, index built in {build_ms:.1f} ms")
+    print(f"{'lookup':<34} {'us/call':>10} {'found':>8}")
+    scan_us, scan_found = timed(column_scan, exact[:max(1, args.lookups // 10)])
+    print(f"{baseline:<34} {scan_us:>10.1f} {scan_found:>7}/{max(1, args.lookups // 10)}")
+    for label, queries in (("index exact (any case)", exact), ("index alias", aliases),
+                           ("index fuzzy (one typo)", typos)):
+        us, found = timed(index.find, queries)
+        print(f"{label:<34} {us:>10.1f} {found:>7}/{len(queries)}")
+    # Repeated misspellings hit the fuzzy-result cache
+    us, found = timed(index.find, typos)
+    print(f"{'index fuzzy (repeat, cached)':<34} {us:>10.1f} {found:>7}/{len(typos)}")
+    print(f"speedup exact vs scan: {scan_us / timed(index.find, exact)[0]:.0f}x")
+    print(index.stats())
+
+
+if __name__ == "__main__":
+    main()
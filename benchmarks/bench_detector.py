@@ -0,0 +1,105 @@
+# ============================================================================
+# Detector engine benchmark
+# Compares latency, throughput, memory and output parity of the PyTorch,
+# ONNX Runtime and OpenVINO detectors on the photos in uploads/ and
+# runs/detect/. Engines that were never exported are skipped.
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_detector [--int8] [--batch 8] [--repeats 3]
+# ============================================================================
+
+import argparse
+import glob
+import os
+import statistics
+import time
+from typing import Dict, List
+
+import cv2
+
+from config import DETECTOR_CONF, DETECTOR_IOU
+from detector_engines import ENGINES, MODEL_PATH, engine_model_path
+from model_registry import rss_mb
+from ultralytics import YOLO
+
+IMAGE_GLOBS = ["uploads/*.jpg", "uploads/*.png", "uploads/*.webp",
+               "runs/detect/*/*.jpg"]
+
+
+def load_images() -> List:
+    paths = sorted(p for pattern in IMAGE_GLOBS for p in glob.glob(pattern))
+    images = [cv2.imread(p) for p in paths]
+    return [img for img in images if img is not None]
+
+
+def classes_of(results, names) -> List[List[str]]:
+    return [sorted(names[int(c)].lower() for c in r.boxes.cls.tolist()) for r in results]
+
+
+def bench_engine(path: str, images: List, batch: int, repeats: int) -> Dict:
+    before = rss_mb()
+    started = time.perf_counter()
+    model = YOLO(path, task="detect")
+    model(images[0], conf=DETECTOR_CONF, iou=DETECTOR_IOU, verbose=False)
+    load_s = time.perf_counter() - started
+    memory = rss_mb() - before
+
+    latencies = []
+    for _ in range(repeats):
+        for img in images:
+            t = time.perf_counter()
+            model(img, conf=DETECTOR_CONF, iou=DETECTOR_IOU, verbose=False)
+            latencies.append((time.perf_counter() - t) * 1000)
+    latencies.sort()
+
+    started = time.perf_counter()
+    outputs = []
+    for _ in range(repeats):
+        outputs = []
+        for i in range(0, len(images), batch):
+            results = model(images[i:i + batch], conf=DETECTOR_CONF,
+                            iou=DETECTOR_IOU, verbose=False)
+            outputs.extend(classes_of(results, model.names))
+    throughput = repeats * len(images) / (time.perf_counter() - started)
+
+    return {
+        "load_s": load_s,
+        "rss_mb": memory,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "img_per_s": throughput,
+        "classes": outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    images = load_images()
+    print(f"Benchmarking on {len(images)} images, batch={args.batch}\n")
+
+    reports = {}
+    for engine in ENGINES:
+        path = engine_model_path(engine, args.int8 and engine != "torch", MODEL_PATH)
+        if not os.path.exists(path):
+            print(f"{engine:<9} skipped ({path} not found)")
+            continue
+        reports[engine] = bench_engine(path, images, args.batch, args.repeats)
+
+    baseline = reports.get("torch", {}).get("classes")
+    print(f"{'engine':<9} {'load s':>7} {'RSS MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'img/s':>8} {'same as torch':>14}")
+    for engine, r in reports.items():
+        parity = "-"
+        if baseline:
+            same = sum(a == b for a, b in zip(baseline, r["classes"]))
+            parity = f"{same}/{len(baseline)}"
+        print(f"{engine:<9} {r['load_s']:>7.2f} {r['rss_mb']:>8.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['img_per_s']:>8.1f} {parity:>14}")
+
+
+if __name__ == "__main__":
+    main()
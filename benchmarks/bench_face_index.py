@@ -0,0 +1,85 @@
+# ============================================================================
+# Face index benchmark
+# Times one login match against synthetic users with the old approach
+# (rebuild a list of arrays from the users dict, then face_distance) and
+# with FaceIndex in exact and, if faiss is installed, approximate mode.
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_face_index [--sizes 1000 100000 1000000]
+# ============================================================================
+
+import argparse
+import time
+
+import numpy as np
+
+from face_index import ENCODING_DIM, FaceIndex
+
+QUERIES = 50
+# The dict-rebuilding baseline allocates one array per user per login, so it
+# is skipped above this size
+LEGACY_MAX_USERS = 100_000
+
+
+def synthetic_encodings(n: int, seed: int = 0) -> np.ndarray:
+    # Real dlib encodings have norm ~1 with values roughly in [-0.3, 0.3]
+    rng = np.random.default_rng(seed)
+    enc = rng.normal(0, 0.09, size=(n, ENCODING_DIM)).astype(np.float32)
+    return enc
+
+
+def time_ms(fn, queries) -> float:
+    started = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - started) * 1000 / len(queries)
+
+
+def legacy_match(users_db):
+    def run(query):
+        known_encodings = [np.array(user["encoding"]) for user in users_db.values()]
+        known_names = list(users_db.keys())
+        distances = np.linalg.norm(np.array(known_encodings) - query, axis=1)
+        return known_names[int(np.argmin(distances))]
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'users':>9} {'legacy ms':>10} {'exact ms':>9} {'ann ms':>8} {'build s':>8} {'ann recall':>11}")
+    for n in args.sizes:
+        encodings = synthetic_encodings(n)
+        names = [f"user{i}" for i in range(n)]
+        # Queries are noisy copies of registered users, like a real login
+        picks = np.random.default_rng(1).integers(0, n, QUERIES)
+        queries = encodings[picks] + np.random.default_rng(2).normal(
+            0, 0.01, size=(QUERIES, ENCODING_DIM)).astype(np.float32)
+
+        legacy = "-"
+        if n <= LEGACY_MAX_USERS:
+            users_db = {name: {"encoding": enc.tolist()} for name, enc in zip(names, encodings)}
+            legacy = f"{time_ms(legacy_match(users_db), queries[:5]):.2f}"
+
+        started = time.perf_counter()
+        exact = FaceIndex(capacity=n)
+        exact.add_many(zip(names, encodings))
+        build_s = time.perf_counter() - started
+        exact_ms = time_ms(lambda q: exact.search(q, k=1), queries)
+
+        ann_ms, recall = "-", "-"
+        ann = FaceIndex(mode="ann", capacity=n)
+        if ann.mode == "ann":
+            ann.add_many(zip(names, encodings))
+            ann_ms = f"{time_ms(lambda q: ann.search(q, k=1), queries):.3f}"
+            found = sum(ann.search(q, k=1)[0][0] == names[p] for q, p in zip(queries, picks))
+            recall = f"{found}/{QUERIES}"
+
+        print(f"{n:>9} {legacy:>10} {exact_ms:>9.3f} {ann_ms:>8} {build_s:>8.2f} {recall:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# ============================================================================
+# Meal plan parser benchmark
+# Feeds every saved plan (meal_plans/*.txt and the older meal_plan_*.txt in
+# the repo root) through MealPlanParser in small chunks, the way streamed
+# tokens arrive, and reports throughput and what was found per file.
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_plan_parser --chunk 16 --repeat 50
+# ============================================================================
+
+import argparse
+import glob
+import os
+import time
+
+from meal_plan_parser import MealPlanParser
+
+
+def parse_chunked(text: str, chunk: int):
+    parser = MealPlanParser()
+    records = []
+    for i in range(0, len(text), chunk):
+        records += parser.feed(text[i:i + chunk])
+    records += parser.close()
+    return parser, records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk", type=int, default=16,
+                        help="Characters per feed() call (roughly a few tokens)")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--quiet", action="store_true", help="Skip the per-file table")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join("meal_plans", "*.txt"))) + sorted(glob.glob("meal_plan_*.txt"))
+    plans = [(path, open(path, encoding="utf-8").read()) for path in paths]
+    if not plans:
+        print("No saved meal plans found")
+        return
+
+    if not args.quiet:
+        print(f"{'file':<42} {'KB':>6} {'days':>5} {'meals':>6} {'w/ kcal':>8} {'skipped':>8}")
+    for path, text in plans:
+        result, records = parse_chunked(text, args.chunk)
+        meals = [r for r in records if r["type"] == "meal"]
+        days = sum(1 for r in records if r["type"] == "day")
+        with_calories = sum(1 for r in meals if r["calories"] is not None)
+        if not args.quiet:
+            print(f"{os.path.basename(path):<42} {len(text.encode()) / 1024:>6.1f} {days:>5} "
+                  f"{len(meals):>6} {with_calories:>8} {result.skipped:>8}")
+
+    total_bytes = sum(len(text.encode()) for _, text in plans)
+    lines = records = 0
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for _, text in plans:
+            result, found = parse_chunked(text, args.chunk)
+            lines += result.lines
+            records += len(found)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{len(plans)} files, {total_bytes / 1024:.1f} KB, {args.repeat} passes, "
+          f"{args.chunk}-char chunks")
+    print(f"  {total_bytes * args.repeat / elapsed / 1e6:.2f} MB/s   "
+          f"{lines / elapsed:,.0f} lines/s   {records / elapsed:,.0f} records/s")
+    print(f"  {1e3 * elapsed / (args.repeat * len(plans)):.3f} ms per plan")
+
+
+if __name__ == "__main__":
+    main()
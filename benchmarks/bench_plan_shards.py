@@ -0,0 +1,58 @@
+# ============================================================================
+# Sharded meal plan benchmark
+# Generates 6, 14 and 30 day plans with one call for the whole plan and
+# with concurrent day-range shards, and reports the wall-clock time of each.
+# Meant to run against benchmarks/fake_llm_server.py.
+#
+# Usage (fake server running on :8765, from the repo root):
+#   python -m benchmarks.bench_plan_shards --base-url http://127.0.0.1:8765
+# ============================================================================
+
+import argparse
+import asyncio
+import time
+
+import config
+
+PROFILE = {
+    "goal": "Lose weight", "sport": "Running", "level": "Beginner",
+    "diet": "Vegetarian", "condition": "None", "allergies": ["None"],
+}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=None,
+                        help="Gemini endpoint (defaults to GEMINI_BASE_URL in config.py)")
+    parser.add_argument("--days", type=int, nargs="+", default=[6, 14, 30])
+    parser.add_argument("--shard-days", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[3, 8])
+    args = parser.parse_args()
+
+    if args.base_url:
+        config.GEMINI_BASE_URL = args.base_url
+    # Imported after the override so the client picks up the base URL
+    from ai_reasoning import generate_meal_plan_sharded
+    from data_loader import NutritionDataLoader
+
+    loader = NutritionDataLoader()
+    loader.load_all_data()
+
+    print(f"{'days':>5} {'mode':<24} {'seconds':>8} {'speedup':>8}")
+    for days in args.days:
+        started = time.perf_counter()
+        plan = await generate_meal_plan_sharded(PROFILE, loader, days, shard_days=days, concurrency=1)
+        single = time.perf_counter() - started
+        print(f"{days:>5} {'one call':<24} {single:>8.2f} {1.0:>8.2f}")
+        for concurrency in args.concurrency:
+            started = time.perf_counter()
+            sharded = await generate_meal_plan_sharded(PROFILE, loader, days,
+                                                       args.shard_days, concurrency)
+            elapsed = time.perf_counter() - started
+            mode = f"{args.shard_days}-day shards x{concurrency}"
+            same = "" if sharded.count("Day ") == plan.count("Day ") else "  (day count differs!)"
+            print(f"{days:>5} {mode:<24} {elapsed:>8.2f} {single / elapsed:>8.2f}{same}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+# ============================================================================
+# Meal plan streaming benchmark
+# Posts profiles to /generate-plan and times each response: time to first
+# byte, time to the first plan text ("chunk" event) and time to the whole
+# plan ("done" event). Run it against a server whose GEMINI_BASE_URL points
+# at benchmarks/fake_llm_server.py for repeatable numbers.
+#
+# Usage (server running on :8000, from the repo root):
+#   python -m benchmarks.bench_plan_stream --requests 8 --concurrency 4
+# ============================================================================
+
+import argparse
+import http.client
+import json
+import statistics
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+PROFILE = {
+    "goal": "Lose weight", "sport": "Running", "level": "Beginner",
+    "diet": "Vegetarian", "condition": "None", "allergies": "None",
+}
+
+
+def run_request(host: str, port: int, profile: dict) -> dict:
+    connection = http.client.HTTPConnection(host, port, timeout=300)
+    body = urllib.parse.urlencode(profile)
+    started = time.perf_counter()
+    connection.request("POST", "/generate-plan", body,
+                       {"Content-Type": "application/x-www-form-urlencoded"})
+    response = connection.getresponse()
+    ttfb = time.perf_counter() - started
+
+    first_text, done, size, event = None, None, 0, None
+    for raw in response:
+        size += len(raw)
+        line = raw.decode("utf-8").rstrip("\n")
+        if line.startswith("event: "):
+            event = line[7:]
+        elif line.startswith("data: "):
+            if event == "chunk" and first_text is None:
+                first_text = time.perf_counter() - started
+            elif event in ("done", "error"):
+                done = time.perf_counter() - started
+                if event == "error":
+                    print("error:", json.loads(line[6:])["error"])
+    connection.close()
+    return {"status": response.status, "ttfb": ttfb, "first_text": first_text,
+            "total": done or time.perf_counter() - started, "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=2)
+    args = parser.parse_args()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: run_request(args.host, args.port, PROFILE),
+                                range(args.requests)))
+
+    ok = [r for r in results if r["status"] == 200 and r["first_text"] is not None]
+    print(f"{len(ok)}/{len(results)} streamed plans")
+    if ok:
+        for key, label in (("ttfb", "time to first byte"), ("first_text", "time to first text"),
+                           ("total", "time to full plan")):
+            values = [r[key] * 1000 for r in ok]
+            print(f"{label:<20} median {statistics.median(values):8.1f} ms   "
+                  f"max {max(values):8.1f} ms")
+        print(f"{'bytes per plan':<20} median {statistics.median(r['bytes'] for r in ok):8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# ============================================================================
+# Fake LLM server - a local stand-in for the Gemini API
+# Answers generateContent and streamGenerateContent (alt=sse) the way the
+# Gemini REST API does, with a meal plan in the format the prompt asks for
+# (or a one-line answer for /ask questions).
+# Time to first token and tokens per second are configurable, so plan
+# generation can be tested and timed without a key or network. Faults can
+# be injected too: extra random latency, a share of 503 errors and a share
+# of calls that stall (to exercise llm_governor timeouts, retries and the
+# circuit breaker).
+#
+# Usage (from the repo root):
+#   python -m benchmarks.fake_llm_server --port 8765 --first-token-ms 800
+#   python -m benchmarks.fake_llm_server --error-rate 0.3 --stall-rate 0.1 --jitter-ms 500
+# then set GEMINI_BASE_URL = "http://127.0.0.1:8765" in config.py.
+# ============================================================================
+
+import argparse
+import asyncio
+import json
+import random
+import re
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake Gemini")
+settings = {"first_token_ms": 800, "tokens_per_s": 150.0,
+            "jitter_ms": 0.0, "error_rate": 0.0, "stall_rate": 0.0, "stall_s": 120.0}
+stats = {"requests": 0, "errors": 0, "stalls": 0}
+
+MEALS = [
+    ("Breakfast", "Oats with berries and chia", 350, 10),
+    ("Mid-Morning Snack", "Greek yogurt with almonds", 180, None),
+    ("Lunch", "Quinoa bowl with chickpeas and greens", 520, 25),
+    ("Evening Snack", "Apple with peanut butter", 200, None),
+    ("Dinner", "Grilled paneer with vegetables and brown rice", 560, 30),
+]
+
+
+def fake_plan(prompt: str) -> str:
+    """A plan in the prompt's OUTPUT TEMPLATE for the day range it asks for"""
+    days = re.search(r"Generate a (\d+)-Day to (\d+)-Day", prompt)
+    start, end = (int(days.group(1)), int(days.group(2))) if days else (1, 6)
+    gear = re.search(r"RECOMMENDED SPORT GEAR: (.*)", prompt)
+    with_gear = "SPORT GEAR CHECKLIST" in prompt and "NO SPORT GEAR" not in prompt
+
+    lines = []
+    for day in range(start, end + 1):
+        lines.append(f"Day {day}")
+        for meal, dish, cal, minutes in MEALS:
+            line = f"{meal}: {dish} | {cal} cal"
+            lines.append(line + (f" | {minutes} min" if minutes else ""))
+        lines.append("")
+    if with_gear:
+        lines.append("SPORT GEAR CHECKLIST")
+        items = gear.group(1).split(", ") if gear else ["Standard Athletic Wear"]
+        lines.extend(items)
+    return "\n".join(lines) + "\n"
+
+
+def _chunk(text: str, finish: bool = False) -> dict:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate], "modelVersion": "fake-llm"}
+
+
+async def _prompt(request: Request) -> str:
+    body = await request.json()
+    return "".join(part.get("text", "") for content in body.get("contents", [])
+                   for part in content.get("parts", []))
+
+
+@app.post("/{version}/models/{model_action}")
+async def models(version: str, model_action: str, request: Request):
+    _, _, action = model_action.partition(":")
+    prompt = await _prompt(request)
+    stats["requests"] += 1
+
+    await asyncio.sleep(random.uniform(0, settings["jitter_ms"]) / 1000)
+    fault = random.random()
+    if fault < settings["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"code": 503, "message": "Injected overload",
+                                       "status": "UNAVAILABLE"}}, status_code=503)
+    if fault < settings["error_rate"] + settings["stall_rate"]:
+        stats["stalls"] += 1
+        await asyncio.sleep(settings["stall_s"])
+    if "Meal Plan" in prompt:
+        plan = fake_plan(prompt)
+    else:
+        plan = f"Here is a short plain-text answer to: {prompt.split(': ', 1)[-1]}\n"
+    lines = plan.splitlines(keepends=True)
+
+    if action == "generateContent":
+        await asyncio.sleep(settings["first_token_ms"] / 1000
+                            + len(plan.split()) / settings["tokens_per_s"])
+        return JSONResponse(_chunk(plan, finish=True))
+
+    async def stream():
+        await asyncio.sleep(settings["first_token_ms"] / 1000)
+        for i, line in enumerate(lines):
+            await asyncio.sleep(len(line.split()) / settings["tokens_per_s"])
+            yield f"data: {json.dumps(_chunk(line, finish=i == len(lines) - 1))}\r\n\r\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def server_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-ms", type=float, default=800)
+    parser.add_argument("--tokens-per-s", type=float, default=150.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                        help="Extra random latency (0..N ms) before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of calls answered with 503 UNAVAILABLE")
+    parser.add_argument("--stall-rate", type=float, default=0.0,
+                        help="Share of calls that hang for --stall-s seconds")
+    parser.add_argument("--stall-s", type=float, default=120.0)
+    args = parser.parse_args()
+    settings.update(first_token_ms=args.first_token_ms, tokens_per_s=args.tokens_per_s,
+                    jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                    stall_rate=args.stall_rate, stall_s=args.stall_s)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,63 @@
+# ============================================================================
+# Governor fault test
+# Fires a burst of /ask-style Gemini calls through llm_governor at the fake
+# LLM server (started with injected latency, errors and stalls) and reports
+# how they ended: answered, shed, circuit open or deadline exceeded, with
+# the governor's counters and latency histograms.
+#
+# Usage (from the repo root):
+#   python -m benchmarks.fake_llm_server --error-rate 0.3 --stall-rate 0.1 &
+#   python -m benchmarks.governor_faults --base-url http://127.0.0.1:8765 --calls 200
+# ============================================================================
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+import config
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=None,
+                        help="Gemini endpoint (defaults to GEMINI_BASE_URL in config.py)")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--spread-s", type=float, default=2.0,
+                        help="Calls are started evenly over this many seconds")
+    args = parser.parse_args()
+
+    if args.base_url:
+        config.GEMINI_BASE_URL = args.base_url
+    # Imported after the override so the client picks up the base URL
+    from ai_reasoning import ask_nutrition_advice
+    from llm_governor import governor
+
+    outcomes = Counter()
+    durations = []
+
+    async def one(i: int):
+        await asyncio.sleep(i * args.spread_s / args.calls)
+        started = time.perf_counter()
+        try:
+            await ask_nutrition_advice(f"question {i}")
+            outcomes["answered"] += 1
+        except Exception as e:
+            outcomes[type(e).__name__] += 1
+        durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(args.calls)])
+    elapsed = time.perf_counter() - started
+
+    durations.sort()
+    print(f"{args.calls} calls in {elapsed:.1f}s")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:<20} {count:>5}")
+    print(f"  slowest call         {durations[-1]:.2f}s (deadline {config.ASK_TIMEOUT:.0f}s)")
+    print(json.dumps(governor["gemini"].stats(), indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
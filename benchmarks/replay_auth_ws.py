@@ -0,0 +1,98 @@
+# ============================================================================
+# Face auth WebSocket replay
+# Opens N login (or register) sessions against a running server and streams
+# frames from a recorded clip or synthetic frames over /ws/auth/<id>, the
+# same way templates/login.html does. Reports frames sent, frames the server
+# processed, results and completed authentications per second.
+#
+# Usage (server running on :8000, from the repo root):
+#   python -m benchmarks.replay_auth_ws --source file:clips/blink.mp4 --sessions 8
+#   python -m benchmarks.replay_auth_ws --source synthetic --sessions 32
+# Needs the 'websockets' package.
+# ============================================================================
+
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+
+import cv2
+import websockets
+
+from frame_sources import open_frame_source
+
+
+def start_session(base_url: str, register_as: str = None) -> str:
+    if register_as:
+        url = f"{base_url}/register?username={register_as}"
+    else:
+        url = f"{base_url}/login"
+    request = urllib.request.Request(url, method="POST")
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())["session_id"]
+
+
+async def run_session(args, index: int) -> dict:
+    loop = asyncio.get_running_loop()
+    register_as = f"{args.register}{index}" if args.register else None
+    session_id = await loop.run_in_executor(None, start_session, args.url, register_as)
+    ws_url = args.url.replace("http", "ws", 1) + f"/ws/auth/{session_id}"
+
+    source = open_frame_source(args.source)
+    sent, acked, result = 0, 0, None
+    started = time.perf_counter()
+    async with websockets.connect(ws_url, max_size=None) as socket:
+
+        async def send_frames():
+            nonlocal sent
+            while True:
+                ok, frame = await loop.run_in_executor(None, source.read)
+                if not ok:
+                    return
+                frame = cv2.resize(frame, (480, 360))
+                ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+                await socket.send(jpeg.tobytes())
+                sent += 1
+
+        sender = asyncio.create_task(send_frames())
+        try:
+            async for message in socket:
+                data = json.loads(message)
+                acked += 1
+                if data.get("result"):
+                    result = data["result"]
+                    break
+        finally:
+            sender.cancel()
+            source.release()
+
+    return {"sent": sent, "processed": acked, "result": result,
+            "seconds": time.perf_counter() - started}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--source", default="synthetic",
+                        help="'synthetic' or 'file:<clip path>'")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--register", default=None,
+                        help="Register users <prefix>0..N instead of logging in")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    reports = await asyncio.gather(*[run_session(args, i) for i in range(args.sessions)])
+    elapsed = time.perf_counter() - started
+
+    for i, r in enumerate(reports):
+        status = r["result"]["message"] if r["result"] else "no result"
+        print(f"session {i:>3}: sent {r['sent']:>5} processed {r['processed']:>5} "
+              f"in {r['seconds']:6.1f}s -> {status}")
+    done = sum(1 for r in reports if r["result"])
+    print(f"\n{done}/{len(reports)} sessions finished in {elapsed:.1f}s "
+          f"({done / elapsed:.2f} authentications/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
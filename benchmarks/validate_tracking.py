@@ -0,0 +1,86 @@
+# ============================================================================
+# Face tracking validation
+# Plays recorded clips through the blink loop twice: with full detection on
+# every frame and with FaceTracker (detect every N frames, track between).
+# Reports blinks counted, frames per second of the face step, the largest
+# EAR difference between the two modes and frames where tracking lost the
+# face that detection found.
+#
+# Usage (from the repo root):
+#   python -m benchmarks.validate_tracking clips/*.mp4 [--every-n 5 --scale 0.5]
+# ============================================================================
+
+import argparse
+import time
+
+import cv2
+from imutils import face_utils
+
+import face_models  # registers the face models
+from blink import BlinkStateMachine, eye_aspect_ratio
+from face_tracker import FaceTracker
+from model_registry import registry
+
+
+def run_clip(path: str, tracker=None) -> dict:
+    detector = registry.get("face_detector")
+    predictor = registry.get("shape_predictor")
+    capture = cv2.VideoCapture(path)
+
+    blinks, busy = BlinkStateMachine(), 0.0
+    ears = []
+    while True:
+        success, frame = capture.read()
+        if not success:
+            break
+        frame = cv2.resize(frame, None, fx=0.75, fy=0.75)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        started = time.perf_counter()
+        rects = tracker.update(gray) if tracker else detector(gray, 0)
+        ear = None
+        if rects:
+            shape = face_utils.shape_to_np(predictor(gray, rects[0]))
+            ear = eye_aspect_ratio(shape)
+        busy += time.perf_counter() - started
+
+        ears.append(ear)
+        if ear is not None:
+            blinks.update(ear)
+    capture.release()
+
+    return {"frames": len(ears), "blinks": blinks.total, "ears": ears,
+            "fps": len(ears) / busy if busy else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("clips", nargs="+")
+    parser.add_argument("--every-n", type=int, default=None)
+    parser.add_argument("--scale", type=float, default=None)
+    args = parser.parse_args()
+
+    options = {}
+    if args.every_n is not None:
+        options["every_n"] = args.every_n
+    if args.scale is not None:
+        options["scale"] = args.scale
+
+    registry.load_all()
+    print(f"{'clip':<32} {'blinks':>13} {'fps':>17} {'max dEAR':>9} {'lost':>5}")
+    for path in args.clips:
+        full = run_clip(path)
+        tracker = FaceTracker(**options)
+        tracked = run_clip(path, tracker)
+
+        pairs = list(zip(full["ears"], tracked["ears"]))
+        diffs = [abs(a - b) for a, b in pairs if a is not None and b is not None]
+        lost = sum(1 for a, b in pairs if a is not None and b is None)
+        print(f"{path[-32:]:<32} {full['blinks']:>6} /{tracked['blinks']:>5} "
+              f"{full['fps']:>8.1f} /{tracked['fps']:>7.1f} "
+              f"{max(diffs, default=0.0):>9.3f} {lost:>5}"
+              f"   ({tracker.detections} detections, {tracker.tracked} tracked)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# ============================================================================
+# Blink detection - eye aspect ratio and the blink counter
+# The EAR of both eyes is computed in one vectorized step from the 68-point
+# landmarks, and BlinkStateMachine turns the per-frame EAR into blinks.
+# ============================================================================
+
+import numpy as np
+
+from config import EYE_AR_THRESH, EYE_AR_CONSEC_FRAMES
+
+# Landmark indices of the left and right eye in the 68-point model
+EYES = np.array([range(36, 42), range(42, 48)])
+
+
+def eye_aspect_ratio(shape: np.ndarray) -> float:
+    """Mean EAR of both eyes from a (68, 2) landmark array"""
+    eyes = shape[EYES].astype(np.float32)  # (2 eyes, 6 points, xy)
+    # |p1-p5|, |p2-p4| (vertical) and |p0-p3| (horizontal) for both eyes
+    d = np.linalg.norm(eyes[:, [1, 2, 0]] - eyes[:, [5, 4, 3]], axis=2)
+    ear = (d[:, 0] + d[:, 1]) / (2.0 * d[:, 2])
+    return float(ear.mean())
+
+
+class BlinkStateMachine:
+    """
+    Counts blinks: the eye is "closed" while EAR < threshold, and a blink is
+    recorded when it reopens after at least consec_frames closed frames.
+    """
+
+    def __init__(self, threshold: float = EYE_AR_THRESH,
+                 consec_frames: int = EYE_AR_CONSEC_FRAMES):
+        self.threshold = threshold
+        self.consec_frames = consec_frames
+        self.closed_frames = 0
+        self.total = 0
+
+    def update(self, ear: float) -> bool:
+        """Feed one frame's EAR; True when it completes a blink"""
+        if ear < self.threshold:
+            self.closed_frames += 1
+            return False
+        blinked = self.closed_frames >= self.consec_frames
+        if blinked:
+            self.total += 1
+        self.closed_frames = 0
+        return blinked
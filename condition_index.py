@@ -0,0 +1,189 @@
+# ============================================================================
+# Condition Index - health condition lookup for get_condition_info
+# Built once when the nutrition data loads. Names are normalized (case,
+# accents, punctuation, possessives) into a hash map for O(1) exact hits;
+# common spellings and synonyms ("diabetic", "high BP") go through an alias
+# map, and anything else falls back to character-trigram cosine similarity
+# over names and aliases. A fuzzy match must keep the query's qualifiers
+# (hypo/hyper, low/high, under/over), so "hypotension" never becomes
+# Hypertension; no match returns None and the caller uses the raw text.
+# Each condition's recommended and restricted foods are kept as
+# precomputed tuples.
+# ============================================================================
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from answer_index import trigram_vector
+from config import CONDITION_MATCH_THRESHOLD
+
+_POSSESSIVE = re.compile(r"['’]s\b")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Other ways users name the built-in conditions (normalized alias -> condition name)
+ALIASES = {
+    "diabetic": "Diabetes", "diabetes type 2": "Diabetes", "type 2 diabetes": "Diabetes",
+    "type 1 diabetes": "Diabetes", "t2d": "Diabetes", "high blood sugar": "Diabetes",
+    "high bp": "Hypertension", "high blood pressure": "Hypertension",
+    "hypertensive": "Hypertension",
+    "celiac": "Celiac Disease", "coeliac": "Celiac Disease", "coeliac disease": "Celiac Disease",
+    "gluten intolerance": "Celiac Disease", "gluten intolerant": "Celiac Disease",
+    "lactose intolerant": "Lactose Intolerance", "dairy intolerance": "Lactose Intolerance",
+    "anaemia": "Anemia", "anemic": "Anemia", "anaemic": "Anemia", "iron deficiency": "Anemia",
+    "low iron": "Anemia",
+    "irritable bowel syndrome": "IBS", "irritable bowel": "IBS",
+    "high ldl": "High Cholesterol",
+    "ckd": "Kidney Disease", "chronic kidney disease": "Kidney Disease", "renal disease": "Kidney Disease",
+    "arthritic": "Arthritis", "asthmatic": "Asthma",
+    "cfs": "Chronic Fatigue Syndrome", "chronic fatigue": "Chronic Fatigue Syndrome",
+    "depressed": "Depression", "anxiety": "Anxiety Disorder",
+    "obese": "Obesity", "migraines": "Migraine",
+    "gerd": "Acid Reflux", "reflux": "Acid Reflux",
+    "crohns": "Crohn's Disease", "crohn": "Crohn's Disease", "uc": "Ulcerative Colitis",
+    "overactive thyroid": "Hyperthyroidism", "underactive thyroid": "Hypothyroidism",
+    "hypothyroid": "Hypothyroidism", "hyperthyroid": "Hyperthyroidism",
+    "parkinsons": "Parkinson's Disease", "alzheimers": "Alzheimer's Disease",
+    "ms": "Multiple Sclerosis", "ra": "Rheumatoid Arthritis",
+}
+
+# Words that flip a condition's meaning; a fuzzy match must keep them all
+# (word prefix -> qualifier bit)
+QUALIFIERS = {"hypo": 1, "hyper": 2, "low": 4, "high": 8, "under": 16, "over": 32}
+
+ConditionEntry = Tuple[str, Tuple[str, ...], Tuple[str, ...], str]
+
+
+def normalize_condition(name: str) -> str:
+    """Lowercase ASCII words without punctuation or possessives ("Crohn's" -> "crohn")"""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    text = _POSSESSIVE.sub("", text.lower()).replace("'", "")
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def qualifier_bits(key: str) -> int:
+    """Bit set of the QUALIFIERS a normalized name's words start with"""
+    bits = 0
+    for word in key.split():
+        for prefix, bit in QUALIFIERS.items():
+            if word.startswith(prefix):
+                bits |= bit
+    return bits
+
+
+class ConditionIndex:
+    """Exact, alias and trigram lookup over condition names"""
+
+    def __init__(self, names: Iterable[str], recommended: Iterable[Sequence[str]],
+                 restricted: Iterable[Sequence[str]], severity: Iterable[str],
+                 aliases: Dict[str, str] = ALIASES, threshold: float = CONDITION_MATCH_THRESHOLD,
+                 cache_size: int = 4096):
+        started = time.perf_counter()
+        self.threshold = threshold
+        self._entries: List[ConditionEntry] = []
+        self._exact: Dict[str, int] = {}
+        for name, rec, res, sev in zip(names, recommended, restricted, severity):
+            key = normalize_condition(name)
+            if not key or key in self._exact:
+                continue  # the first row with a name wins, as before
+            self._exact[key] = len(self._entries)
+            self._entries.append((name, tuple(rec), tuple(res), sev))
+
+        # Aliases only count for conditions that exist in this table
+        self._aliases: Dict[str, int] = {}
+        for alias, target in aliases.items():
+            entry = self._exact.get(normalize_condition(target))
+            alias_key = normalize_condition(alias)
+            if entry is not None and alias_key not in self._exact:
+                self._aliases[alias_key] = entry
+
+        # Trigram postings over every name and alias, frozen into arrays:
+        # gram -> (key ids, weights); key ids map to entries through _key_entry
+        postings = defaultdict(lambda: ([], []))
+        key_entry = []
+        key_bits = []
+        for keys in (self._exact, self._aliases):
+            for key, entry in keys.items():
+                for gram, weight in trigram_vector(key).items():
+                    ids, weights = postings[gram]
+                    ids.append(len(key_entry))
+                    weights.append(weight)
+                key_entry.append(entry)
+                key_bits.append(qualifier_bits(key))
+        self._key_entry = np.array(key_entry, dtype=np.int64)
+        self._key_bits = np.array(key_bits, dtype=np.int64)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            gram: (np.array(ids, dtype=np.int64), np.array(weights, dtype=np.float64))
+            for gram, (ids, weights) in postings.items()}
+
+        self._cache: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.build_s = time.perf_counter() - started
+        self.exact_hits = 0
+        self.alias_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _fuzzy(self, key: str) -> Optional[int]:
+        """
+        Entry of the most similar name or alias (cosine over trigrams) with the
+        same qualifiers as the query, or None
+        """
+        hits = [(self._postings[gram], weight) for gram, weight in trigram_vector(key).items()
+                if gram in self._postings]
+        if not hits:
+            return None
+        ids = np.concatenate([posting[0] for posting, _ in hits])
+        weights = np.concatenate([posting[1] * weight for posting, weight in hits])
+        scores = np.bincount(ids, weights=weights, minlength=len(self._key_entry))
+        scores[self._key_bits != qualifier_bits(key)] = 0.0
+        best = int(scores.argmax())
+        return int(self._key_entry[best]) if scores[best] >= self.threshold else None
+
+    def find(self, name: str) -> Optional[ConditionEntry]:
+        """(name, recommended, restricted, severity) of the closest condition, or None"""
+        key = normalize_condition(name)
+        entry = self._exact.get(key)
+        if entry is not None:
+            self.exact_hits += 1
+            return self._entries[entry]
+        entry = self._aliases.get(key)
+        if entry is not None:
+            self.alias_hits += 1
+            return self._entries[entry]
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                entry = self._cache[key]
+            else:
+                entry = self._fuzzy(key) if key else None
+                self._cache[key] = entry
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.fuzzy_hits += 1
+        return self._entries[entry]
+
+    def stats(self) -> Dict:
+        return {
+            "conditions": len(self._entries),
+            "aliases": len(self._aliases),
+            "trigrams": len(self._postings),
+            "build_ms": round(1e3 * self.build_s, 1),
+            "exact_hits": self.exact_hits,
+            "alias_hits": self.alias_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+        }
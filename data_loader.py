@@ -4,33 +4,72 @@
 # # ============================================================================
 
 
+import os
+import sys
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional
+from condition_index import ConditionIndex
+from config import NUTRITION_CSV_DIR, NUTRITION_LIST_COLUMNS, NUTRITION_STORE_DIR
+from model_registry import registry
+from nutrition_store import NutritionStore
+
+TABLES = ["conditions", "allergies", "recipes", "ingredients", "recipe_ingredients", "categories"]
 
 
 class NutritionDataLoader:
     """Manages all nutrition, recipe, health condition, and sport gear data"""
 
-    def __init__(self):
-        self.conditions = None
-        self.allergies = None
-        self.recipes = None
-        self.ingredients = None
-        self.recipe_ingredients = None
-        self.categories = None
+    def __init__(self, store_dir: str = NUTRITION_STORE_DIR):
+        # Tables come from the columnar store when built (python nutrition_store.py build),
+        # otherwise from the built-in literals below; either way on first use
+        self.store = NutritionStore(store_dir)
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self.condition_index: Optional[ConditionIndex] = None
         self.sport_gear = None  # NEW
 
+    conditions = property(lambda self: self.frame("conditions"))
+    allergies = property(lambda self: self.frame("allergies"))
+    recipes = property(lambda self: self.frame("recipes"))
+    ingredients = property(lambda self: self.frame("ingredients"))
+    recipe_ingredients = property(lambda self: self.frame("recipe_ingredients"))
+    categories = property(lambda self: self.frame("categories"))
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """A whole table as a DataFrame (read in full; prefer the row-level helpers for big tables)"""
+        frame = self._frames.get(name)
+        if frame is None:
+            table = self.store.table(name)
+            if table is not None:
+                frame = self._select(name, np.arange(table.rows))
+            else:
+                frame = getattr(self, f"_load_{name}")()
+            self._frames[name] = frame
+        return frame
+
+    def _select(self, name: str, indices) -> pd.DataFrame:
+        """Rows of a table by position, reading only those rows"""
+        table = self.store.table(name)
+        if table is None:
+            return self.frame(name).iloc[indices].reset_index(drop=True)
+        return pd.DataFrame(table.take(indices), columns=table.columns)
+
     def load_all_data(self):
-        """Load all nutrition and sport data"""
+        """Load sport data and open the nutrition tables (rows are read on first use)"""
         try:
             print("[Data] Loading database...")
 
-            self.conditions = self._load_conditions()
-            self.allergies = self._load_allergies()
-            self.recipes = self._load_recipes()
-            self.ingredients = self._load_ingredients()
-            self.recipe_ingredients = self._load_recipe_ingredients()
-            self.categories = self._load_categories()
+            stored = set(self.store.available())
+            for name in TABLES:
+                if name in stored:
+                    print(f"[Data] ✓ {name}: {self.store.table(name).rows} rows (columnar store)")
+            builtin = [name for name in TABLES if name not in stored]
+            if builtin:
+                print(f"[Data] Using built-in tables for: {', '.join(builtin)}")
+
+            self.condition_index = self._build_condition_index()
+            print(f"[Data] ✓ Indexed {len(self.condition_index)} conditions "
+                  f"in {1e3 * self.condition_index.build_s:.1f}ms")
 
             # --- NEW: Load Sport Gear Data ---
             self.sport_gear = self._load_sport_gear()
@@ -306,38 +345,104 @@ class NutritionDataLoader:
         }
         return pd.DataFrame(categories_data)
 
+    def _build_condition_index(self) -> ConditionIndex:
+        columns = ['name', 'recommended_foods', 'restricted_foods', 'severity_level']
+        table = self.store.table("conditions")
+        if table is not None:
+            return ConditionIndex(*(table.column(c) for c in columns))
+        frame = self.frame("conditions")
+        return ConditionIndex(*(frame[c].tolist() for c in columns))
+
     def get_condition_info(self, condition_name: str) -> Optional[Dict]:
-        if self.conditions is None:
-            return None
-        condition = self.conditions[self.conditions['name'].str.lower(
-        ) == condition_name.lower()]
-        if condition.empty:
+        if self.condition_index is None:
+            self.condition_index = self._build_condition_index()
+        found = self.condition_index.find(condition_name)
+        if found is None:
             return None
+        name, recommended, restricted, severity = found
         return {
-            'name': condition.iloc[0]['name'],
-            'recommended': condition.iloc[0]['recommended_foods'],
-            'restricted': condition.iloc[0]['restricted_foods'],
-            'severity': condition.iloc[0]['severity_level']
+            'name': name,
+            'recommended': recommended,
+            'restricted': restricted,
+            'severity': severity
         }
 
+    def _recipe_column(self, name: str) -> np.ndarray:
+        """A recipes column as an array (memory-mapped when the store is built)"""
+        table = self.store.table("recipes")
+        if table is not None:
+            return table.column(name)
+        return self.frame("recipes")[name].to_numpy()
+
     def search_recipes(self, query: str = '', max_results: int = 10) -> pd.DataFrame:
-        if self.recipes is None:
-            return pd.DataFrame()
-        if not query:
-            return self.recipes.head(max_results)
-        mask = self.recipes['recipe_name'].str.contains(
-            query, case=False, na=False)
-        return self.recipes[mask].head(max_results)
+        table = self.store.table("recipes")
+        if table is None:
+            if not query:
+                return self.recipes.head(max_results)
+            mask = self.recipes['recipe_name'].str.contains(
+                query, case=False, na=False)
+            return self.recipes[mask].head(max_results)
+        query = query.lower()
+        found = []
+        for i, name in enumerate(table.column("recipe_name")):
+            if query in name.lower():
+                found.append(i)
+                if len(found) == max_results:
+                    break
+        return self._select("recipes", found)
 
     def filter_by_allergies(self, allergy_list: List[str]) -> pd.DataFrame:
         return self.recipes
 
+    def top_recipes(self, sort_by: Optional[str] = None, ascending: bool = True,
+                    limit: int = 25, positive_only: bool = False) -> pd.DataFrame:
+        """
+        The first `limit` recipes ordered by one numeric column, read without
+        loading the whole table. positive_only skips zero/negative values.
+        """
+        if sort_by is None:
+            rows = min(limit, len(self._recipe_column("id")))
+            return self._select("recipes", np.arange(rows))
+        values = np.asarray(self._recipe_column(sort_by), dtype=np.float64)
+        candidates = np.flatnonzero(values > 0) if positive_only else np.arange(len(values))
+        keys = values[candidates] if ascending else -values[candidates]
+        keys = np.where(np.isnan(keys), np.inf, keys)  # missing values last
+        if len(candidates) > limit:
+            part = np.argpartition(keys, limit - 1)[:limit]
+            candidates, keys = candidates[part], keys[part]
+        return self._select("recipes", candidates[np.argsort(keys, kind="stable")])
+
     def get_high_protein_recipes(self, min_protein: float = 20) -> pd.DataFrame:
-        if self.recipes is None:
-            return pd.DataFrame()
-        return self.recipes[self.recipes['protein'] >= min_protein]
+        return self._select("recipes", np.flatnonzero(self._recipe_column("protein") >= min_protein))
 
     def get_low_calorie_recipes(self, max_calories: float = 500) -> pd.DataFrame:
-        if self.recipes is None:
-            return pd.DataFrame()
-        return self.recipes[(self.recipes['calories'] > 0) & (self.recipes['calories'] <= max_calories)]
+        calories = self._recipe_column("calories")
+        return self._select("recipes", np.flatnonzero((calories > 0) & (calories <= max_calories)))
+
+
+def _load_nutrition_data() -> NutritionDataLoader:
+    loader = NutritionDataLoader()
+    loader.load_all_data()
+    return loader
+
+
+def export_builtin_csv(directory: str = NUTRITION_CSV_DIR):
+    """Write the built-in tables as source CSVs for nutrition_store.py build"""
+    os.makedirs(directory, exist_ok=True)
+    loader = NutritionDataLoader()
+    for name in TABLES:
+        frame = getattr(loader, f"_load_{name}")()
+        for column in NUTRITION_LIST_COLUMNS.get(name, ()):
+            frame[column] = frame[column].map("|".join)
+        frame.to_csv(os.path.join(directory, f"{name}.csv"), index=False)
+    print(f"[Data] ✓ Exported {len(TABLES)} built-in tables to {directory}")
+
+
+registry.register("nutrition_data", _load_nutrition_data)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["export-csv"]:
+        print("Usage: python data_loader.py export-csv [csv_dir]")
+        sys.exit(1)
+    export_builtin_csv(*sys.argv[2:3])
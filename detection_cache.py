@@ -0,0 +1,90 @@
+# ============================================================================
+# Detection Cache - detector output keyed by image hash and model version
+# An in-memory LRU sits in front of JSON files on disk, so repeat analyses
+# of the same photo skip inference even after a restart.
+# ============================================================================
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+CACHE_DIR = os.path.join("cache", "detections")
+
+
+class DetectionCache:
+    """Two-level (memory LRU + disk) cache of detection records"""
+
+    def __init__(self, model_version: str, capacity: int = 1024,
+                 directory: str = CACHE_DIR):
+        self.model_version = model_version
+        self.capacity = capacity
+        self.directory = os.path.join(directory, model_version)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, f"{content_hash}.json")
+
+    def _remember(self, content_hash: str, record: Dict):
+        self._entries[content_hash] = record
+        self._entries.move_to_end(content_hash)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, content_hash: str, image_bytes: int = 0) -> Optional[Dict]:
+        """Look up a record; image_bytes is credited to bytes_saved on a hit"""
+        with self._lock:
+            record = self._entries.get(content_hash)
+            if record is not None:
+                self._entries.move_to_end(content_hash)
+                self.memory_hits += 1
+                self.bytes_saved += image_bytes
+                return record
+
+        try:
+            with open(self._path(content_hash), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._remember(content_hash, record)
+            self.disk_hits += 1
+            self.bytes_saved += image_bytes
+        return record
+
+    def put(self, content_hash: str, record: Dict):
+        with self._lock:
+            self._remember(content_hash, record)
+
+        path = self._path(content_hash)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[Cache] ⚠ Could not persist detection {content_hash}: {e}")
+
+    def stats(self) -> Dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "model_version": self.model_version,
+            "entries_in_memory": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
@@ -0,0 +1,92 @@
+# ============================================================================
+# Detector Engines - export and locate CPU-optimized copies of the food model
+# The trained best.pt can be exported to ONNX Runtime or OpenVINO (optionally
+# INT8). Ultralytics loads every format through the same YOLO() API, so the
+# rest of the app does not care which engine is running. Ultralytics is only
+# imported when a model is actually loaded or exported.
+#
+# Usage:
+#   python detector_engines.py onnx
+#   python detector_engines.py openvino --int8
+# ============================================================================
+
+import argparse
+import os
+from typing import Optional, Tuple
+
+MODEL_PATH = r"Food-Detection\dataset\runs\detect\train2\weights\best.pt"
+ENGINES = ("torch", "onnx", "openvino")
+EXPORT_IMGSZ = 640
+
+
+def engine_model_path(engine: str, int8: bool = False, weights: str = MODEL_PATH) -> str:
+    """Where the weights for an engine live (the exported file or directory)"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown detector engine '{engine}', expected one of {ENGINES}")
+    stem = os.path.splitext(weights)[0]
+    if engine == "onnx":
+        return f"{stem}_int8.onnx" if int8 else f"{stem}.onnx"
+    if engine == "openvino":
+        return f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    return weights
+
+
+def export_model(engine: str, int8: bool = False, weights: str = MODEL_PATH,
+                 data: Optional[str] = None) -> str:
+    """
+    Export best.pt for an engine and return the exported path.
+    OpenVINO INT8 uses Ultralytics' NNCF calibration (pass the dataset yaml
+    as data). ONNX INT8 is produced with ONNX Runtime dynamic quantization.
+    """
+    target = engine_model_path(engine, int8, weights)
+    if engine == "torch":
+        return target
+
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    if engine == "openvino":
+        kwargs = {"format": "openvino", "imgsz": EXPORT_IMGSZ,
+                  "dynamic": True, "int8": int8}
+        if int8 and data:
+            kwargs["data"] = data
+        exported = model.export(**kwargs)
+        return exported
+
+    exported = model.export(format="onnx", imgsz=EXPORT_IMGSZ, dynamic=True)
+    if not int8:
+        return exported
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(exported, target, weight_type=QuantType.QUInt8)
+    return target
+
+
+def resolve_detector(engine: str, int8: bool = False, weights: str = MODEL_PATH) -> Tuple[str, str]:
+    """Pick (engine, path) to load, falling back to PyTorch if the export is missing"""
+    path = engine_model_path(engine, int8, weights)
+    if engine != "torch" and not os.path.exists(path):
+        print(f"[Detector] ⚠ {path} not found, run 'python detector_engines.py {engine}"
+              f"{' --int8' if int8 else ''}'. Falling back to PyTorch.")
+        return "torch", weights
+    return engine, path
+
+
+def load_detector(engine: str, int8: bool = False, weights: str = MODEL_PATH):
+    """Load the detector for an engine, returns (model, engine, path)"""
+    from ultralytics import YOLO
+    engine, path = resolve_detector(engine, int8, weights)
+    print(f"[Detector] ✓ Using {engine}{' INT8' if int8 and engine != 'torch' else ''} engine ({path})")
+    return YOLO(path, task="detect"), engine, path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the food detector")
+    parser.add_argument("engine", choices=[e for e in ENGINES if e != "torch"])
+    parser.add_argument("--int8", action="store_true",
+                        help="Quantize weights to INT8")
+    parser.add_argument("--data", default=None,
+                        help="Dataset yaml used for OpenVINO INT8 calibration")
+    parser.add_argument("--weights", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    print(f"[Detector] Exported to {export_model(args.engine, args.int8, args.weights, args.data)}")
@@ -0,0 +1,123 @@
+# ============================================================================
+# Embedding Store - binary, append-only storage for registered faces
+# Replaces rewriting users.json on every registration. The file is a small
+# header followed by fixed-width records (64-byte UTF-8 name + encoding as
+# float32 or float16). It is memory-mapped for reading, and a registration
+# is one locked append + fsync. A record torn by a crash is ignored and cut
+# off before the next append.
+#
+# One-time migration from users.json:
+#   python embedding_store.py migrate
+# ============================================================================
+
+import json
+import os
+import sys
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+from config import EMBEDDING_DTYPE
+from shared_files import file_lock
+
+STORE_PATH = "users.emb"
+USERS_JSON = "users.json"
+MAGIC = b"HEEMB1\0\0"
+HEADER_SIZE = 16
+NAME_BYTES = 64
+DTYPE_CODES = {"float32": 0, "float16": 1}
+
+
+def record_dtype(dim: int, dtype: str) -> np.dtype:
+    return np.dtype([("name", f"S{NAME_BYTES}"), ("encoding", f"<{np.dtype(dtype).str[1:]}", (dim,))])
+
+
+class EmbeddingStore:
+    """Append-only name + encoding records in one memory-mapped file"""
+
+    def __init__(self, path: str = STORE_PATH, dim: int = 128, dtype: str = EMBEDDING_DTYPE):
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path):
+            self._create(dim, dtype)
+        self.dim, self.dtype = self._read_header()
+        self.record = record_dtype(self.dim, self.dtype)
+
+    def _create(self, dim: int, dtype: str):
+        header = MAGIC + np.array([dim], "<u2").tobytes() + bytes([DTYPE_CODES[dtype]])
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _read_header(self) -> Tuple[int, str]:
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+            raise ValueError(f"{self.path} is not an embedding store")
+        dim = int(np.frombuffer(header[8:10], "<u2")[0])
+        dtype = {v: k for k, v in DTYPE_CODES.items()}[header[10]]
+        return dim, dtype
+
+    def __len__(self) -> int:
+        return max(0, os.path.getsize(self.path) - HEADER_SIZE) // self.record.itemsize
+
+    def read(self, start: int = 0) -> Tuple[List[str], np.ndarray]:
+        """Names and encodings of complete records from row `start` on (memory-mapped)"""
+        count = len(self)
+        if start >= count:
+            return [], np.empty((0, self.dim), dtype=np.float32)
+        records = np.memmap(self.path, dtype=self.record, mode="r",
+                            offset=HEADER_SIZE + start * self.record.itemsize,
+                            shape=(count - start,))
+        names = [n.rstrip(b"\0").decode("utf-8") for n in records["name"]]
+        return names, records["encoding"]
+
+    def append(self, name: str, encoding) -> None:
+        """Durably append one record (atomic with respect to other writers)"""
+        self.append_many([(name, encoding)])
+
+    def append_many(self, items: List[Tuple[str, object]]) -> None:
+        """Append several records with a single write and fsync"""
+        rows = np.zeros(len(items), dtype=self.record)
+        for i, (name, encoding) in enumerate(items):
+            encoded_name = name.encode("utf-8")
+            if len(encoded_name) > NAME_BYTES:
+                raise ValueError(f"Name longer than {NAME_BYTES} bytes: {name!r}")
+            rows[i]["name"] = encoded_name
+            rows[i]["encoding"] = np.asarray(encoding, dtype=np.float32)
+
+        with self._lock, file_lock(self.path), open(self.path, "r+b") as f:
+            # Drop a torn record left by a crash so records stay aligned
+            end = HEADER_SIZE + len(self) * self.record.itemsize
+            f.truncate(end)
+            f.seek(end)
+            f.write(rows.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def migrate_users_json(json_path: str = USERS_JSON, store_path: str = STORE_PATH) -> int:
+    """Copy every user from users.json into a new store, returns the number migrated"""
+    if os.path.exists(store_path):
+        print(f"[Users] {store_path} already exists, nothing to migrate")
+        return 0
+    with open(json_path, "r") as f:
+        users: Dict[str, Dict] = json.load(f)
+
+    tmp_path = f"{store_path}.migrating"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    store = EmbeddingStore(tmp_path, dtype=EMBEDDING_DTYPE)
+    store.append_many([(name, user["encoding"]) for name, user in users.items()])
+    os.replace(tmp_path, store_path)
+    print(f"[Users] ✓ Migrated {len(users)} users from {json_path} to {store_path}")
+    return len(users)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["migrate"]:
+        print("Usage: python embedding_store.py migrate")
+        sys.exit(1)
+    migrate_users_json()
@@ -0,0 +1,123 @@
+# ============================================================================
+# Face Index - vectorized nearest-neighbour search over face encodings
+# All encodings live in one float32 matrix with a parallel name list, grown
+# in place on register. A login is a single matrix-vector product plus a
+# top-k selection instead of rebuilding Python lists on every attempt.
+# Optional approximate mode uses a faiss HNSW graph when faiss is installed.
+# ============================================================================
+
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+ENCODING_DIM = 128
+
+
+class FaceIndex:
+    """Names and 128-d encodings, searchable by Euclidean distance"""
+
+    def __init__(self, dim: int = ENCODING_DIM, mode: str = "exact", capacity: int = 1024):
+        self.dim = dim
+        self._matrix = np.empty((capacity, dim), dtype=np.float32)
+        self._sq_norms = np.empty(capacity, dtype=np.float32)
+        self._names: List[str] = []
+        self._rows = {}
+        self._ann = None
+        if mode == "ann":
+            self._ann = self._make_ann(dim)
+
+    @staticmethod
+    def _make_ann(dim: int):
+        try:
+            import faiss
+        except ImportError:
+            print("[FaceIndex] ⚠ faiss not installed, using exact search")
+            return None
+        index = faiss.IndexHNSWFlat(dim, 32)
+        index.hnsw.efSearch = 64
+        return index
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def mode(self) -> str:
+        return "ann" if self._ann is not None else "exact"
+
+    def _grow(self, needed: int):
+        capacity = len(self._matrix)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        matrix[:len(self)] = self._matrix[:len(self)]
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        sq_norms[:len(self)] = self._sq_norms[:len(self)]
+        self._matrix, self._sq_norms = matrix, sq_norms
+
+    def add(self, name: str, encoding) -> None:
+        """Add one user (or replace their encoding if already indexed)"""
+        vector = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        row = self._rows.get(name)
+        if row is None or self._ann is not None:
+            # HNSW graphs cannot update in place; a re-registered name gets a new row
+            row = len(self._names)
+            self._grow(row + 1)
+            self._names.append(name)
+            if self._ann is not None:
+                self._ann.add(vector.reshape(1, -1))
+        self._rows[name] = row
+        self._matrix[row] = vector
+        self._sq_norms[row] = vector @ vector
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def add_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        for name, encoding in items:
+            self.add(name, encoding)
+
+    def add_batch(self, names: List[str], matrix: np.ndarray) -> None:
+        """Append many new users at once with one vectorized copy"""
+        if self._ann is not None or any(n in self._rows for n in names) or len(set(names)) < len(names):
+            self.add_many(zip(names, matrix))
+            return
+        start = len(self._names)
+        self._grow(start + len(names))
+        block = self._matrix[start:start + len(names)]
+        block[:] = matrix
+        self._sq_norms[start:start + len(names)] = np.einsum("ij,ij->i", block, block)
+        self._rows.update((name, start + i) for i, name in enumerate(names))
+        self._names.extend(names)
+
+    def search(self, encoding, k: int = 1) -> List[Tuple[str, float]]:
+        """The k closest users as (name, distance), closest first"""
+        count = len(self)
+        if count == 0:
+            return []
+        query = np.asarray(encoding, dtype=np.float32).reshape(self.dim)
+        k = min(k, count)
+
+        if self._ann is not None:
+            sq_dists, rows = self._ann.search(query.reshape(1, -1), k)
+            hits = [(int(r), float(d)) for r, d in zip(rows[0], sq_dists[0]) if r >= 0]
+        else:
+            # |x - q|^2 = |x|^2 - 2 x.q + |q|^2, one BLAS call for all rows
+            sq_dists = self._sq_norms[:count] - 2.0 * (self._matrix[:count] @ query) + query @ query
+            if k < count:
+                rows = np.argpartition(sq_dists, k - 1)[:k]
+            else:
+                rows = np.arange(count)
+            rows = rows[np.argsort(sq_dists[rows])]
+            hits = [(int(r), float(sq_dists[r])) for r in rows]
+
+        return [(self._names[r], float(np.sqrt(max(d, 0.0)))) for r, d in hits
+                if self._rows.get(self._names[r]) == r]
+
+    def match(self, encoding, threshold: float) -> Tuple[Optional[str], float]:
+        """Best match as (name, distance), name is None if nobody is within threshold"""
+        # A few extra candidates in ANN mode, in case the nearest row is a replaced one
+        hits = self.search(encoding, k=1 if self._ann is None else 4)
+        if not hits or hits[0][1] >= threshold:
+            return None, hits[0][1] if hits else float("inf")
+        return hits[0]
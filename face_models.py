@@ -0,0 +1,91 @@
+# ============================================================================
+# Face Models - dlib detector, landmark predictor, face encoder and users
+# Registered with the model registry so they load lazily (or in the
+# background at startup) instead of at import time.
+# ============================================================================
+
+import os
+import threading
+import numpy as np
+from typing import Optional, Tuple
+from config import FACE_INDEX_MODE, FACE_MATCH_THRESHOLD
+from embedding_store import STORE_PATH, USERS_JSON, EmbeddingStore, migrate_users_json
+from face_index import FaceIndex
+from model_registry import registry
+
+PREDICTOR_PATH = "shape_predictor_68_face_landmarks.dat"
+
+
+def _load_face_detector():
+    import dlib
+    return dlib.get_frontal_face_detector()
+
+
+def _load_shape_predictor():
+    import dlib
+    return dlib.shape_predictor(PREDICTOR_PATH)
+
+
+def _load_face_recognition():
+    # face_recognition loads its own dlib models when first imported
+    import face_recognition
+    return face_recognition
+
+
+class UsersDB:
+    """
+    Registered faces from the binary embedding store, shared by every worker.
+    Records appended by any process are picked up incrementally, and all
+    encodings are kept in a FaceIndex for vectorized matching.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        if not os.path.exists(path) and os.path.exists(USERS_JSON):
+            migrate_users_json(USERS_JSON, path)
+        self.store = EmbeddingStore(path)
+        self._lock = threading.Lock()
+        self._loaded = 0
+        self.index = FaceIndex(mode=FACE_INDEX_MODE, capacity=max(1024, len(self.store)))
+        self.refresh()
+
+    def refresh(self):
+        """Index any records appended since the last look (a stat() when nothing changed)"""
+        if len(self.store) <= self._loaded:
+            return
+        with self._lock:
+            names, encodings = self.store.read(self._loaded)
+            self.index.add_batch(names, encodings)
+            self._loaded += len(names)
+
+    def __contains__(self, name: str) -> bool:
+        self.refresh()
+        return name in self.index
+
+    def add(self, name: str, encoding: np.ndarray):
+        self.store.append(name, encoding)
+        self.refresh()
+
+    def match(self, encoding: np.ndarray,
+              threshold: float = FACE_MATCH_THRESHOLD) -> Tuple[Optional[str], float]:
+        """Closest registered user as (name, distance); name is None if no one is close enough"""
+        self.refresh()
+        return self.index.match(encoding, threshold)
+
+
+def _blank_gray():
+    return np.zeros((240, 320), dtype=np.uint8)
+
+
+def _warmup_detector(detector):
+    detector(_blank_gray(), 0)
+
+
+def _warmup_predictor(predictor):
+    import dlib
+    predictor(_blank_gray(), dlib.rectangle(80, 40, 240, 200))
+
+
+registry.register("face_detector", _load_face_detector, _warmup_detector)
+registry.register("shape_predictor", _load_shape_predictor, _warmup_predictor)
+registry.register("face_recognition", _load_face_recognition)
+registry.register("users_db", UsersDB)
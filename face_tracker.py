@@ -0,0 +1,69 @@
+# ============================================================================
+# Face Tracker - detect every N frames, follow the face in between
+# The HOG detector is the most expensive step of the blink loop, but a face
+# in front of a login camera barely moves between frames. FaceTracker runs
+# the detector on a downscaled frame every DETECT_EVERY_N frames (or as soon
+# as a tracker loses confidence) and follows each face with dlib's
+# correlation tracker in between. Landmarks are then predicted on the
+# tracked box, exactly as they were on the detected one.
+# ============================================================================
+
+from typing import List
+
+import cv2
+import numpy as np
+
+from config import DETECT_EVERY_N, DETECT_SCALE, TRACK_MIN_CONFIDENCE
+from model_registry import registry
+
+
+class FaceTracker:
+    """Per-stream face boxes: periodic downscaled detection plus correlation tracking"""
+
+    def __init__(self, every_n: int = DETECT_EVERY_N, scale: float = DETECT_SCALE,
+                 min_confidence: float = TRACK_MIN_CONFIDENCE):
+        self.every_n = max(1, every_n)
+        self.scale = scale
+        self.min_confidence = min_confidence
+        self._trackers = []
+        self._since_detect = 0
+        self.detections = 0
+        self.tracked = 0
+
+    def _detect(self, gray: np.ndarray) -> List:
+        import dlib
+        detector = registry.get("face_detector")
+        small = cv2.resize(gray, None, fx=self.scale, fy=self.scale,
+                           interpolation=cv2.INTER_AREA)
+        rects = [dlib.rectangle(int(r.left() / self.scale), int(r.top() / self.scale),
+                                int(r.right() / self.scale), int(r.bottom() / self.scale))
+                 for r in detector(small, 0)]
+
+        self._trackers = []
+        for rect in rects:
+            tracker = dlib.correlation_tracker()
+            tracker.start_track(gray, rect)
+            self._trackers.append(tracker)
+        self._since_detect = 0
+        self.detections += 1
+        return rects
+
+    def update(self, gray: np.ndarray) -> List:
+        """Face rectangles in this frame (grayscale, same size every call)"""
+        if not self._trackers or self._since_detect >= self.every_n:
+            return self._detect(gray)
+
+        import dlib
+        rects = []
+        for tracker in self._trackers:
+            if tracker.update(gray) < self.min_confidence:
+                return self._detect(gray)
+            pos = tracker.get_position()
+            rects.append(dlib.rectangle(int(pos.left()), int(pos.top()),
+                                        int(pos.right()), int(pos.bottom())))
+        self._since_detect += 1
+        self.tracked += 1
+        return rects
+
+    def reset(self):
+        self._trackers = []
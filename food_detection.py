@@ -0,0 +1,313 @@
+# ============================================================================
+# Food Detection - YOLO inference for /analyze-images
+# Images are decoded in parallel and queued on a shared batcher, which
+# gathers images from concurrent requests and runs them through the detector
+# as one batch on a dedicated worker thread. Results are cached per image
+# hash and model version, so repeat photos skip decoding and inference.
+# ============================================================================
+
+import asyncio
+import hashlib
+import os
+import time
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from config import (DETECTOR_CONF, DETECTOR_IOU, DECODE_WORKERS,
+                    DETECTOR_MAX_BATCH, DETECTOR_MAX_WAIT_MS, DETECTOR_MAX_QUEUE,
+                    DETECTION_CACHE_SIZE, DETECTOR_ENGINE, DETECTOR_INT8)
+from detection_cache import DetectionCache
+from detector_engines import load_detector, resolve_detector
+from model_registry import registry
+
+
+ENGINE, ENGINE_PATH = resolve_detector(DETECTOR_ENGINE, DETECTOR_INT8)
+
+
+def _warmup(detector):
+    model, _, _ = detector
+    model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+
+
+registry.register(
+    "food_detector", lambda: load_detector(ENGINE, DETECTOR_INT8), _warmup)
+
+
+def _model_version(engine: str, path: str) -> str:
+    """
+    Engine name plus a short hash of the weights' names, sizes and mtimes
+    (file or export directory), so retrained or re-exported models get a
+    fresh cache. Only stat() is used: every worker imports this module, and
+    reading the weights here would undo the lazy model loading.
+    """
+    hasher = hashlib.sha256(path.encode())
+    files = [path]
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, f) for f in os.listdir(path))
+    for file_path in files:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        hasher.update(f"{os.path.basename(file_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return f"{engine}-{hasher.hexdigest()[:16]}"
+
+
+MODEL_VERSION = _model_version(ENGINE, ENGINE_PATH)
+cache = DetectionCache(MODEL_VERSION, capacity=DETECTION_CACHE_SIZE)
+
+CALORIE_DICT = {
+    "apple": 52, "banana": 89, "orange": 47, "pizza": 285, "burger": 295,
+    "sandwich": 300, "salad": 150, "rice": 200, "chicken": 165, "egg": 78,
+    "bread": 80, "pasta": 200, "cake": 350, "ice cream": 207, "hot dog": 150,
+
+}
+DEFAULT_CALORIES = 145
+
+# cv2 releases the GIL while decoding, so a small pool decodes in parallel.
+_decode_pool = ThreadPoolExecutor(
+    max_workers=DECODE_WORKERS, thread_name_prefix="decode")
+# Torch is not safe to call concurrently on one model; a single worker owns it.
+_inference_pool = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="yolo")
+
+
+def prepare_image(data: np.ndarray, content_hash: str) -> Tuple[Optional[str], Optional[Dict], Optional[np.ndarray]]:
+    """
+    Look encoded image bytes up in the detection cache and decode on a miss.
+    Returns (content_hash, cached_record, image); the image is only decoded
+    on a cache miss. All three are None if the bytes are not an image.
+    """
+    record = cache.get(content_hash, image_bytes=int(data.size))
+    if record is not None:
+        return content_hash, record, None
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if image is None:
+        return None, None, None
+    return content_hash, None, image
+
+
+def load_image(path: str) -> Tuple[Optional[str], Optional[Dict], Optional[np.ndarray]]:
+    """Read and hash an image file, then prepare it (see prepare_image)"""
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except OSError:
+        return None, None, None
+    if data.size == 0:
+        return None, None, None
+    return prepare_image(data, hashlib.sha256(data.tobytes()).hexdigest())
+
+
+def load_bytes(content_hash: str, content: bytes) -> Tuple[Optional[str], Optional[Dict], Optional[np.ndarray]]:
+    """Prepare an already hashed upload straight from memory, without touching disk"""
+    if not content:
+        return None, None, None
+    return prepare_image(np.frombuffer(content, dtype=np.uint8), content_hash)
+
+
+def predict_batch(images: List[np.ndarray]) -> List[Dict]:
+    """Run one forward pass over a list of images, returns classes and boxes per image"""
+    if not images:
+        return []
+    model, _, _ = registry.get("food_detector")
+    results = model(images, conf=DETECTOR_CONF,
+                    iou=DETECTOR_IOU, verbose=False)
+    predictions = []
+    for r in results:
+        boxes = [[round(v, 1) for v in xyxy] + [round(conf, 3)]
+                 for xyxy, conf in zip(r.boxes.xyxy.tolist(), r.boxes.conf.tolist())]
+        predictions.append({
+            "classes": [model.names[int(c)].lower() for c in r.boxes.cls.tolist()],
+            "boxes": boxes,
+        })
+    return predictions
+
+
+def build_record(prediction: Dict) -> Dict:
+    """Add the per-food calorie lines shown in chat to a raw prediction"""
+    unique_names = list(dict.fromkeys(prediction["classes"]))
+    calorie_lines = []
+    calories = 0
+    for name in unique_names:
+        cal = CALORIE_DICT.get(name, DEFAULT_CALORIES)
+        calorie_lines.append(f"- {name.title()} (~{cal} calories)")
+        calories += cal
+    return {
+        "classes": prediction["classes"],
+        "boxes": prediction["boxes"],
+        "calorie_lines": calorie_lines,
+        "calories": calories,
+    }
+
+
+class DetectorBusyError(Exception):
+    """Raised when the inference queue is full"""
+
+
+class InferenceBatcher:
+    """
+    Shared inference queue for the food detector.
+    The first pending image waits up to max_wait_ms for others (from any
+    request) to arrive; up to max_batch images then go through one forward
+    pass and each caller gets back its own result.
+    """
+
+    def __init__(self, max_batch: int = DETECTOR_MAX_BATCH,
+                 max_wait_ms: float = DETECTOR_MAX_WAIT_MS,
+                 max_queue: int = DETECTOR_MAX_QUEUE):
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.images = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.inference_total = 0.0
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, image: np.ndarray) -> Dict:
+        """Queue one decoded image and wait for its prediction"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((image, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise DetectorBusyError("Detector queue is full")
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            self.queue_wait_total += sum(started - t for _, _, t in batch)
+
+            try:
+                predictions = await loop.run_in_executor(
+                    _inference_pool, predict_batch, [img for img, _, _ in batch])
+            except Exception as e:
+                print(f"[Detector] ✗ Inference error: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.inference_total += time.perf_counter() - started
+                self.batches += 1
+                self.images += len(batch)
+
+            for (_, future, _), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+    def stats(self) -> Dict:
+        """Batching settings and counters for /metrics/detector"""
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_ms,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "images": self.images,
+            "rejected": self.rejected,
+            "avg_batch_size": round(self.images / self.batches, 2) if self.batches else 0.0,
+            "avg_queue_wait_ms": round(1000 * self.queue_wait_total / self.images, 2) if self.images else 0.0,
+            "avg_inference_ms": round(1000 * self.inference_total / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+batcher = InferenceBatcher()
+
+
+async def _detect(loaded: List[Tuple]) -> List[Optional[Dict]]:
+    """Send cache misses to the batcher and build records for every image"""
+    loop = asyncio.get_running_loop()
+    pending = [(i, h, img) for i, (h, record, img) in enumerate(loaded)
+               if img is not None]
+    results = await asyncio.gather(
+        *[batcher.submit(img) for _, _, img in pending],
+        return_exceptions=True)
+    if any(isinstance(r, DetectorBusyError) for r in results):
+        raise DetectorBusyError("Detector queue is full")
+
+    records = [record for _, record, _ in loaded]
+    for (i, content_hash, _), prediction in zip(pending, results):
+        if isinstance(prediction, Exception):
+            continue
+        records[i] = build_record(prediction)
+        await loop.run_in_executor(
+            _decode_pool, cache.put, content_hash, records[i])
+    return records
+
+
+async def detect_foods(paths: List[str]) -> List[Optional[Dict]]:
+    """
+    Hash and decode every image file in parallel, serve cached ones directly
+    and hand the rest to the shared batcher. Returns one detection record per
+    path, or None for images that could not be read or analyzed.
+    Raises DetectorBusyError if the queue is full.
+    """
+    loop = asyncio.get_running_loop()
+    loaded = await asyncio.gather(
+        *[loop.run_in_executor(_decode_pool, load_image, p) for p in paths])
+    return await _detect(loaded)
+
+
+async def detect_food_bytes(uploads: List[Tuple[str, bytes]]) -> List[Optional[Dict]]:
+    """Same as detect_foods for in-memory uploads given as (content_hash, bytes)"""
+    loop = asyncio.get_running_loop()
+    loaded = await asyncio.gather(
+        *[loop.run_in_executor(_decode_pool, load_bytes, h, c) for h, c in uploads])
+    return await _detect(loaded)
+
+
+def format_analysis(detections: List[Optional[Dict]]) -> str:
+    """Turn per-photo detection records into the chat answer shown to the user"""
+    response_lines = [
+        "🥗 I analyzed your food photo(s)! Here's what I found:\n"]
+    total_calories = 0
+
+    for i, record in enumerate(detections, 1):
+        if record is None:
+            response_lines.append(f"- Error analyzing photo {i}.\n")
+            continue
+
+        response_lines.append(f"Photo {i}:")
+        if not record["calorie_lines"]:
+            response_lines.append("- No food detected.\n")
+            continue
+
+        response_lines.extend(record["calorie_lines"])
+        response_lines.append(
+            f"Estimated for this photo: {record['calories']} calories\n")
+        total_calories += record["calories"]
+
+    response_lines.append(
+        f"Total estimated calories: {total_calories} calories")
+    response_lines.append(
+        "\nNote: Estimates are approximate per typical serving. Portion size affects actual calories!")
+
+    return "\n".join(response_lines)
@@ -0,0 +1,99 @@
+# ============================================================================
+# Frame Sources - where the auth loop gets its frames
+# The browser normally sends frames over the WebSocket (see auth_routes.py).
+# The server-side /video stream reads from a source picked by
+# AUTH_FRAME_SOURCE: "webcam", "file:<path>" for a recorded clip, or
+# "synthetic" for generated frames (load tests without a camera).
+# ============================================================================
+
+import asyncio
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class SyntheticSource:
+    """Moving-gradient frames at a fixed size and rate (no real face)"""
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0):
+        self.width, self.height, self.fps = width, height, fps
+        self._frame = 0
+        self._base = np.tile(np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        time.sleep(1.0 / self.fps)
+        shifted = np.roll(self._base, self._frame * 4, axis=1)
+        self._frame += 1
+        return True, cv2.merge([shifted, shifted, shifted])
+
+    def release(self):
+        pass
+
+
+class VideoFileSource:
+    """A recorded clip played back at its own frame rate"""
+
+    def __init__(self, path: str, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        self._capture = cv2.VideoCapture(path)
+        fps = self._capture.get(cv2.CAP_PROP_FPS)
+        self._interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+        self._next = time.perf_counter()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + self._interval, time.perf_counter())
+        success, frame = self._capture.read()
+        if not success and self.loop:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self._capture.read()
+        return success, frame
+
+    def release(self):
+        self._capture.release()
+
+
+def open_frame_source(spec: str):
+    """Open a source from its AUTH_FRAME_SOURCE spec"""
+    if spec == "synthetic":
+        return SyntheticSource()
+    if spec.startswith("file:"):
+        return VideoFileSource(spec[len("file:"):])
+    return cv2.VideoCapture(0)
+
+
+class LatestFrame:
+    """
+    Single-slot mailbox for an asyncio consumer. A new frame replaces one
+    that has not been taken yet, so a slow consumer always works on the
+    newest frame and stale ones are dropped (and counted).
+    """
+
+    def __init__(self):
+        self._item = None
+        self._event = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        if self._item is not None:
+            self.dropped += 1
+        self._item = item
+        self._event.set()
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+
+    async def get(self):
+        """The newest frame, or None once closed and drained"""
+        await self._event.wait()
+        item, self._item = self._item, None
+        if not self.closed:
+            self._event.clear()
+        return item
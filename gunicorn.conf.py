@@ -0,0 +1,41 @@
+# ============================================================================
+# Production serving: pre-fork workers sharing copy-on-write model memory
+# The master imports the app and loads every read-only model once, then
+# forks the workers, so they share those pages instead of each loading its
+# own copy. Warm-up inference runs in each worker after the fork, because
+# torch/OpenMP thread pools do not survive fork().
+#
+# Usage:
+#   gunicorn -c gunicorn.conf.py main:app
+# ============================================================================
+
+import gc
+import multiprocessing
+import os
+import sys
+
+bind = os.getenv("HEALTHECHO_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("HEALTHECHO_WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+
+
+def when_ready(server):
+    # Runs in the master after main:app is imported and before any fork
+    from model_registry import registry
+    from plan_store import plan_store
+    registry.load_all(warmup=False)
+    # Plan import and pruning run here once instead of in every worker
+    plan_store.maintain()
+    # Move everything allocated so far out of the GC's reach, so collections
+    # in the workers do not touch (and un-share) these pages
+    gc.freeze()
+    server.log.info("Models loaded in master: %s", registry.status()["models"])
+
+
+def post_fork(server, worker):
+    # Split the cores between workers instead of every worker using all of them
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(max(1, multiprocessing.cpu_count() // workers))
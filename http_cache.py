@@ -0,0 +1,258 @@
+# ============================================================================
+# HTTP Cache - conditional GET, byte ranges and precompressed responses
+# Shared by the page routes, /uploads and /download:
+#   - strong ETags, with If-None-Match answered by 304 Not Modified
+#   - single byte ranges (Range / If-Range), answered by 206 or 416
+#   - files and stored plans streamed in chunks, headers only for HEAD
+#   - gzip (and brotli, when the brotli package is installed) variants of
+#     text computed once, chosen from Accept-Encoding
+#   - pages rendered once per template change instead of on every visit
+# ============================================================================
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.templating import Jinja2Templates
+
+from config import COMPRESS_MIN_BYTES, GZIP_LEVEL
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FILE_CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from anything that identifies the content"""
+    digest = hashlib.sha256("\0".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already has this ETag (any encoding of it)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    base = etag.strip('"')
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        tag = tag[2:] if tag.startswith("W/") else tag
+        if tag.strip('"').split("-", 1)[0] == base:
+            return True
+    return False
+
+
+def byte_range(request: Request, size: int, etag: str) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive of a single satisfiable Range, None to send the whole
+    body. Multiple ranges, an invalid range such as bytes=5-3, or an If-Range
+    for another version get the whole body. Raises ValueError for a range
+    outside the content (416).
+    """
+    header = request.headers.get("range")
+    if not header or "," in header:
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        return None
+    match = _RANGE.match(header.strip())
+    if match is None or not (match.group(1) or match.group(2)):
+        return None
+    if match.group(1) and match.group(2) and int(match.group(2)) < int(match.group(1)):
+        return None  # invalid (last before first), so the Range header is ignored
+    if match.group(1):
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(match.group(2)), 0)
+        end = size - 1
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _base_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+
+
+def not_modified_response(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def _unsatisfiable(size: int) -> Response:
+    return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+
+def compress_variants(data: bytes) -> Dict[str, bytes]:
+    """Precompressed encodings of data worth sending (smaller than the original)"""
+    variants = {}
+    if len(data) < COMPRESS_MIN_BYTES:
+        return variants
+    gz = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if len(gz) < len(data):
+        variants["gzip"] = gz
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            variants["br"] = br
+    return variants
+
+
+def choose_encoding(request: Request, variants: Dict[str, bytes]) -> Optional[str]:
+    """Best precompressed variant the client accepts (brotli first), or None"""
+    accepted = set()
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def bytes_response(request: Request, data: bytes, etag: str, cache_control: str,
+                   media_type: str, variants: Optional[Dict[str, bytes]] = None,
+                   headers: Optional[Dict[str, str]] = None) -> Response:
+    """In-memory content with 304, a precompressed variant or a byte range"""
+    if not_modified(request, etag):
+        return not_modified_response(etag, cache_control)
+    response_headers = {**_base_headers(etag, cache_control), **(headers or {})}
+    if variants is not None:
+        response_headers["Vary"] = "Accept-Encoding"
+
+    try:
+        selected = byte_range(request, len(data), etag)
+    except ValueError:
+        return _unsatisfiable(len(data))
+    if selected is not None:
+        start, end = selected
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(data[start:end + 1], status_code=206, media_type=media_type,
+                        headers=response_headers)
+
+    encoding = choose_encoding(request, variants or {})
+    if encoding is not None:
+        response_headers["Content-Encoding"] = encoding
+        # Each encoding is its own representation, so it needs its own strong ETag
+        response_headers["ETag"] = f'"{etag[1:-1]}-{encoding}"'
+        return Response(variants[encoding], media_type=media_type, headers=response_headers)
+    return Response(data, media_type=media_type, headers=response_headers)
+
+
+def _file_chunks(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(FILE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def slice_chunks(chunks: Iterable[bytes], start: int, length: int) -> Iterator[bytes]:
+    """The bytes [start, start + length) of a chunk stream"""
+    for chunk in chunks:
+        if length <= 0:
+            break
+        if start >= len(chunk):
+            start -= len(chunk)
+            continue
+        piece = chunk[start:start + length]
+        start = 0
+        length -= len(piece)
+        yield piece
+
+
+def stream_response(request: Request, open_chunks: Callable[[int, int], Iterator[bytes]],
+                    size: int, etag: str, cache_control: str, media_type: str,
+                    headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Content of a known size streamed from open_chunks(start, length), with
+    304 and byte-range handling; HEAD gets the headers only
+    """
+    if not_modified(request, etag):
+        return not_modified_response(etag, cache_control)
+    response_headers = {**_base_headers(etag, cache_control), **(headers or {})}
+    try:
+        selected = byte_range(request, size, etag)
+    except ValueError:
+        return _unsatisfiable(size)
+    if selected is None:
+        start, end, status = 0, size - 1, 200
+    else:
+        start, end = selected
+        status = 206
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response_headers["Content-Length"] = str(end - start + 1)
+    if request.method == "HEAD":
+        return Response(status_code=status, media_type=media_type, headers=response_headers)
+    return StreamingResponse(open_chunks(start, end - start + 1), status_code=status,
+                             media_type=media_type, headers=response_headers)
+
+
+def file_response(request: Request, path: str, etag: str, cache_control: str,
+                  media_type: str) -> Response:
+    """A file on disk with 304 and byte-range handling, streamed in chunks"""
+    return stream_response(request, lambda start, length: _file_chunks(path, start, length),
+                           os.path.getsize(path), etag, cache_control, media_type)
+
+
+class PageCache:
+    """
+    Rendered templates with their ETag and compressed variants, rebuilt only
+    when the template file changes. For templates that do not vary by request.
+    """
+
+    def __init__(self, directory: str = "templates"):
+        self.directory = directory
+        self.templates = Jinja2Templates(directory=directory)
+        self._pages: Dict[str, Tuple[float, bytes, str, Dict[str, bytes]]] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.hits = 0
+
+    def _page(self, name: str, request: Request) -> Tuple[bytes, str, Dict[str, bytes]]:
+        mtime = os.path.getmtime(os.path.join(self.directory, name))
+        with self._lock:
+            cached = self._pages.get(name)
+            if cached is not None and cached[0] == mtime:
+                self.hits += 1
+                return cached[1:]
+            html = self.templates.get_template(name).render(request=request).encode("utf-8")
+            page = (html, make_etag(name, hashlib.sha256(html).hexdigest()), compress_variants(html))
+            self._pages[name] = (mtime, *page)
+            self.renders += 1
+            return page
+
+    def response(self, request: Request, name: str) -> Response:
+        html, etag, variants = self._page(name, request)
+        # Revalidated on every visit, which costs a 304 when nothing changed
+        return bytes_response(request, html, etag, "no-cache", "text/html; charset=utf-8", variants)
+
+    def stats(self) -> Dict:
+        return {
+            "pages": {name: {"bytes": len(page[1]),
+                             **{enc: len(body) for enc, body in page[3].items()}}
+                      for name, page in self._pages.items()},
+            "renders": self.renders,
+            "hits": self.hits,
+            "brotli": brotli is not None,
+        }
+
+
+pages = PageCache()
@@ -1,7 +1,7 @@
-from ultralytics import YOLO
+from config import DETECTOR_ENGINE, DETECTOR_INT8
+from detector_engines import load_detector
 
-model = YOLO(r"Food-Detection\dataset\runs\detect\train2\weights\best.pt")
+model, _, _ = load_detector(DETECTOR_ENGINE, DETECTOR_INT8)
 image_path = r"Food-Detection\dataset\images\test\3_jpg.rf.f2a1a102a11832ae1d2d6edf055f020d.jpg"
 result = model(
     image_path, save=True,  iou=0.5)
-
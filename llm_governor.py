@@ -0,0 +1,461 @@
+# ============================================================================
+# LLM Governor - one gate for every outbound model call (Gemini, ElevenLabs)
+# Per provider:
+#   - a concurrency limit shared by async and thread callers, with a bounded
+#     wait queue; calls beyond it are shed at once (OverloadedError)
+#   - a deadline per call, covering queueing, every attempt and backoff
+#   - retries with full-jitter exponential backoff for transient errors
+#     (timeouts, connection/transport errors, 408/429/5xx); other errors,
+#     bugs included, fail fast and leave the circuit breaker alone
+#   - a circuit breaker that fails calls fast (CircuitOpenError) after
+#     repeated transient failures, then lets one probe through
+#   - latency and queue-wait histograms for /metrics/llm
+# Callers catch GovernorError (or pass a fallback) to answer quickly when
+# the provider is slow or down instead of piling up worker threads.
+# ============================================================================
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from config import (LLM_PROVIDERS, LLM_RETRY_BACKOFF, LLM_RETRY_BACKOFF_MAX,
+                    LLM_BREAKER_FAILURES, LLM_BREAKER_RESET)
+
+# Network errors of the HTTP clients under the Gemini and ElevenLabs SDKs
+TRANSIENT_ERRORS = (asyncio.TimeoutError, TimeoutError, ConnectionError)
+try:
+    import httpx
+    TRANSIENT_ERRORS += (httpx.TimeoutException, httpx.TransportError)
+except ImportError:
+    pass
+try:
+    import requests
+    TRANSIENT_ERRORS += (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+except ImportError:
+    pass
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_NO_FALLBACK = object()
+
+
+class GovernorError(Exception):
+    """A call the governor refused or gave up on"""
+
+
+class OverloadedError(GovernorError):
+    """Too many calls already waiting for this provider"""
+
+
+class CircuitOpenError(GovernorError):
+    """The provider failed repeatedly and is being given time to recover"""
+
+
+class DeadlineExceeded(GovernorError):
+    """The call did not finish within its deadline"""
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for attr in ("code", "status_code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Transient errors worth retrying: timeouts, network errors and provider
+    errors with 408/429/5xx. Anything else (a rejected request, a bug) is not
+    """
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    return _status_code(error) in RETRYABLE_STATUS
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+
+    BOUNDS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(self.BOUNDS_MS) if ms <= bound),
+                      len(self.BOUNDS_MS))
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += 1
+            self.sum_ms += ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile (None if above the last bound)"""
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.BOUNDS_MS[i] if i < len(self.BOUNDS_MS) else None
+        return None
+
+    def stats(self) -> Dict:
+        buckets = {f"le_{bound}": count for bound, count in zip(self.BOUNDS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "avg_ms": round(self.sum_ms / self.total, 1) if self.total else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "buckets": buckets,
+        }
+
+
+class CircuitBreaker:
+    """closed -> open after `failures` transient failures in a row -> half-open probe after `reset` s"""
+
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, reset: float = LLM_BREAKER_RESET):
+        self.failure_threshold = failures
+        self.reset = reset
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "closed":
+                return True
+            if self.state == "open" and now - self.opened_at >= self.reset:
+                self.state = "half_open"
+                self._probing = False
+            # A probe that never reported back (shed, cancelled) frees up after `reset`
+            if self.state == "half_open" and (not self._probing or now - self._probe_started >= self.reset):
+                self._probing = True
+                self._probe_started = now
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+class _Waiter:
+    def __init__(self, loop=None):
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+
+    def grant(self):
+        self.granted = True
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(
+                lambda: self.future.done() or self.future.set_result(True))
+        else:
+            self.event.set()
+
+
+class _Limiter:
+    """Concurrency slots usable from both the event loop and threads, handed out in FIFO order"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _try_enqueue(self, waiter: _Waiter) -> bool:
+        """Take a free slot (True) or queue the waiter (False); caller holds the lock"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        self._waiters.append(waiter)
+        return False
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Give up waiting; True if the slot was granted meanwhile (and is now ours)"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    async def acquire(self, timeout: float) -> bool:
+        waiter = _Waiter(asyncio.get_running_loop())
+        with self._lock:
+            if self._try_enqueue(waiter):
+                return True
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if self._abandon(waiter):
+                self.release()
+            raise
+
+    def acquire_sync(self, timeout: float) -> bool:
+        waiter = _Waiter()
+        with self._lock:
+            if self._try_enqueue(waiter):
+                return True
+        if waiter.event.wait(timeout) or self._abandon(waiter):
+            return True
+        return False
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().grant()  # the slot passes straight on
+            else:
+                self.active -= 1
+
+
+class Provider:
+    """Governed access to one upstream service"""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, timeout: float,
+                 retries: int):
+        self.name = name
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retries = retries
+        self.limiter = _Limiter(concurrency)
+        self.breaker = CircuitBreaker()
+        self.latency = Histogram()
+        self.queue_wait = Histogram()
+        self._lock = threading.Lock()
+        self.counters = {name: 0 for name in (
+            "calls", "succeeded", "failed", "retries", "timeouts", "shed", "rejected_open",
+            "fallbacks")}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _admit(self):
+        """Fail fast while the breaker is open or the queue is full"""
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected_open")
+            raise CircuitOpenError(f"{self.name} is failing, not calling it for now")
+        if self.limiter.active >= self.limiter.limit and self.limiter.waiting >= self.max_queue:
+            self._count("shed")
+            raise OverloadedError(f"{self.name} has {self.limiter.waiting} calls waiting")
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(LLM_RETRY_BACKOFF_MAX, LLM_RETRY_BACKOFF * 2 ** attempt))
+
+    def _failed(self, error: BaseException):
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            self._count("timeouts")
+        if is_retryable(error):
+            self.breaker.failure()
+        self._count("failed")
+
+    def _fallback(self, fallback, error: BaseException):
+        if fallback is _NO_FALLBACK:
+            raise error
+        self._count("fallbacks")
+        print(f"[Governor] {self.name}: {error!r}, using fallback")
+        return fallback
+
+    def _give_up(self, error: BaseException, attempt: int, retries: int, delay: float,
+                 deadline: float) -> bool:
+        return (attempt == retries or not is_retryable(error)
+                or time.monotonic() + delay >= deadline or not self.breaker.allow())
+
+    async def _enter(self, timeout: float):
+        """Admission and a concurrency slot (raises GovernorError)"""
+        self._admit()
+        queued_at = time.monotonic()
+        try:
+            await self.limiter.acquire(timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise DeadlineExceeded(f"{self.name}: no free slot within {timeout:.0f}s")
+        self.queue_wait.observe(time.monotonic() - queued_at)
+
+    async def _attempts(self, factory: Callable[[], Awaitable[Any]], deadline: float,
+                        retries: int) -> Any:
+        """The retry loop; the caller holds a slot"""
+        for attempt in range(retries + 1):
+            started = time.monotonic()
+            try:
+                remaining = deadline - started
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                result = await asyncio.wait_for(factory(), remaining)
+            except Exception as e:
+                self.latency.observe(time.monotonic() - started)
+                self._failed(e)
+                delay = self._backoff(attempt)
+                if self._give_up(e, attempt, retries, delay, deadline):
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise DeadlineExceeded(f"{self.name}: no answer before the deadline") from e
+                    raise
+                self._count("retries")
+                await asyncio.sleep(delay)
+                continue
+            self.latency.observe(time.monotonic() - started)
+            self.breaker.success()
+            self._count("succeeded")
+            return result
+
+    async def call(self, factory: Callable[[], Awaitable[Any]], timeout: Optional[float] = None,
+                   retries: Optional[int] = None, fallback: Any = _NO_FALLBACK) -> Any:
+        """
+        await factory() under the provider's limits; factory is called again
+        for each retry. Returns fallback instead of raising when one is given.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        deadline = time.monotonic() + timeout
+        try:
+            await self._enter(timeout)
+        except GovernorError as e:
+            return self._fallback(fallback, e)
+        try:
+            return await self._attempts(factory, deadline, retries)
+        except Exception as e:
+            return self._fallback(fallback, e)
+        finally:
+            self.limiter.release()
+
+    def call_sync(self, fn: Callable[[], Any], timeout: Optional[float] = None,
+                  retries: Optional[int] = None, fallback: Any = _NO_FALLBACK) -> Any:
+        """
+        fn() from a worker thread under the same limits. A blocking call
+        cannot be interrupted, so the client's own timeout should match the
+        provider's (see the client setup in ai_reasoning.py and voice.py);
+        the deadline here bounds queueing and retries.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        deadline = time.monotonic() + timeout
+        try:
+            self._admit()
+            queued_at = time.monotonic()
+            if not self.limiter.acquire_sync(timeout):
+                self._count("timeouts")
+                raise DeadlineExceeded(f"{self.name}: no free slot within {timeout:.0f}s")
+            self.queue_wait.observe(time.monotonic() - queued_at)
+        except GovernorError as e:
+            return self._fallback(fallback, e)
+
+        try:
+            for attempt in range(retries + 1):
+                started = time.monotonic()
+                try:
+                    result = fn()
+                except Exception as e:
+                    self.latency.observe(time.monotonic() - started)
+                    self._failed(e)
+                    delay = self._backoff(attempt)
+                    if self._give_up(e, attempt, retries, delay, deadline):
+                        return self._fallback(fallback, e)
+                    self._count("retries")
+                    time.sleep(delay)
+                    continue
+                self.latency.observe(time.monotonic() - started)
+                self.breaker.success()
+                self._count("succeeded")
+                return result
+        finally:
+            self.limiter.release()
+
+    async def stream(self, factory: Callable[[], Awaitable[AsyncIterator[Any]]],
+                     timeout: Optional[float] = None,
+                     retries: Optional[int] = None) -> AsyncIterator[Any]:
+        """
+        Items of the stream `await factory()` opens, holding one slot for the
+        whole stream. Opening (up to the first item) is retried like call();
+        once items have been yielded a failure is raised, not retried.
+        timeout bounds the wait for the first item and each gap after it.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+
+        async def open_stream():
+            iterator = (await factory()).__aiter__()
+            try:
+                return iterator, [await iterator.__anext__()]
+            except StopAsyncIteration:
+                return iterator, []
+
+        await self._enter(timeout)
+        try:
+            iterator, first = await self._attempts(open_stream, time.monotonic() + timeout, retries)
+            for item in first:
+                yield item
+            while True:
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    self._failed(e)
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise DeadlineExceeded(f"{self.name}: stream stalled for {timeout:.0f}s") from e
+                    raise
+                yield item
+        finally:
+            self.limiter.release()
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "concurrency": self.limiter.limit,
+            "in_flight": self.limiter.active,
+            "queued": self.limiter.waiting,
+            "max_queue": self.max_queue,
+            "breaker": self.breaker.state,
+            "breaker_trips": self.breaker.trips,
+            "latency": self.latency.stats(),
+            "queue_wait": self.queue_wait.stats(),
+        }
+
+
+class Governor:
+    """The providers from LLM_PROVIDERS, by name"""
+
+    def __init__(self, providers: Dict[str, Dict] = LLM_PROVIDERS):
+        self.providers = {name: Provider(name, **settings) for name, settings in providers.items()}
+
+    def __getitem__(self, name: str) -> Provider:
+        return self.providers[name]
+
+    def stats(self) -> Dict:
+        return {name: provider.stats() for name, provider in self.providers.items()}
+
+
+governor = Governor()
@@ -1,33 +1,33 @@
 
+import asyncio
 import json
-import cv2
-import dlib
+import mimetypes
 import os
-import uuid
-import face_recognition
-import numpy as np
-from imutils import face_utils
-from scipy.spatial import distance as dist
-from fastapi.staticfiles import StaticFiles
+import re
 from fastapi.middleware.cors import CORSMiddleware
-from ultralytics import YOLO
 from datetime import datetime
 from fastapi import FastAPI, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
-from fastapi.templating import Jinja2Templates
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
-
-
-PREDICTOR_PATH = "shape_predictor_68_face_landmarks.dat"
-USERS_FILE = "users.json"
-EYE_AR_THRESH = 0.25
-EYE_AR_CONSEC_FRAMES = 3
-REQUIRED_BLINKS = 2
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from food_detection import DetectorBusyError, batcher, detect_foods, detect_food_bytes, format_analysis
+from food_detection import cache as detection_cache
+from upload_store import UploadBudget, UploadLimitMiddleware, UploadTooLargeError, upload_store
+from model_registry import registry
+from auth_routes import router as auth_router
+from ai_reasoning import ask_nutrition_advice, stream_meal_plan, stream_meal_plan_sharded, validate_profile
+from answer_index import answer_index
+from config import ANSWER_FALLBACK_THRESHOLD, PLAN_SHARD_DAYS, UPLOAD_MAX_AGE, DOWNLOAD_MAX_AGE
+from llm_governor import GovernorError, governor
+from meal_plan_parser import MealPlanParser
+from plan_cache import plan_cache, profile_key
+from plan_store import plan_store
+from http_cache import (file_response, make_etag, not_modified, not_modified_response, pages,
+                        slice_chunks, stream_response)
+import data_loader  # registers the nutrition data
 
 app = FastAPI(title="NutriHelp - Jenny AI")
 
+# Oversized uploads are refused before the multipart body is parsed and spooled
+app.add_middleware(UploadLimitMiddleware, paths=("/upload-image", "/upload-and-analyze"))
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -36,83 +36,92 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-templates = Jinja2Templates(directory="templates")
-
 os.makedirs("uploads", exist_ok=True)
-os.makedirs("meal_plans", exist_ok=True)
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.include_router(auth_router)
 
 
-MODEL_PATH = r"Food-Detection\dataset\runs\detect\train2\weights\best.pt"
-model = YOLO(MODEL_PATH)
+@app.get("/main-page", response_class=HTMLResponse)
+async def home(request: Request):
+    return pages.response(request, "index.html")
 
-CALORIE_DICT = {
-    "apple": 52, "banana": 89, "orange": 47, "pizza": 285, "burger": 295,
-    "sandwich": 300, "salad": 150, "rice": 200, "chicken": 165, "egg": 78,
-    "bread": 80, "pasta": 200, "cake": 350, "ice cream": 207, "hot dog": 150,
 
-}
+# Uploads are named <sha256>.<ext> by upload_store, so their content never changes
+CONTENT_ADDRESSED = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]{1,5}$")
 
 
-@app.get("/main-page", response_class=HTMLResponse)
-async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+@app.api_route("/uploads/{name}", methods=["GET", "HEAD"])
+async def uploaded_file(name: str, request: Request):
+    path = os.path.join("uploads", name)
+    if name.startswith(".") or os.path.basename(name) != name or not os.path.isfile(path):
+        return JSONResponse({"error": "File not found"}, status_code=404)
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    addressed = CONTENT_ADDRESSED.match(name)
+    if addressed:
+        return file_response(request, path, f'"{addressed.group(1)}"',
+                             f"public, max-age={UPLOAD_MAX_AGE}, immutable", media_type)
+    stat = os.stat(path)
+    return file_response(request, path, make_etag(name, stat.st_mtime_ns, stat.st_size),
+                         "no-cache", media_type)
 
 
 @app.post("/upload-image")
 async def upload_image(images: list[UploadFile] = File(...)):
     file_paths = []
-    for file in images:
-        if file.content_type.startswith("image/"):
-            ext = file.filename.split(".")[-1]
-            filename = f"{uuid.uuid4().hex}.{ext}"
-            filepath = os.path.join("uploads", filename)
-            with open(filepath, "wb") as f:
-                content = await file.read()
-                f.write(content)
-            file_paths.append(f"/uploads/{filename}")
+    budget = UploadBudget()
+    try:
+        for file in images:
+            if file.content_type.startswith("image/"):
+                _, filename = await upload_store.save_stream(file, budget)
+                file_paths.append(f"/uploads/{filename}")
+    except UploadTooLargeError as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
     return JSONResponse({"filePaths": file_paths})
 
 
+@app.post("/upload-and-analyze")
+async def upload_and_analyze(images: list[UploadFile] = File(...)):
+    """Upload photos and analyze them in one round trip, without re-reading them from disk"""
+    file_paths = []
+    uploads = []
+    budget = UploadBudget()
+    try:
+        for file in images:
+            if file.content_type.startswith("image/"):
+                content_hash, filename, content = await upload_store.read_and_save(file, budget)
+                file_paths.append(f"/uploads/{filename}")
+                uploads.append((content_hash, content))
+    except UploadTooLargeError as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+
+    try:
+        detections = await detect_food_bytes(uploads)
+    except DetectorBusyError:
+        return JSONResponse({"filePaths": file_paths,
+                             "answer": "I'm analyzing a lot of photos right now. Please try again in a moment! 😊"},
+                            status_code=503)
+    return JSONResponse({"filePaths": file_paths, "answer": format_analysis(detections)})
+
+
 @app.post("/analyze-images")
 async def analyze_images(request: Request):
     data = await request.json()
     image_paths = data.get("image_paths", [])
-    response_lines = [
-        "🥗 I analyzed your food photo(s)! Here's what I found:\n"]
-    total_calories = 0
-
-    for i, rel_path in enumerate(image_paths, 1):
-        full_path = "." + rel_path
-        try:
-            results = model(full_path, conf=0.5, iou=0.5)
-            classes = results[0].boxes.cls.tolist()
-            class_names = [model.names[int(c)].lower() for c in classes]
-            unique_names = list(set(class_names))
-
-            response_lines.append(f"Photo {i}:")
-            if not unique_names:
-                response_lines.append("- No food detected.\n")
-                continue
-
-            photo_cal = 0
-            for name in unique_names:
-                cal = CALORIE_DICT.get(name, 145)
-                response_lines.append(f"- {name.title()} (~{cal} calories)")
-                photo_cal += cal
-            response_lines.append(
-                f"Estimated for this photo: {photo_cal} calories\n")
-            total_calories += photo_cal
-        except Exception as e:
-            response_lines.append(f"- Error analyzing photo {i}.\n")
+    try:
+        detections = await detect_foods(["." + p for p in image_paths])
+    except DetectorBusyError:
+        return JSONResponse({"answer": "I'm analyzing a lot of photos right now. Please try again in a moment! 😊"},
+                            status_code=503)
+    return JSONResponse({"answer": format_analysis(detections)})
 
-    response_lines.append(
-        f"Total estimated calories: {total_calories} calories")
-    response_lines.append(
-        "\nNote: Estimates are approximate per typical serving. Portion size affects actual calories!")
 
-    return JSONResponse({"answer": "\n".join(response_lines)})
+@app.get("/metrics/detector")
+async def detector_metrics():
+    return JSONResponse({
+        **batcher.stats(),
+        "cache": detection_cache.stats(),
+        "uploads": upload_store.stats(),
+    })
 
 
 @app.post("/ask")
@@ -123,212 +132,161 @@ async def ask_nutrition_question(request: Request):
         if not question:
             return JSONResponse({"answer": "Please ask something! 😊"})
 
-        answer = "This is a placeholder response. Implement get_quick_nutrition_advice() for real answers."
-        return JSONResponse({"answer": answer})
+        # Known (or near-identical) questions are answered locally; the index
+        # reads and appends to the shared answers file, so off the event loop
+        loop = asyncio.get_running_loop()
+        known = await loop.run_in_executor(None, answer_index.lookup, question)
+        if known is not None:
+            answer, similarity = known
+            return JSONResponse({"answer": answer, "source": "cache",
+                                 "similarity": round(similarity, 3)})
+
+        try:
+            answer = await ask_nutrition_advice(question)
+        except GovernorError:
+            # Gemini is overloaded or down: answer fast from a looser local match
+            known = await loop.run_in_executor(
+                None, lambda: answer_index.lookup(question, threshold=ANSWER_FALLBACK_THRESHOLD))
+            if known is None:
+                return JSONResponse({"answer": "I'm getting a lot of questions right now. Please ask again in a minute! 😊"},
+                                    status_code=503)
+            return JSONResponse({"answer": known[0], "source": "cache-fallback",
+                                 "similarity": round(known[1], 3)})
+        await loop.run_in_executor(None, answer_index.add, question, answer)
+        return JSONResponse({"answer": answer, "source": "gemini"})
     except Exception as e:
+        print(f"[Ask] ✗ Error: {e}")
         return JSONResponse({"answer": "Trouble connecting. Try again! 😊"})
 
 
+@app.get("/metrics/ask")
+async def ask_metrics():
+    return JSONResponse(answer_index.stats())
+
+
+def sse(event: str, data: dict) -> str:
+    """One server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.post("/generate-plan")
 async def generate_plan(
     goal: str = Form(...), sport: str = Form(...), level: str = Form(...),
-    diet: str = Form(...), condition: str = Form(""), allergies: str = Form("")
+    diet: str = Form(...), condition: str = Form(""), allergies: str = Form(""),
+    user: str = Form("")
 ):
+    """
+    Streams the plan as server-sent events while Gemini writes it:
+    "chunk" events carry text (whole day ranges, in order, when the plan is
+    generated in parallel shards), "record" events carry the parsed days,
+    meals and daily totals as soon as each line is complete, then "done"
+    carries the download filename (or "error" if generation failed part way).
+    """
+    profile = {
+        "goal": goal, "sport": sport, "level": level, "diet": diet,
+        "condition": condition or "None",
+        "allergies": [a.strip() for a in allergies.split(",") if a.strip()] or ["None"],
+    }
+    is_valid, error_msg = validate_profile(profile)
+    if not is_valid:
+        return JSONResponse({"error": error_msg}, status_code=400)
+
+    loader = await asyncio.get_running_loop().run_in_executor(None, registry.get, "nutrition_data")
+
+    def produce():
+        if PLAN_SHARD_DAYS:
+            return stream_meal_plan_sharded(profile, loader)
+        return stream_meal_plan(profile, loader)
+
+    # Cached plans come back as one chunk; identical profiles share one generation
+    plan_stream = plan_cache.stream(profile_key(profile), produce, profile)
+
+    async def events():
+        parts = []
+        parser = MealPlanParser()
+        try:
+            async for text in plan_stream:
+                parts.append(text)
+                yield sse("chunk", {"text": text})
+                for record in parser.feed(text):
+                    yield sse("record", record)
+        except GovernorError:
+            yield sse("error", {"error": "Jenny is very busy right now. Please try again in a minute."})
+            return
+        except Exception:
+            yield sse("error", {"error": "System Error: Unable to generate plan. Please try again."})
+            return
+        for record in parser.close():
+            yield sse("record", record)
+        filename = await asyncio.get_running_loop().run_in_executor(
+            None, plan_store.save, profile, "".join(parts), user)
+        yield sse("done", {"filename": filename})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-    meal_plan_text = "Day 1:\nBreakfast: Oatmeal with fruits\nLunch: Grilled chicken salad\nDinner: Baked salmon with veggies\n..."
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"meal_plan_{timestamp}_{uuid.uuid4().hex[:8]}.txt"
-    filepath = os.path.join("meal_plans", filename)
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write("Sample Meal Plan\n" + meal_plan_text)
-    return JSONResponse({
-        "meal_plan": meal_plan_text,
-        "filename": filename
-    })
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    return JSONResponse(governor.stats())
+
+
+@app.get("/metrics/plans")
+async def plan_metrics():
+    return JSONResponse({**plan_cache.stats(), "store": plan_store.stats()})
+
+
+@app.get("/metrics/pages")
+async def page_metrics():
+    return JSONResponse(pages.stats())
 
 
 @app.get("/download/{filename}")
-async def download(filename: str):
-    filepath = os.path.join("meal_plans", filename)
-    if not os.path.exists(filepath):
+async def download(filename: str, request: Request):
+    # SQLite may wait on another writer's lock, so both lookups run off the event loop
+    loop = asyncio.get_running_loop()
+    plan = await loop.run_in_executor(None, plan_store.get, filename)
+    if plan is None:
         return JSONResponse({"error": "File not found"}, status_code=404)
-    return FileResponse(filepath, filename=f"NutriHelp_MealPlan_{datetime.now().strftime('%Y%m%d')}.txt")
-
-
-detector = dlib.get_frontal_face_detector()
-predictor = dlib.shape_predictor(PREDICTOR_PATH)
-if os.path.exists(USERS_FILE):
-    with open(USERS_FILE, "r") as f:
-        users_db = json.load(f)
-else:
-    users_db = {}
-
-camera = None
-camera_active = False
-current_mode = None
-current_user = None
-blink_counter = 0
-total_blinks = 0
-auth_result = None
-
-
-def calculate_ear(eye):
-    A = dist.euclidean(eye[1], eye[5])
-    B = dist.euclidean(eye[2], eye[4])
-    C = dist.euclidean(eye[0], eye[3])
-    return (A + B) / (2.0 * C)
-
-
-def generate_frames():
-    global camera, camera_active, blink_counter, total_blinks, auth_result
-    camera = cv2.VideoCapture(0)
-    camera_active = True
-
-    while camera_active:
-        success, frame = camera.read()
-        if not success:
-            break
-
-        frame = cv2.resize(frame, None, fx=0.75, fy=0.75)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        rects = detector(gray, 0)
-
-        for rect in rects:
-            shape = predictor(gray, rect)
-            shape = face_utils.shape_to_np(shape)
-
-            left_eye = shape[36:42]
-            right_eye = shape[42:48]
-
-            ear = (calculate_ear(left_eye) + calculate_ear(right_eye)) / 2.0
-
-            if ear < EYE_AR_THRESH:
-                blink_counter += 1
-            else:
-                if blink_counter >= EYE_AR_CONSEC_FRAMES:
-                    total_blinks += 1
-                blink_counter = 0
-
-            cv2.putText(frame, f"Blinks: {total_blinks}/{REQUIRED_BLINKS}",
-                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-
-            if total_blinks >= REQUIRED_BLINKS and auth_result is None:
-                face_locations = [
-                    (rect.top(), rect.right(), rect.bottom(), rect.left())]
-                encodings = face_recognition.face_encodings(
-                    rgb, face_locations)
-
-                if encodings:
-                    encoding = encodings[0]
-
-                    if current_mode == "register":
-                        users_db[current_user] = {
-                            "encoding": encoding.tolist()}
-                        with open(USERS_FILE, "w") as f:
-                            json.dump(users_db, f, indent=2)
-                        auth_result = {
-                            "status": "success",
-                            "message": f"Registered as {current_user}",
-                            "redirect": True
-                        }
-
-                    elif current_mode == "login":
-
-                        if users_db:
-                            known_encodings = [
-                                np.array(user["encoding"]) for user in users_db.values()]
-                            known_names = list(users_db.keys())
-
-                            distances = face_recognition.face_distance(
-                                known_encodings, encoding)
-                            best_match_idx = np.argmin(distances)
-
-                            if distances[best_match_idx] < 0.6:
-                                matched_name = known_names[best_match_idx]
-                                auth_result = {
-                                    "status": "success",
-                                    "message": f"Welcome back {matched_name}!",
-                                    "redirect": True
-                                }
-                            else:
-                                auth_result = {
-                                    "status": "failed",
-                                    "message": "Face not recognized"
-                                }
-                        else:
-                            auth_result = {
-                                "status": "failed",
-                                "message": "No registered users found"
-                            }
-
-                    camera_active = False
-
-            cv2.putText(frame, "Blink Twice to Authenticate",
-                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-
-        ret, buffer = cv2.imencode(".jpg", frame)
-        frame_bytes = buffer.tobytes()
-
-        yield (b"--frame\r\n"
-               b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n")
-
-    if camera is not None:
-        camera.release()
-        camera = None
-
-
-@app.get("/", response_class=HTMLResponse)
-def index(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
-
-
-@app.get("/video")
-def video():
-    if not camera_active:
-        return JSONResponse({"error": "Camera not active"}, status_code=400)
-
-    return StreamingResponse(
-        generate_frames(),
-        media_type="multipart/x-mixed-replace; boundary=frame"
-    )
-
-
-@app.post("/register")
-def register(username: str):
-    global current_mode, current_user, total_blinks, auth_result, camera_active
-    if username in users_db:
-        return JSONResponse({"error": "User already exists"}, status_code=400)
-
-    current_mode = "register"
-    current_user = username
-    total_blinks = 0
-    auth_result = None
-    camera_active = True
-    return {"status": "Camera started for registration"}
-
-
-@app.post("/login")
-def login():
-    global current_mode, total_blinks, auth_result, camera_active
-    current_mode = "login"
-    total_blinks = 0
-    auth_result = None
-    camera_active = True
-    return {"status": "Camera started for login"}
-
-
-@app.get("/result")
-def result():
-    global auth_result
-    if auth_result:
-        print(auth_result, "<<<<<<<<<<<<")
-        return JSONResponse({"result": auth_result})
-    return JSONResponse({"result": None})
+    # A saved plan never changes, so a revalidation needs no body at all
+    etag = make_etag(filename, plan["digest"])
+    cache_control = f"private, max-age={DOWNLOAD_MAX_AGE}"
+    if not_modified(request, etag):
+        return not_modified_response(etag, cache_control)
+    chunks = await loop.run_in_executor(None, plan_store.read, filename)
+    if chunks is None:
+        return JSONResponse({"error": "File not found"}, status_code=404)
+    download_name = f"NutriHelp_MealPlan_{datetime.now().strftime('%Y%m%d')}.txt"
+    # Decompressed chunk by chunk as the response is sent (only the requested range)
+    return stream_response(request, lambda start, length: slice_chunks(chunks, start, length),
+                           plan["length"], etag, cache_control, "text/plain; charset=utf-8",
+                           headers={"Content-Disposition": f'attachment; filename="{download_name}"'})
+
+
+@app.on_event("startup")
+async def load_models():
+    # Models load in the background so routes that need none serve right away
+    registry.load_in_background()
+    # Old meal_plan_*.txt files are copied into the plan store once, then expired
+    # plans go (already done by the gunicorn master when pre-forked)
+    def maintain_plans():
+        try:
+            plan_store.maintain()
+        except Exception as e:
+            print(f"[Plans] ✗ Import/prune failed: {e!r}")
+    if not plan_store.maintained:
+        asyncio.get_running_loop().run_in_executor(None, maintain_plans)
+
+
+@app.get("/ready")
+async def ready():
+    status = registry.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
 
 
 if __name__ == "__main__":
     import uvicorn
     print("🥗 NutriHelp Starting... Open http://127.0.0.1:8000")
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Auto-reload restarts the process (and reloads every model) on each edit
+    uvicorn.run("main:app", host="0.0.0.0", port=8000,
+                reload=os.getenv("HEALTHECHO_RELOAD") == "1")
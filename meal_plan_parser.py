@@ -0,0 +1,188 @@
+# ============================================================================
+# Meal Plan Parser - structured days from streamed plan text
+# Consumes the plan text as it arrives (any chunk size) and emits records as
+# soon as each line completes:
+#   {"type": "day", "day": 1}
+#   {"type": "meal", "day": 1, "meal": "Breakfast", "dish": "...", "calories": 350, "prep_min": 10}
+#   {"type": "day_total", "day": 1, "calories": 1810, "meals": 5, "stated": None}
+# (day_total comes when the next day or the gear checklist starts; "stated" is
+# the plan's own "Total: ..." line, if it has one)
+#   {"type": "gear", "item": "Running Shoes"}
+# Lines in the strict template ("Breakfast: [Meal] | [Cal] cal | [Time] min")
+# are emitted right away. Anything looser (markdown headings, calories or
+# prep time on follow-up lines, "Total Calories" summaries) is recovered on a
+# best-effort basis; lines that fit nothing are skipped.
+# ============================================================================
+
+import re
+from typing import Dict, List, Optional
+
+_DAY = re.compile(r"^day\s*(\d+)\b", re.IGNORECASE)
+_WEEKDAY = re.compile(r"^(?:mon|tues|wednes|thurs|fri|satur|sun)day\b.{0,30}$", re.IGNORECASE)
+_MEAL = re.compile(
+    r"^(?P<meal>(?:(?:mid[\s-]?morning|morning|afternoon|evening|pre[\s-]?workout|"
+    r"post[\s-]?workout|bedtime|late)\s*)?snack(?:\s*\d)?|breakfast|brunch|lunch|dinner|supper)"
+    r"\s*(?=$|[:(|\-–])(?P<rest>.*)$",
+    re.IGNORECASE)
+_CALORIES = re.compile(
+    r"(\d+(?:\.\d+)?)(?:\s*[-–]\s*(\d+(?:\.\d+)?))?\s*(?:k?cals?|calories)\b", re.IGNORECASE)
+_PREP = re.compile(r"(\d+)(?:\s*[-–]\s*(\d+))?\s*(?:min|mins|minutes)\b", re.IGNORECASE)
+_PARENS = re.compile(r"\([^)]*\)")
+_GEAR = re.compile(r"sport\s*gear", re.IGNORECASE)
+_TOTAL = re.compile(r"\btotal\b", re.IGNORECASE)
+_LEADING = re.compile(r"^[\W_]+")
+
+
+def _clean(line: str) -> str:
+    """Markdown emphasis, headings, bullets and emoji removed"""
+    return _LEADING.sub("", line.replace("*", "").replace("#", "")).strip()
+
+
+def _number(match: Optional[re.Match]) -> Optional[int]:
+    """A matched value, or the middle of a matched range ("2200-2400 kcal")"""
+    if match is None:
+        return None
+    low = float(match.group(1))
+    high = float(match.group(2)) if match.group(2) else low
+    return int(round((low + high) / 2))
+
+
+class MealPlanParser:
+    """Incremental parser: feed() text chunks, close() at the end of the stream"""
+
+    def __init__(self):
+        self._buffer = ""
+        self._day: Optional[int] = None
+        self._meal: Optional[Dict] = None
+        self._day_calories = 0
+        self._day_meals = 0
+        self._day_counted = 0  # meals with a calorie count
+        self._day_stated: Optional[int] = None
+        self._in_gear = False
+
+        self.lines = 0
+        self.records = 0
+        self.recovered = 0  # meal lines outside the strict template
+        self.skipped = 0    # non-empty lines that fit nothing
+
+    def feed(self, text: str) -> List[Dict]:
+        """Records completed by this chunk"""
+        self._buffer += text
+        *complete, self._buffer = self._buffer.split("\n")
+        records = []
+        for line in complete:
+            self._line(line, records)
+        return records
+
+    def close(self) -> List[Dict]:
+        """Records still pending at the end of the stream"""
+        records = []
+        if self._buffer:
+            self._line(self._buffer, records)
+            self._buffer = ""
+        self._end_day(records)
+        return records
+
+    # ------------------------------------------------------------------
+    def _line(self, raw: str, out: List[Dict]):
+        self.lines += 1
+        line = _clean(raw)
+        if not line:
+            return
+        start = len(out)
+        try:
+            self._parse(line, out)
+        except (ValueError, OverflowError):
+            # A malformed number should never take the stream down with it
+            self.skipped += 1
+        self.records += len(out) - start
+
+    def _parse(self, line: str, out: List[Dict]):
+        day = _DAY.match(line)
+        if day or _WEEKDAY.match(line):
+            # "Monday" style headings count on from the previous day
+            number = int(day.group(1)) if day else (self._day or 0) + 1
+            if number != self._day:
+                self._end_day(out)
+                self._day = number
+                self._in_gear = False
+                out.append({"type": "day", "day": number})
+            return
+
+        if _GEAR.search(line) and len(line) < 60:
+            self._end_day(out)
+            self._in_gear = True
+            return
+        if self._in_gear:
+            out.append({"type": "gear", "item": line})
+            return
+
+        meal = _MEAL.match(line)
+        if meal:
+            self._start_meal(meal.group("meal"), meal.group("rest"), out)
+            return
+
+        calories = _number(_CALORIES.search(line))
+        if _TOTAL.search(line):
+            if calories is not None and self._day is not None:
+                self._day_stated = calories
+            return
+
+        # Follow-up lines ("Approx. Calories: 460 kcal", "Prep Time: 10 minutes")
+        if self._meal is not None:
+            prep = _number(_PREP.search(line)) if "prep" in line.lower() else None
+            if calories is not None and self._meal["calories"] is None:
+                self._meal["calories"] = calories
+                return
+            if prep is not None and self._meal["prep_min"] is None:
+                self._meal["prep_min"] = prep
+                return
+        self.skipped += 1
+
+    def _start_meal(self, name: str, rest: str, out: List[Dict]):
+        self._flush_meal(out)
+        parts = [p.strip() for p in rest.lstrip(" :-–").split("|")]
+        dish = _PARENS.sub("", parts[0]).strip(" :-–") or None
+        if dish and _CALORIES.fullmatch(dish):
+            dish = None
+        meal = {
+            "type": "meal", "day": self._day, "meal": " ".join(name.split()).title(),
+            "dish": dish,
+            "calories": _number(_CALORIES.search(rest)),
+            "prep_min": _number(_PREP.search(rest)),
+        }
+        if len(parts) > 1 and meal["calories"] is not None:
+            # Strict template line: complete as it stands
+            self._emit_meal(meal, out)
+        else:
+            self.recovered += 1
+            self._meal = meal
+
+    def _flush_meal(self, out: List[Dict]):
+        if self._meal is not None:
+            self._emit_meal(self._meal, out)
+            self._meal = None
+
+    def _emit_meal(self, meal: Dict, out: List[Dict]):
+        out.append(meal)
+        self._day_meals += 1
+        if meal["calories"] is not None:
+            self._day_calories += meal["calories"]
+            self._day_counted += 1
+
+    def _end_day(self, out: List[Dict]):
+        self._flush_meal(out)
+        if self._day is not None and self._day_meals:
+            out.append({"type": "day_total", "day": self._day,
+                        "calories": self._day_calories if self._day_counted else None,
+                        "meals": self._day_meals, "stated": self._day_stated})
+        self._day_calories = 0
+        self._day_counted = 0
+        self._day_meals = 0
+        self._day_stated = None
+
+
+def parse_meal_plan(text: str) -> List[Dict]:
+    """All records of a complete plan"""
+    parser = MealPlanParser()
+    return parser.feed(text) + parser.close()
@@ -0,0 +1,146 @@
+# ============================================================================
+# Model Registry - lazy, background-loaded models with warm-up
+# Heavy models are registered with a loader instead of being built at import
+# time. They load on first use or in a background thread at startup, run a
+# warm-up inference, and report their load time and memory for /ready.
+# get() hands a model out only once its warm-up has finished, so callers
+# never run it concurrently with the warm-up. A failed load is retried on
+# a later get() or load_all() after an exponential backoff.
+# A pre-fork server can load everything in the master without warming up
+# (see gunicorn.conf.py); each worker then only runs the warm-up.
+# ============================================================================
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+RETRY_BACKOFF = 5.0  # Seconds before a failed model is tried again, doubled after each failure
+RETRY_BACKOFF_MAX = 300.0  # Cap on that delay
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB (0.0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return 0.0
+
+
+class _Entry:
+    def __init__(self, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]]):
+        self.loader = loader
+        self.warmup = warmup
+        self.lock = threading.Lock()
+        self.value = None
+        self.loaded = False
+        self.state = "pending"
+        self.error = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.load_s = 0.0
+        self.warmup_s = 0.0
+        self.rss_mb = 0.0
+
+
+class ModelRegistry:
+    """Named models that load once, on demand or in the background"""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._started = time.perf_counter()
+        self.ready_after_s: Optional[float] = None
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 warmup: Optional[Callable[[Any], None]] = None):
+        self._entries[name] = _Entry(loader, warmup)
+
+    def get(self, name: str) -> Any:
+        """Return a warmed-up model, loading it now if nobody has yet (blocks meanwhile)"""
+        entry = self._entries[name]
+        if entry.state == "ready":
+            return entry.value
+        self._load(name, entry)
+        if entry.state != "ready":
+            raise RuntimeError(f"Model '{name}' failed to load: {entry.error}")
+        return entry.value
+
+    def _load(self, name: str, entry: _Entry, warmup: bool = True):
+        with entry.lock:
+            if entry.state == "ready":
+                return
+            if entry.state == "failed" and time.monotonic() < entry.retry_at:
+                return
+            try:
+                if not entry.loaded:
+                    entry.state = "loading"
+                    before = rss_mb()
+                    started = time.perf_counter()
+                    entry.value = entry.loader()
+                    entry.load_s = time.perf_counter() - started
+                    entry.rss_mb = rss_mb() - before
+                    entry.loaded = True
+                    entry.state = "loaded"
+            except Exception as e:
+                entry.failures += 1
+                delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** (entry.failures - 1))
+                entry.retry_at = time.monotonic() + delay
+                entry.state = "failed"
+                entry.error = str(e)
+                print(f"[Models] ✗ {name} failed to load: {e} (retry in {delay:.0f}s)")
+                return
+            if not warmup:
+                return
+            if entry.warmup is not None:
+                started = time.perf_counter()
+                try:
+                    entry.warmup(entry.value)
+                except Exception as e:
+                    # The model itself loaded; only the first request pays for the warm-up
+                    print(f"[Models] ⚠ {name} warm-up failed: {e}")
+                entry.warmup_s = time.perf_counter() - started
+            entry.state = "ready"
+            entry.error = None
+            print(f"[Models] ✓ {name} ready in {entry.load_s + entry.warmup_s:.2f}s "
+                  f"(+{entry.rss_mb:.0f} MB)")
+
+    def load_all(self, warmup: bool = True):
+        """
+        Load every registered model in turn (one at a time so RSS deltas stay
+        per-model). With warmup=False models are only loaded, e.g. in a
+        pre-fork master whose threads must not be used before forking.
+        """
+        for name, entry in self._entries.items():
+            self._load(name, entry, warmup)
+        if self.is_ready():
+            self.ready_after_s = time.perf_counter() - self._started
+
+    def load_in_background(self) -> threading.Thread:
+        thread = threading.Thread(
+            target=self.load_all, name="model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self) -> bool:
+        return all(e.state == "ready" for e in self._entries.values())
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.is_ready(),
+            "cold_start_s": round(self.ready_after_s, 2) if self.ready_after_s else None,
+            "models": {
+                name: {
+                    "state": e.state,
+                    "load_s": round(e.load_s, 3),
+                    "warmup_s": round(e.warmup_s, 3),
+                    "rss_mb": round(e.rss_mb, 1),
+                    "error": e.error,
+                    "failures": e.failures,
+                }
+                for name, e in self._entries.items()
+            },
+        }
+
+
+registry = ModelRegistry()
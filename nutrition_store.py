@@ -0,0 +1,259 @@
+# ============================================================================
+# Nutrition Store - columnar, memory-mapped nutrition tables
+# Each table is a directory with a small meta.json and one file per column:
+#   numeric columns  <col>.npy                     (int64 / float64)
+#   text columns     <col>.bytes + <col>.offsets.npy  (UTF-8 blob, row offsets)
+#   list columns     as text, items joined by LIST_SEPARATOR
+# Columns are opened with mmap on first use, so opening a table costs one
+# small JSON read and pages are only read when rows are actually touched;
+# startup time and RSS stay flat as the tables grow.
+#
+# Build step (source CSVs named <table>.csv, list cells separated by "|"):
+#   python nutrition_store.py build data/csv
+# ============================================================================
+
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config import NUTRITION_CSV_DIR, NUTRITION_LIST_COLUMNS, NUTRITION_STORE_DIR
+
+FORMAT_VERSION = 1
+LIST_SEPARATOR = "\x1f"  # between list items inside a stored text value
+CSV_LIST_SEPARATOR = "|"  # between list items inside a source CSV cell
+
+
+class StringColumn:
+    """Memory-mapped UTF-8 strings; values are decoded only when read"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, is_list: bool = False):
+        self.blob = blob
+        self.offsets = offsets
+        self.is_list = is_list
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _decode(self, i: int):
+        text = self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+        if self.is_list:
+            return text.split(LIST_SEPARATOR) if text else []
+        return text
+
+    def __getitem__(self, i: int):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._decode(i)
+
+    def take(self, indices: Iterable[int]) -> List:
+        return [self._decode(int(i)) for i in indices]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode(i)
+
+
+class ColumnarTable:
+    """One table on disk; columns are mapped lazily and kept mapped"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{directory}: unsupported format version {meta.get('version')}")
+        self.name = meta["name"]
+        self.rows = meta["rows"]
+        self.kinds: Dict[str, str] = meta["columns"]  # column -> int, float, str or list
+        self._columns: Dict[str, object] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.kinds)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str):
+        """numpy array (numeric) or StringColumn (text and lists), memory-mapped"""
+        column = self._columns.get(name)
+        if column is not None:
+            return column
+        kind = self.kinds[name]
+        base = os.path.join(self.directory, name)
+        if kind in ("int", "float"):
+            column = np.load(base + ".npy", mmap_mode="r")
+        else:
+            offsets = np.load(base + ".offsets.npy", mmap_mode="r")
+            # np.memmap cannot map an empty file
+            blob = (np.memmap(base + ".bytes", dtype=np.uint8, mode="r")
+                    if os.path.getsize(base + ".bytes") else np.zeros(0, dtype=np.uint8))
+            column = StringColumn(blob, offsets, is_list=kind == "list")
+        self._columns[name] = column
+        return column
+
+    def take(self, indices: Sequence[int], columns: Optional[List[str]] = None) -> Dict[str, list]:
+        """Plain Python values of the given rows, column by column"""
+        indices = np.asarray(indices, dtype=np.int64)
+        out = {}
+        for name in columns or self.columns:
+            column = self.column(name)
+            if isinstance(column, StringColumn):
+                out[name] = column.take(indices)
+            else:
+                out[name] = column[indices].tolist()
+        return out
+
+
+class NutritionStore:
+    """The built tables under one directory, each opened on first use"""
+
+    def __init__(self, directory: str = NUTRITION_STORE_DIR):
+        self.directory = directory
+        self._tables: Dict[str, ColumnarTable] = {}
+
+    def available(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        # Skips the .building / .old directories of a build in progress
+        return sorted(name for name in os.listdir(self.directory)
+                      if "." not in name and os.path.isfile(os.path.join(self.directory, name, "meta.json")))
+
+    def table(self, name: str) -> Optional[ColumnarTable]:
+        table = self._tables.get(name)
+        if table is None:
+            path = os.path.join(self.directory, name)
+            if not os.path.isfile(os.path.join(path, "meta.json")):
+                return None
+            table = self._tables[name] = ColumnarTable(path)
+        return table
+
+
+# =========================================================================
+#  BUILD STEP
+# =========================================================================
+def _kind(values: Iterable[str]) -> str:
+    """Narrowest column kind that fits every non-empty value"""
+    kind = "int"
+    for value in values:
+        if value == "":
+            if kind == "int":
+                kind = "float"  # missing numbers become NaN
+            continue
+        if kind == "int":
+            try:
+                int(value)
+                continue
+            except ValueError:
+                kind = "float"
+        try:
+            float(value)
+        except ValueError:
+            return "str"
+    return kind
+
+
+def _write_strings(path: str, values: Iterable[str]):
+    offsets = array("q", [0])
+    with open(path + ".bytes", "wb") as f:
+        for value in values:
+            data = value.encode("utf-8")
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    np.save(path + ".offsets.npy", np.frombuffer(offsets, dtype=np.int64))
+
+
+def build_table(csv_path: str, out_dir: str, list_columns: Sequence[str] = ()) -> ColumnarTable:
+    """Convert one CSV into a columnar table directory (replaced atomically)"""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    target = os.path.join(out_dir, name)
+    building = target + ".building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    # Pass 1: row count and column kinds, checked in blocks to keep memory flat
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        kinds = ["int"] * len(header)
+        block = []
+        rows = 0
+        for row in reader:
+            rows += 1
+            block.append(row)
+            if len(block) == 65536:
+                kinds = _merge_kinds(kinds, block)
+                block = []
+        kinds = _merge_kinds(kinds, block)
+    kinds = ["list" if column in list_columns else kind for column, kind in zip(header, kinds)]
+
+    # Pass 2, one column at a time: values go straight to disk
+    for i, (column, kind) in enumerate(zip(header, kinds)):
+        path = os.path.join(building, column)
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            next(reader)
+            values = (row[i] if i < len(row) else "" for row in reader)
+            if kind == "int":
+                np.save(path + ".npy", np.fromiter((int(v) for v in values), dtype=np.int64, count=rows))
+            elif kind == "float":
+                np.save(path + ".npy", np.fromiter((float(v) if v else np.nan for v in values),
+                                                   dtype=np.float64, count=rows))
+            elif kind == "list":
+                _write_strings(path, (LIST_SEPARATOR.join(item.strip() for item in v.split(CSV_LIST_SEPARATOR)
+                                                          if item.strip()) for v in values))
+            else:
+                _write_strings(path, values)
+
+    with open(os.path.join(building, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": FORMAT_VERSION, "name": name, "rows": rows,
+                   "columns": dict(zip(header, kinds)), "built": time.time()}, f, indent=2)
+
+    # Swap in the new table; readers that still map the old files keep their copy
+    old = target + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(target):
+        os.replace(target, old)
+    os.replace(building, target)
+    shutil.rmtree(old, ignore_errors=True)
+    return ColumnarTable(target)
+
+
+def _merge_kinds(kinds: List[str], block: List[List[str]]) -> List[str]:
+    """Column kinds after seeing another block of rows (int < float < str)"""
+    order = ["int", "float", "str"]
+    return [order[max(order.index(kind), order.index(_kind(row[i] if i < len(row) else "" for row in block)))]
+            for i, kind in enumerate(kinds)]
+
+
+def build_all(csv_dir: str = NUTRITION_CSV_DIR, out_dir: str = NUTRITION_STORE_DIR) -> List[str]:
+    """Build every <table>.csv in csv_dir, returns the table names"""
+    os.makedirs(out_dir, exist_ok=True)
+    built = []
+    for filename in sorted(os.listdir(csv_dir)):
+        if not filename.endswith(".csv"):
+            continue
+        name = filename[:-4]
+        started = time.perf_counter()
+        table = build_table(os.path.join(csv_dir, filename), out_dir,
+                            NUTRITION_LIST_COLUMNS.get(name, ()))
+        print(f"[Data] ✓ Built {name}: {table.rows} rows, {len(table.columns)} columns "
+              f"in {time.perf_counter() - started:.2f}s")
+        built.append(name)
+    return built
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["build"]:
+        print("Usage: python nutrition_store.py build [csv_dir] [out_dir]")
+        sys.exit(1)
+    build_all(*sys.argv[2:4])
@@ -0,0 +1,287 @@
+# ============================================================================
+# Plan Cache - generated meal plans keyed by the normalized profile
+# Many users submit practically the same profile, so a plan is cached under
+# a hash of the normalized answers (plus the model and plan length). An
+# in-memory LRU sits in front of JSON files on disk; entries expire after
+# PLAN_CACHE_TTL and the disk copy is capped at PLAN_CACHE_DISK_SIZE files,
+# least recently used first (checked every PLAN_CACHE_PRUNE_EVERY writes).
+# Disk reads and writes run in the thread pool, off the event loop.
+#
+# Identical profiles that arrive while a plan is still being generated do
+# not start a second Gemini call: they follow the one in flight and get the
+# same chunks as it streams.
+# ============================================================================
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from config import (GEMINI_MODEL, PLAN_DAYS, PLAN_CACHE_SIZE, PLAN_CACHE_DISK_SIZE,
+                    PLAN_CACHE_TTL, PLAN_CACHE_PRUNE_EVERY)
+
+CACHE_DIR = os.path.join("cache", "plans")
+
+NONE_WORDS = {"none", "no", "nothing", "na", "n/a", "nil", "no condition", ""}
+
+
+def _clean(value: str) -> str:
+    return " ".join(str(value).lower().split())
+
+
+def normalize_profile(profile: Dict) -> Dict:
+    """Canonical form of a validated profile (case, spacing, 'none' answers, allergy order)"""
+    allergies = profile.get("allergies", [])
+    if isinstance(allergies, str):
+        allergies = allergies.split(",")
+    condition = _clean(profile.get("condition", ""))
+    return {
+        "goal": _clean(profile.get("goal", "")),
+        "sport": _clean(profile.get("sport", "")),
+        "level": _clean(profile.get("level", "")),
+        "diet": _clean(profile.get("diet", "")),
+        "condition": "none" if condition in NONE_WORDS else condition,
+        "allergies": sorted({_clean(a) for a in allergies} - NONE_WORDS),
+    }
+
+
+def profile_key(profile: Dict) -> str:
+    """Cache key of a profile; changes with the model and plan length too"""
+    keyed = {**normalize_profile(profile), "model": GEMINI_MODEL, "days": PLAN_DAYS}
+    return hashlib.sha256(json.dumps(keyed, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+class _Flight:
+    """A plan being generated; any number of requests can follow its chunks"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def push(self, text: str):
+        self.parts.append(text)
+        self._wake()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._wake()
+
+    async def follow(self) -> AsyncIterator[str]:
+        """Every chunk so far, then new ones as they arrive"""
+        sent = 0
+        while True:
+            while sent < len(self.parts):
+                yield self.parts[sent]
+                sent += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class PlanCache:
+    """Two-level (memory LRU + disk) plan cache with TTL and single-flight generation"""
+
+    def __init__(self, capacity: int = PLAN_CACHE_SIZE, disk_capacity: int = PLAN_CACHE_DISK_SIZE,
+                 ttl: float = PLAN_CACHE_TTL, directory: str = CACHE_DIR):
+        self.capacity = capacity
+        self.disk_capacity = disk_capacity
+        self.ttl = ttl
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self._writes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key: str, entry: Dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def _fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["created"] < self.ttl
+
+    def _get_memory(self, key: str, count: bool = True) -> Optional[str]:
+        """Plan from the in-memory LRU, or None (count=False leaves the hit counter alone)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._fresh(entry):
+                    self._entries.move_to_end(key)
+                    if count:
+                        self.memory_hits += 1
+                    return entry["plan"]
+                del self._entries[key]
+        return None
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        """Plan from its JSON file (blocking), or None if missing or expired"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if not self._fresh(entry):
+            with self._lock:
+                self.expired += 1
+                self.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path)  # disk eviction is least recently used first
+        except OSError:
+            pass  # pruned by another worker meanwhile; the plan was read already
+        with self._lock:
+            self._remember(key, entry)
+            self.disk_hits += 1
+        return entry["plan"]
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached plan text, or None if missing or expired (blocking)"""
+        plan = self._get_memory(key)
+        return plan if plan is not None else self._get_disk(key)
+
+    def _entry(self, key: str, plan: str, profile: Optional[Dict]) -> Dict:
+        entry = {"created": time.time(), "plan": plan,
+                 "profile": normalize_profile(profile) if profile else None}
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def _write(self, key: str, entry: Dict):
+        """Persist an entry (blocking), pruning the directory every few writes"""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[PlanCache] ⚠ Could not persist plan {key}: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            prune = PLAN_CACHE_PRUNE_EVERY <= 1 or self._writes % PLAN_CACHE_PRUNE_EVERY == 0
+        if prune:
+            self._prune_disk()
+
+    def put(self, key: str, plan: str, profile: Optional[Dict] = None):
+        """Cache a plan in memory and on disk (blocking)"""
+        self._write(key, self._entry(key, plan, profile))
+
+    def _prune_disk(self):
+        try:
+            files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        except OSError:
+            return
+        if len(files) <= self.disk_capacity:
+            return
+        dated = []
+        for entry in files:
+            try:
+                dated.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass  # already removed by another worker
+        dated.sort()
+        for _, path in dated[:len(dated) - self.disk_capacity]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def stream(self, key: str, produce: Callable[[], AsyncIterator[str]],
+                     profile: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        The plan for key: the cached text on a hit, otherwise the chunks of
+        produce(). A request for a key already being generated follows that
+        generation instead of calling produce() again. Generation runs in its
+        own task, so it finishes (and is cached) even if the client leaves.
+        """
+        plan = self._get_memory(key)
+        if plan is None and key not in self._inflight:
+            plan = await asyncio.get_running_loop().run_in_executor(None, self._get_disk, key)
+            if plan is None and key not in self._inflight:
+                # A generation may have finished into memory during the disk read
+                plan = self._get_memory(key, count=False)
+        if plan is not None:
+            yield plan
+            return
+
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            flight = _Flight()
+            self._inflight[key] = flight
+            self.upstream_calls += 1
+            flight.task = asyncio.create_task(self._generate(key, flight, produce, profile))
+
+        async for text in flight.follow():
+            yield text
+
+    async def _generate(self, key: str, flight: _Flight,
+                        produce: Callable[[], AsyncIterator[str]], profile: Optional[Dict]):
+        try:
+            async for text in produce():
+                flight.push(text)
+        except Exception as e:
+            flight.finish(e)
+            return
+        finally:
+            self._inflight.pop(key, None)
+        # In memory before followers are released; the disk copy follows
+        entry = self._entry(key, "".join(flight.parts), profile)
+        flight.finish()
+        await asyncio.get_running_loop().run_in_executor(None, self._write, key, entry)
+
+    def stats(self) -> Dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "entries_in_memory": len(self._entries),
+            "in_flight": len(self._inflight),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "upstream_calls_avoided": hits + self.coalesced,
+        }
+
+
+plan_cache = PlanCache()
@@ -0,0 +1,319 @@
+# ============================================================================
+# Plan Store - generated meal plans in one indexed SQLite database
+# Replaces the loose meal_plans/meal_plan_<timestamp>_<id>.txt files. Plan
+# text is stored once per distinct body (zlib-compressed, keyed by its
+# SHA-256), and each saved plan is a small row indexed by user, profile hash
+# and creation time. The download header is rendered from the stored
+# profile, so identical plans (e.g. cache hits) share one body.
+#
+# Plans older than PLAN_RETENTION_DAYS, or beyond the newest PLAN_STORE_MAX,
+# are pruned along with bodies nothing refers to any more.
+#
+# Existing text files are imported on startup (once, by whichever process
+# gets the maintenance lock first), or run:
+#   python plan_store.py import [--remove]
+#   python plan_store.py prune
+#   python plan_store.py list [user]
+# ============================================================================
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from config import PLAN_RETENTION_DAYS, PLAN_STORE_MAX, PLAN_PRUNE_EVERY
+from plan_cache import profile_key
+from shared_files import LocalConnection, file_lock
+
+STATE_DIR = "state"
+PLANS_DB = os.path.join(STATE_DIR, "plans.db")
+LEGACY_PATTERNS = [os.path.join("meal_plans", "*.txt"), "meal_plan_*.txt"]
+CHUNK_SIZE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    digest TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS plans (
+    filename TEXT PRIMARY KEY,
+    user TEXT NOT NULL DEFAULT '',
+    profile_hash TEXT NOT NULL DEFAULT '',
+    profile TEXT,
+    digest TEXT NOT NULL REFERENCES bodies(digest),
+    created REAL NOT NULL,
+    legacy INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS plans_user ON plans (user, created);
+CREATE INDEX IF NOT EXISTS plans_profile ON plans (profile_hash, created);
+CREATE INDEX IF NOT EXISTS plans_created ON plans (created);
+CREATE INDEX IF NOT EXISTS plans_digest ON plans (digest);
+"""
+
+# "Goal: Weight Lose" style lines in the header of the old text files
+_PROFILE_LINE = re.compile(r"^\s*(goal|activity|sport|level|diet|condition|allergies)\s*:\s*(.+)$",
+                           re.IGNORECASE | re.MULTILINE)
+_FILE_TIME = re.compile(r"meal_plan_(\d{8}_\d{6})")
+
+
+def render_header(profile: Dict, created: float) -> str:
+    """The text header a downloaded plan starts with"""
+    return "\n".join([
+        "=" * 80,
+        "NUTRIHELP - PERSONALIZED MEAL PLAN",
+        "=" * 80,
+        f"Generated: {datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        "USER PROFILE:",
+        "-" * 80,
+        *(f"{key.capitalize():<20}: {value if isinstance(value, str) else ', '.join(value)}"
+          for key, value in profile.items()),
+        "=" * 80,
+        "",
+    ])
+
+
+def _legacy_profile(text: str) -> Optional[Dict]:
+    """Profile from the header of an old text file, if it has one"""
+    found = {}
+    for key, value in _PROFILE_LINE.findall(text[:2000]):
+        key = "sport" if key.lower() == "activity" else key.lower()
+        found.setdefault(key, value.strip())
+    if not {"goal", "sport", "diet"} <= set(found):
+        return None
+    found["allergies"] = [a.strip() for a in found.get("allergies", "None").split(",")]
+    return found
+
+
+class PlanStore:
+    """Saved meal plans, one SQLite connection per thread"""
+
+    def __init__(self, path: str = PLANS_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = LocalConnection(path, "PRAGMA foreign_keys=ON")
+        self._conn().executescript(SCHEMA)
+        self._saves = 0
+        self.maintained = False
+
+    def _insert(self, conn: sqlite3.Connection, filename: str, user: str, profile: Optional[Dict],
+                text: str, created: float, legacy: bool) -> str:
+        """
+        Row for a plan, reusing the body. A new plan identical to one the same
+        user already has for the same profile returns that one's filename.
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        profile_hash = profile_key(profile) if profile else ""
+        if not legacy:
+            existing = conn.execute(
+                "SELECT filename FROM plans WHERE digest = ? AND user = ? AND profile_hash = ? "
+                "AND legacy = 0", (digest, user, profile_hash)).fetchone()
+            if existing:
+                return existing[0]
+        conn.execute("INSERT OR IGNORE INTO bodies (digest, body, size) VALUES (?, ?, ?)",
+                     (digest, zlib.compress(data, 6), len(data)))
+        conn.execute(
+            "INSERT INTO plans (filename, user, profile_hash, profile, digest, created, legacy) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (filename, user, profile_hash, json.dumps(profile) if profile else None,
+             digest, created, int(legacy)))
+        return filename
+
+    def save(self, profile: Dict, text: str, user: str = "") -> str:
+        """Store a generated plan, returns its download filename"""
+        created = time.time()
+        stamp = datetime.fromtimestamp(created).strftime("%Y%m%d_%H%M%S")
+        filename = f"meal_plan_{stamp}_{uuid.uuid4().hex[:8]}.txt"
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            filename = self._insert(conn, filename, user, profile, text, created, legacy=False)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._saves += 1
+        if PLAN_PRUNE_EVERY and self._saves % PLAN_PRUNE_EVERY == 0:
+            self.prune()
+        return filename
+
+    def get(self, filename: str) -> Optional[Dict]:
+        """Metadata of a saved plan (length: bytes of the download, header included), or None"""
+        row = self._conn().execute(
+            "SELECT p.filename, p.user, p.profile_hash, p.profile, p.created, p.legacy, b.size, p.digest "
+            "FROM plans p JOIN bodies b ON b.digest = p.digest WHERE p.filename = ?",
+            (filename,)).fetchone()
+        if row is None:
+            return None
+        profile = json.loads(row[3]) if row[3] else None
+        header = 0 if row[5] or not profile else len(render_header(profile, row[4]).encode("utf-8"))
+        return {"filename": row[0], "user": row[1], "profile_hash": row[2], "profile": profile,
+                "created": row[4], "legacy": bool(row[5]), "size": row[6], "digest": row[7],
+                "length": header + row[6]}
+
+    def read(self, filename: str) -> Optional[Iterator[bytes]]:
+        """The plan file (header and text) as decompressed chunks, or None if unknown"""
+        row = self._conn().execute(
+            "SELECT p.profile, p.created, p.legacy, b.body "
+            "FROM plans p JOIN bodies b ON b.digest = p.digest WHERE p.filename = ?",
+            (filename,)).fetchone()
+        if row is None:
+            return None
+        profile, created, legacy, body = row
+
+        def chunks():
+            if not legacy and profile:
+                yield render_header(json.loads(profile), created).encode("utf-8")
+            inflate = zlib.decompressobj()
+            for start in range(0, len(body), CHUNK_SIZE):
+                data = inflate.decompress(body[start:start + CHUNK_SIZE])
+                if data:
+                    yield data
+            tail = inflate.flush()
+            if tail:
+                yield tail
+        return chunks()
+
+    def list(self, user: Optional[str] = None, profile_hash: Optional[str] = None,
+             before: Optional[float] = None, limit: int = 20) -> Dict:
+        """
+        Newest plans first, optionally for one user or profile hash.
+        Pass the returned "next" as before= for the following page.
+        """
+        where, args = [], []
+        if user is not None:
+            where.append("user = ?")
+            args.append(user)
+        if profile_hash:
+            where.append("profile_hash = ?")
+            args.append(profile_hash)
+        if before is not None:
+            where.append("created < ?")
+            args.append(before)
+        limit = max(1, min(int(limit), 100))
+        rows = self._conn().execute(
+            "SELECT filename, user, profile_hash, created FROM plans"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY created DESC LIMIT ?", (*args, limit + 1)).fetchall()
+        plans = [{"filename": r[0], "user": r[1], "profile_hash": r[2], "created": r[3]}
+                 for r in rows[:limit]]
+        return {"plans": plans, "next": plans[-1]["created"] if len(rows) > limit else None}
+
+    def prune(self, retention_days: float = PLAN_RETENTION_DAYS, max_plans: int = PLAN_STORE_MAX) -> int:
+        """Drop expired plans and the oldest beyond max_plans, then unreferenced bodies"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = 0
+            if retention_days:
+                removed += conn.execute("DELETE FROM plans WHERE created < ?",
+                                        (time.time() - retention_days * 86400,)).rowcount
+            if max_plans:
+                removed += conn.execute(
+                    "DELETE FROM plans WHERE filename IN (SELECT filename FROM plans "
+                    "ORDER BY created DESC LIMIT -1 OFFSET ?)", (max_plans,)).rowcount
+            if removed:
+                conn.execute("DELETE FROM bodies WHERE digest NOT IN (SELECT digest FROM plans)")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if removed:
+            print(f"[Plans] Pruned {removed} plans")
+        return removed
+
+    def import_files(self, patterns: List[str] = LEGACY_PATTERNS, remove: bool = False) -> int:
+        """Copy old meal_plan_*.txt files in (once each), returns the number imported"""
+        conn = self._conn()
+        imported = 0
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                filename = os.path.basename(path)
+                if conn.execute("SELECT 1 FROM plans WHERE filename = ?", (filename,)).fetchone():
+                    if remove:
+                        os.remove(path)
+                    continue
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+                stamp = _FILE_TIME.search(filename)
+                created = (datetime.strptime(stamp.group(1), "%Y%m%d_%H%M%S").timestamp()
+                           if stamp else os.path.getmtime(path))
+                # Checked again inside the write transaction, so two processes
+                # importing at once cannot both insert the same file
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if conn.execute("SELECT 1 FROM plans WHERE filename = ?", (filename,)).fetchone() is None:
+                        self._insert(conn, filename, "", _legacy_profile(text), text, created, legacy=True)
+                        imported += 1
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                if remove:
+                    os.remove(path)
+        if imported:
+            print(f"[Plans] ✓ Imported {imported} plan files into {self.path}")
+        return imported
+
+    def maintain(self) -> bool:
+        """
+        Import old plan files and prune, unless this process already did or
+        another one is doing it right now. Returns True if it ran here.
+        """
+        if self.maintained:
+            return False
+        # Without fcntl there is no lock, but maintenance is idempotent anyway
+        with file_lock(self.path + ".maintenance.lock", blocking=False) as locked:
+            if not locked:
+                return False
+            self.import_files()
+            self.prune()
+            self.maintained = True
+            return True
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        plans, users = conn.execute("SELECT COUNT(*), COUNT(DISTINCT user) FROM plans").fetchone()
+        bodies, raw, stored = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM bodies").fetchone()
+        return {
+            "plans": plans,
+            "users": users,
+            "distinct_bodies": bodies,
+            "text_bytes": raw,
+            "stored_bytes": stored,
+            "compression_ratio": round(raw / stored, 2) if stored else 0.0,
+            "retention_days": PLAN_RETENTION_DAYS,
+            "max_plans": PLAN_STORE_MAX,
+        }
+
+
+plan_store = PlanStore()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1:2]
+    if command == ["import"]:
+        plan_store.import_files(remove="--remove" in sys.argv[2:])
+    elif command == ["prune"]:
+        plan_store.prune()
+    elif command == ["list"]:
+        user = sys.argv[2] if len(sys.argv) > 2 else None
+        for plan in plan_store.list(user=user, limit=100)["plans"]:
+            print(f"{datetime.fromtimestamp(plan['created']):%Y-%m-%d %H:%M}  "
+                  f"{plan['user'] or '-':<20} {plan['filename']}")
+    else:
+        print("Usage: python plan_store.py import [--remove] | prune | list [user]")
+        sys.exit(1)
+    print(json.dumps(plan_store.stats(), indent=2))
@@ -0,0 +1,85 @@
+# ============================================================================
+# Preview Encoder - paced, downscaled JPEG frames for the /video stream
+# The preview is only for the user to see themselves, so it runs at its own
+# rate, resolution and JPEG quality, independent of the frames used for
+# blink analysis. libjpeg-turbo (PyTurboJPEG) is used when installed,
+# otherwise cv2.imencode.
+# ============================================================================
+
+import time
+from typing import Dict
+
+import cv2
+import numpy as np
+
+from config import PREVIEW_FPS, PREVIEW_WIDTH, PREVIEW_JPEG_QUALITY
+
+try:
+    from turbojpeg import TurboJPEG
+    _turbo = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbo = None
+
+
+class PreviewEncoder:
+    """Encodes preview frames for one stream and keeps its rate and size stats"""
+
+    def __init__(self, fps: float = PREVIEW_FPS, width: int = PREVIEW_WIDTH,
+                 quality: int = PREVIEW_JPEG_QUALITY):
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.width = width
+        self.quality = quality
+        self.encoder = "turbojpeg" if _turbo is not None else "opencv"
+
+        self._next_due = 0.0
+        self.started = time.perf_counter()
+        self.frames = 0
+        self.bytes = 0
+        self.encode_time = 0.0
+        self.skipped_rate = 0
+        self.skipped_backlog = 0
+
+    def due(self) -> bool:
+        """Whether the next frame is due under the target FPS (counts a skip if not)"""
+        now = time.perf_counter()
+        if now < self._next_due:
+            self.skipped_rate += 1
+            return False
+        self._next_due = max(self._next_due + self.interval, now)
+        return True
+
+    def skip_backlog(self):
+        """Record a frame skipped because the client has not taken the last one"""
+        self.skipped_backlog += 1
+
+    def resize(self, frame: np.ndarray) -> np.ndarray:
+        """The frame at preview size (always a copy, safe to draw on)"""
+        h, w = frame.shape[:2]
+        if not self.width or w <= self.width:
+            return frame.copy()
+        return cv2.resize(frame, (self.width, int(h * self.width / w)),
+                          interpolation=cv2.INTER_AREA)
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        started = time.perf_counter()
+        if _turbo is not None:
+            jpeg = _turbo.encode(frame, quality=self.quality)
+        else:
+            _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            jpeg = buffer.tobytes()
+        self.encode_time += time.perf_counter() - started
+        self.frames += 1
+        self.bytes += len(jpeg)
+        return jpeg
+
+    def stats(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "encoder": self.encoder,
+            "frames": self.frames,
+            "fps": round(self.frames / elapsed, 1) if elapsed > 0 else 0.0,
+            "bytes_per_s": int(self.bytes / elapsed) if elapsed > 0 else 0,
+            "avg_encode_ms": round(1000 * self.encode_time / self.frames, 2) if self.frames else 0.0,
+            "skipped_rate": self.skipped_rate,
+            "skipped_backlog": self.skipped_backlog,
+        }
@@ -0,0 +1,62 @@
+# ============================================================================
+# Shared Files - helpers for files every server worker writes to
+# LocalConnection gives each thread (and each forked process) its own SQLite
+# connection in WAL mode; file_lock serializes writers across processes
+# with flock. Used by shared_state, plan_store, answer_index and
+# embedding_store.
+# ============================================================================
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: callers still serialize their own threads
+    fcntl = None
+
+
+class LocalConnection:
+    """Callable returning this thread's connection to one SQLite database"""
+
+    def __init__(self, path: str, *pragmas: str):
+        self.path = path
+        self.pragmas = pragmas
+        self._local = threading.local()
+
+    def __call__(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so they are keyed by pid as well
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True) -> Iterator[bool]:
+    """
+    Exclusive lock on path between processes, created if missing. Yields
+    True once held; with blocking=False yields False instead of waiting
+    while another process holds it. Without fcntl it always yields True.
+    """
+    with open(path, "a") as f:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,76 @@
+# ============================================================================
+# Shared State - small key/value store visible to every server worker
+# Backed by SQLite in WAL mode, so pre-forked workers (see gunicorn.conf.py)
+# see the same auth state instead of diverging in-process globals.
+# ============================================================================
+
+import json
+import os
+import time
+from typing import Any, Callable, Tuple
+
+from shared_files import LocalConnection
+
+STATE_DIR = "state"
+STATE_DB = os.path.join(STATE_DIR, "shared.db")
+
+
+class SharedState:
+    """JSON values by key, one SQLite connection per thread"""
+
+    def __init__(self, path: str = STATE_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = LocalConnection(path)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, updated REAL)")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any):
+        self._conn().execute(
+            "INSERT INTO kv (key, value, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+            (key, json.dumps(value), time.time()))
+
+    def update(self, key: str, **fields) -> dict:
+        """Merge fields into a dict value atomically and return the result"""
+        return self.update_if(key, lambda value: True, **fields)[0]
+
+    def update_if(self, key: str, condition: Callable[[dict], bool], **fields) -> Tuple[dict, bool]:
+        """
+        Merge fields into a dict value only if condition(current value) holds,
+        checked and written in one transaction. Returns (value, updated).
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            value = json.loads(row[0]) if row else {}
+            updated = condition(value)
+            if updated:
+                value.update(fields)
+                self.set(key, value)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return value, updated
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def delete_stale(self, prefix: str, older_than: float) -> int:
+        """Delete keys starting with prefix not written for older_than seconds"""
+        # A key range instead of LIKE, so the primary key index is used
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return self._conn().execute(
+            "DELETE FROM kv WHERE key >= ? AND key < ? AND updated < ?",
+            (prefix, end, time.time() - older_than)).rowcount
+
+
+shared_state = SharedState()
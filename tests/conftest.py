@@ -0,0 +1,57 @@
+# ============================================================================
+# Shared test fixtures: indexes, stores and providers built per test, with
+# any files they write under pytest's temporary directory
+# ============================================================================
+
+import pytest
+
+CONDITION_NAMES = ["Diabetes", "Hypertension", "Celiac Disease", "Anemia", "High Cholesterol",
+                   "Hyperthyroidism", "Hypothyroidism", "Alzheimer's Disease", "Parkinson's Disease"]
+
+
+@pytest.fixture
+def answers_path(tmp_path):
+    return str(tmp_path / "answers.jsonl")
+
+
+@pytest.fixture
+def answer_index(answers_path):
+    from answer_index import AnswerIndex
+    return AnswerIndex(path=answers_path)
+
+
+@pytest.fixture(scope="module")
+def condition_index():
+    from condition_index import ConditionIndex
+    n = len(CONDITION_NAMES)
+    return ConditionIndex(CONDITION_NAMES, [["Vegetables"]] * n, [["Sugar"]] * n, ["medium"] * n)
+
+
+@pytest.fixture
+def provider():
+    from llm_governor import Provider
+    return Provider("test", concurrency=2, max_queue=2, timeout=5.0, retries=2)
+
+
+@pytest.fixture
+def plan_cache(tmp_path):
+    from plan_cache import PlanCache
+    return PlanCache(capacity=4, disk_capacity=8, ttl=60, directory=str(tmp_path / "plans"))
+
+
+@pytest.fixture
+def embedding_store(tmp_path):
+    from embedding_store import EmbeddingStore
+    return EmbeddingStore(str(tmp_path / "users.emb"), dim=4, dtype="float32")
+
+
+@pytest.fixture
+def face_index():
+    from face_index import FaceIndex
+    return FaceIndex(dim=4, capacity=2)
+
+
+@pytest.fixture
+def plan_store(tmp_path):
+    from plan_store import PlanStore
+    return PlanStore(str(tmp_path / "plans.db"))
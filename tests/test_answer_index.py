@@ -0,0 +1,51 @@
+import json
+import time
+
+from answer_index import AnswerIndex
+
+
+def test_near_duplicate_is_served(answer_index):
+    assert answer_index.lookup("what should i eat before a workout") is not None
+    assert answer_index.lookup("How much protien is in an egg?", threshold=0.6) is not None
+    assert answer_index.lookup("How much protein does an egg have?") is not None
+
+
+def test_negation_must_match(answer_index):
+    assert answer_index.lookup("What should I not eat before a workout?") is None
+    assert answer_index.lookup("What shouldn't I eat before a workout?") is None
+    assert answer_index.lookup("What should I avoid eating before a workout?") is None
+
+
+def test_numbers_must_match(answer_index):
+    assert answer_index.lookup("How many calories are in 2 bananas?") is None
+    assert answer_index.lookup("How many calories are in two bananas?") is None
+
+
+def test_extra_topic_word_is_not_served(answer_index):
+    assert answer_index.lookup("Is white rice good for weight loss?") is None
+    assert answer_index.lookup("Is white rice good for weight loss?", threshold=0.6) is None
+
+
+def test_expired_answers_are_not_served(answers_path):
+    index = AnswerIndex(path=answers_path, ttl_days=1)
+    with open(index.path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"question": "Is kombucha healthy?", "answer": "old",
+                            "created": time.time() - 2 * 86400}) + "\n")
+    assert index.lookup("Is kombucha healthy?") is None
+    index.add("Is kombucha healthy?", "new")
+    assert index.lookup("Is kombucha healthy?")[0] == "new"
+
+
+def test_file_and_index_stay_bounded(answers_path):
+    index = AnswerIndex(path=answers_path, max_entries=20)
+    for i in range(60):
+        index.add(f"Is food number {i} healthy?", f"answer {i}")
+    with open(index.path, encoding="utf-8") as f:
+        assert len(f.readlines()) <= 25
+    assert index.compactions > 0
+    assert index.lookup("Is food number 59 healthy?")[0] == "answer 59"
+    assert index.lookup("Is food number 0 healthy?") is None
+
+    # Another worker sees the compacted file and rebuilds its index from it
+    other = AnswerIndex(path=index.path, max_entries=20)
+    assert len(other) == len(index)
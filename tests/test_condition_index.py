@@ -0,0 +1,29 @@
+def name_of(index, query):
+    found = index.find(query)
+    return found[0] if found else None
+
+
+def test_exact_alias_and_typo(condition_index):
+    assert name_of(condition_index, "DIABETES") == "Diabetes"
+    assert name_of(condition_index, "high BP") == "Hypertension"
+    assert name_of(condition_index, "hypertention") == "Hypertension"
+    assert name_of(condition_index, "celiac diseas") == "Celiac Disease"
+
+
+def test_opposites_are_not_matched(condition_index):
+    assert name_of(condition_index, "hypotension") is None
+    assert name_of(condition_index, "low blood pressure") is None
+    assert name_of(condition_index, "low blood sugar") is None
+    assert name_of(condition_index, "hypoglycemia") is None
+
+
+def test_thyroid_misspellings_keep_hypo_and_hyper(condition_index):
+    assert name_of(condition_index, "hypothyroidsm") == "Hypothyroidism"
+    assert name_of(condition_index, "hyperthyroidsm") == "Hyperthyroidism"
+    assert name_of(condition_index, "hypothyriodism") != "Hyperthyroidism"
+    assert name_of(condition_index, "hyperthyriodism") != "Hypothyroidism"
+
+
+def test_broad_terms_do_not_pick_a_diagnosis(condition_index):
+    for query in ("thyroid", "dementia", "sugar", "blood pressure"):
+        assert name_of(condition_index, query) is None
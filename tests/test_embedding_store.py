@@ -0,0 +1,45 @@
+import json
+import os
+
+import numpy as np
+
+from embedding_store import HEADER_SIZE, EmbeddingStore, migrate_users_json
+
+
+def test_appended_records_read_back(embedding_store):
+    embedding_store.append("amy", [1, 2, 3, 4])
+    embedding_store.append_many([("bo", [5, 6, 7, 8]), ("cé", [0, 0, 0, 1])])
+    names, encodings = embedding_store.read()
+    assert names == ["amy", "bo", "cé"]
+    assert np.array_equal(encodings[1], [5, 6, 7, 8])
+    assert embedding_store.read(2)[0] == ["cé"]
+
+
+def test_torn_record_is_ignored_and_cut_off(embedding_store):
+    embedding_store.append("amy", [1, 2, 3, 4])
+    with open(embedding_store.path, "ab") as f:
+        f.write(b"half a record")  # a crash in the middle of an append
+    assert len(embedding_store) == 1
+    assert embedding_store.read()[0] == ["amy"]
+
+    embedding_store.append("bo", [5, 6, 7, 8])
+    names, encodings = embedding_store.read()
+    assert names == ["amy", "bo"]
+    assert np.array_equal(encodings[1], [5, 6, 7, 8])
+    assert os.path.getsize(embedding_store.path) == HEADER_SIZE + 2 * embedding_store.record.itemsize
+
+
+def test_users_json_is_migrated_once(tmp_path):
+    json_path = str(tmp_path / "users.json")
+    store_path = str(tmp_path / "users.emb")
+    users = {"amy": {"encoding": list(np.linspace(0, 1, 128))},
+             "bo": {"encoding": [0.5] * 128}}
+    with open(json_path, "w") as f:
+        json.dump(users, f)
+
+    assert migrate_users_json(json_path, store_path) == 2
+    names, encodings = EmbeddingStore(store_path).read()
+    assert names == ["amy", "bo"]
+    assert np.allclose(encodings[0], users["amy"]["encoding"], atol=1e-3)
+    assert not os.path.exists(store_path + ".migrating")
+    assert migrate_users_json(json_path, store_path) == 0
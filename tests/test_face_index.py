@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def test_match_finds_the_closest_user_within_threshold(face_index):
+    face_index.add("amy", [0, 0, 0, 0])
+    face_index.add("bo", [1, 1, 1, 1])
+    face_index.add("cy", [3, 0, 0, 0])  # grows past the initial capacity
+    assert len(face_index) == 3
+    assert face_index.match([0.9, 1, 1, 1.1], threshold=0.6)[0] == "bo"
+    name, distance = face_index.match([0, 0, 0, 0.1], threshold=0.6)
+    assert name == "amy"
+    assert abs(distance - 0.1) < 1e-5
+
+
+def test_no_match_outside_threshold(face_index):
+    assert face_index.match([0, 0, 0, 0], threshold=0.6) == (None, float("inf"))
+    face_index.add("amy", [0, 0, 0, 0])
+    name, distance = face_index.match([2, 0, 0, 0], threshold=0.6)
+    assert name is None
+    assert abs(distance - 2.0) < 1e-5
+
+
+def test_re_adding_a_user_replaces_their_encoding(face_index):
+    face_index.add("amy", [0, 0, 0, 0])
+    face_index.add("amy", [5, 5, 5, 5])
+    assert len(face_index) == 1
+    assert face_index.match([0, 0, 0, 0], threshold=0.6)[0] is None
+    assert face_index.match([5, 5, 5, 5], threshold=0.6)[0] == "amy"
+
+
+def test_search_orders_by_distance(face_index):
+    names = ["a", "b", "c", "d", "e"]
+    face_index.add_batch(names, np.arange(20, dtype=np.float32).reshape(5, 4))
+    hits = face_index.search([8, 9, 10, 11], k=3)
+    assert hits[0] == ("c", 0.0)
+    assert {name for name, _ in hits[1:]} == {"b", "d"}  # equally far
+    assert hits[1][1] == hits[2][1] == 8.0
+    assert "e" in face_index
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from http_cache import byte_range, slice_chunks
+
+
+class FakeRequest:
+    def __init__(self, **headers):
+        self.headers = headers
+
+
+def test_invalid_range_is_ignored():
+    assert byte_range(FakeRequest(range="bytes=5-3"), 10, '"v1"') is None
+
+
+def test_range_past_the_end_is_unsatisfiable():
+    with pytest.raises(ValueError):
+        byte_range(FakeRequest(range="bytes=10-"), 10, '"v1"')
+
+
+def test_range_is_clamped_to_the_content():
+    assert byte_range(FakeRequest(range="bytes=4-99"), 10, '"v1"') == (4, 9)
+    assert byte_range(FakeRequest(range="bytes=-3"), 10, '"v1"') == (7, 9)
+
+
+def test_slice_chunks_spans_chunk_boundaries():
+    chunks = [b"abc", b"defg", b"hij"]
+    assert b"".join(slice_chunks(iter(chunks), 2, 6)) == b"cdefgh"
+    assert b"".join(slice_chunks(iter(chunks), 0, 10)) == b"abcdefghij"
+    assert b"".join(slice_chunks(iter(chunks), 9, 5)) == b"j"
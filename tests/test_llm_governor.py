@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from llm_governor import Provider, is_retryable
+
+
+class ProviderError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def test_only_transient_errors_are_retryable():
+    assert is_retryable(TimeoutError())
+    assert is_retryable(ConnectionResetError())
+    assert is_retryable(ProviderError(503))
+    assert is_retryable(ProviderError(429))
+    assert not is_retryable(ProviderError(400))
+    assert not is_retryable(TypeError("bad prompt"))
+    assert not is_retryable(KeyError("text"))
+    assert not is_retryable(ValueError())
+
+
+def test_type_error_is_not_retried_or_counted(provider):
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise TypeError("unexpected keyword argument")
+
+    for _ in range(provider.breaker.failure_threshold + 1):
+        with pytest.raises(TypeError):
+            asyncio.run(provider.call(broken))
+    assert len(calls) == provider.breaker.failure_threshold + 1
+    assert provider.counters["retries"] == 0
+    assert provider.breaker.consecutive_failures == 0
+    assert provider.breaker.state == "closed"
+
+    def missing_field():
+        calls.append(1)
+        return {}["text"]
+
+    with pytest.raises(KeyError):
+        provider.call_sync(missing_field)
+    assert len(calls) == provider.breaker.failure_threshold + 2
+    assert provider.counters["retries"] == 0
+    assert provider.breaker.consecutive_failures == 0
+
+
+def test_transient_error_is_retried_and_counted(provider, monkeypatch):
+    monkeypatch.setattr(Provider, "_backoff", lambda self, attempt: 0.0)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ProviderError(503)
+        return "ok"
+
+    assert asyncio.run(provider.call(flaky)) == "ok"
+    assert provider.counters["retries"] == 2
+    assert provider.breaker.state == "closed"
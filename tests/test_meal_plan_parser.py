@@ -0,0 +1,70 @@
+import glob
+import os
+import random
+
+import pytest
+
+from meal_plan_parser import MealPlanParser, parse_meal_plan
+
+SAMPLE = """Day 1
+Breakfast: Oats with berries | 350 cal | 10 min
+Mid-morning snack: Greek yogurt | 150 cal | 2 min
+Lunch: Quinoa salmon bowl | 620 cal | 25 min
+Dinner - Vegetable curry with rice
+  Approx. Calories: 540 kcal
+  Prep Time: 30 minutes
+Total: 1660 calories
+
+## Day 2
+Breakfast: Eggs on toast | 400 cal | 10 min
+Lunch: Chicken salad | 500 cal | 15 min
+Dinner: Lentil soup | 450 cal | 35 min
+
+SPORT GEAR CHECKLIST:
+- Running Shoes
+- Water bottle"""
+
+PLANS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "meal_plans", "*.txt")))[:5]
+
+
+def chunked(text, sizes):
+    """Records of text fed in chunks of the given sizes (cycled)"""
+    parser = MealPlanParser()
+    records, start, i = [], 0, 0
+    while start < len(text):
+        size = sizes[i % len(sizes)]
+        records += parser.feed(text[start:start + size])
+        start += size
+        i += 1
+    return records + parser.close()
+
+
+def test_sample_is_parsed():
+    records = parse_meal_plan(SAMPLE)
+    meals = [r for r in records if r["type"] == "meal"]
+    assert [m["meal"] for m in meals][:4] == ["Breakfast", "Mid-Morning Snack", "Lunch", "Dinner"]
+    assert meals[0]["calories"] == 350 and meals[0]["prep_min"] == 10
+    assert meals[3]["calories"] == 540 and meals[3]["prep_min"] == 30  # from follow-up lines
+    assert [r["day"] for r in records if r["type"] == "day_total"] == [1, 2]
+    assert [r["item"] for r in records if r["type"] == "gear"] == ["Running Shoes", "Water bottle"]
+
+
+@pytest.mark.parametrize("sizes", [[1], [2], [7], [64], [len(SAMPLE)], [3, 1, 13, 40]])
+def test_chunking_does_not_change_the_records(sizes):
+    assert chunked(SAMPLE, sizes) == parse_meal_plan(SAMPLE)
+
+
+def test_random_splits_and_crlf_do_not_change_the_records():
+    rng = random.Random(7)
+    for text in [SAMPLE, SAMPLE.replace("\n", "\r\n")]:
+        expected = parse_meal_plan(text)
+        for _ in range(20):
+            assert chunked(text, [rng.randint(1, 30) for _ in range(10)]) == expected
+
+
+@pytest.mark.skipif(not PLANS, reason="no saved plans")
+@pytest.mark.parametrize("path", PLANS)
+def test_saved_plans_parse_the_same_in_chunks(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    assert chunked(text, [5, 17, 1, 96]) == parse_meal_plan(text)
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import time
+
+from plan_cache import PlanCache
+
+
+async def collect(stream):
+    return "".join([text async for text in stream])
+
+
+def chunks(*parts, calls=None, fail=None):
+    async def produce():
+        if calls is not None:
+            calls.append(1)
+        for part in parts:
+            await asyncio.sleep(0)
+            yield part
+        if fail is not None:
+            raise fail
+    return produce
+
+
+def test_miss_then_memory_and_disk_hits(plan_cache):
+    calls = []
+    plan = asyncio.run(collect(plan_cache.stream("k", chunks("Day 1\n", "Day 2\n", calls=calls))))
+    assert plan == "Day 1\nDay 2\n"
+    assert asyncio.run(collect(plan_cache.stream("k", chunks("other", calls=calls)))) == plan
+    assert len(calls) == 1
+    assert plan_cache.memory_hits == 1
+
+    # A new process (empty memory) finds the plan on disk
+    other = PlanCache(directory=plan_cache.directory)
+    assert other.get("k") == plan
+    assert other.disk_hits == 1
+
+
+def test_expired_plans_are_regenerated(plan_cache):
+    plan_cache.put("k", "old plan")
+    path = os.path.join(plan_cache.directory, "k.json")
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["created"] = time.time() - 2 * plan_cache.ttl
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    plan_cache._entries.clear()
+
+    assert plan_cache.get("k") is None
+    assert plan_cache.expired == 1
+    assert not os.path.exists(path)
+    assert asyncio.run(collect(plan_cache.stream("k", chunks("new plan")))) == "new plan"
+
+
+def test_identical_requests_follow_one_generation(plan_cache):
+    calls = []
+
+    async def run():
+        produce = chunks("a", "b", "c", calls=calls)
+        return await asyncio.gather(*(collect(plan_cache.stream("k", produce)) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["abc"] * 5
+    assert len(calls) == 1
+    # Followers coalesce, or find the finished plan in memory after their disk miss
+    assert plan_cache.upstream_calls == 1
+    assert plan_cache.stats()["in_flight"] == 0
+
+
+def test_failed_generation_reaches_every_follower_and_is_not_cached(plan_cache):
+    async def run():
+        produce = chunks("a", fail=RuntimeError("upstream down"))
+        return await asyncio.gather(*(collect(plan_cache.stream("k", produce)) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert plan_cache.stats()["in_flight"] == 0
+    assert plan_cache.get("k") is None
+    assert asyncio.run(collect(plan_cache.stream("k", chunks("retry")))) == "retry"
+
+
+def test_generation_finishing_during_disk_read_is_not_repeated(plan_cache, monkeypatch):
+    calls = []
+
+    def slow_disk_read(key):
+        # The plan lands in memory while this request is still reading the disk
+        plan_cache.put(key, "finished elsewhere")
+        return None
+
+    monkeypatch.setattr(plan_cache, "_get_disk", slow_disk_read)
+    assert asyncio.run(collect(plan_cache.stream("k", chunks("x", calls=calls)))) == "finished elsewhere"
+    assert calls == []
+
+
+def test_disk_copy_is_pruned_to_capacity(plan_cache, monkeypatch):
+    monkeypatch.setattr("plan_cache.PLAN_CACHE_PRUNE_EVERY", 1)
+    for i in range(12):
+        plan_cache.put(f"k{i}", f"plan {i}")
+    assert len(os.listdir(plan_cache.directory)) == plan_cache.disk_capacity
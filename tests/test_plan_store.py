@@ -0,0 +1,71 @@
+import os
+
+PROFILE = {"goal": "Weight Loss", "sport": "Running", "level": "Beginner", "diet": "Vegan",
+           "condition": "None", "allergies": ["Peanuts"]}
+PLAN = "Day 1\nBreakfast: Oats | 350 cal | 10 min\n" * 50
+
+LEGACY = """================================================================================
+NUTRIHELP - PERSONALIZED MEAL PLAN
+Goal: Muscle Gain
+Activity: Football
+Diet: Vegetarian
+Allergies: Dairy, Eggs
+================================================================================
+Day 1
+Breakfast: Tofu scramble | 400 cal | 15 min
+"""
+
+
+def download(store, filename):
+    return b"".join(store.read(filename)).decode("utf-8")
+
+
+def test_saved_plan_downloads_with_its_header(plan_store):
+    filename = plan_store.save(PROFILE, PLAN, user="amy")
+    text = download(plan_store, filename)
+    assert text.startswith("=" * 80 + "\nNUTRIHELP")
+    assert text.endswith(PLAN)
+    assert plan_store.get(filename)["length"] == len(text.encode("utf-8"))
+    assert plan_store.get("meal_plan_missing.txt") is None
+    assert plan_store.read("meal_plan_missing.txt") is None
+
+
+def test_identical_bodies_are_stored_once(plan_store):
+    first = plan_store.save(PROFILE, PLAN, user="amy")
+    assert plan_store.save(PROFILE, PLAN, user="amy") == first  # same user, profile and text
+    other = plan_store.save(PROFILE, PLAN, user="bo")
+    assert other != first
+    stats = plan_store.stats()
+    assert stats["plans"] == 2
+    assert stats["distinct_bodies"] == 1
+    assert stats["stored_bytes"] < stats["text_bytes"]
+
+
+def test_prune_drops_old_and_excess_plans_and_their_bodies(plan_store):
+    filenames = [plan_store.save(PROFILE, f"{PLAN}plan {i}\n") for i in range(5)]
+    assert plan_store.prune(retention_days=0, max_plans=2) == 3
+    assert [p["filename"] for p in plan_store.list()["plans"]] == filenames[:2:-1]
+    assert plan_store.stats()["distinct_bodies"] == 2
+
+    plan_store._conn().execute("UPDATE plans SET created = created - 10 * 86400")
+    assert plan_store.prune(retention_days=7, max_plans=0) == 2
+    assert plan_store.stats()["distinct_bodies"] == 0
+
+
+def test_old_files_are_imported_once(plan_store, tmp_path):
+    directory = tmp_path / "meal_plans"
+    directory.mkdir()
+    (directory / "meal_plan_20251228_101533_e4fcfb29.txt").write_text(LEGACY, encoding="utf-8")
+    (directory / "meal_plan_20251229_090000_abcdef12.txt").write_text("Day 1\n", encoding="utf-8")
+    patterns = [str(directory / "*.txt")]
+
+    assert plan_store.import_files(patterns) == 2
+    assert plan_store.import_files(patterns) == 0
+    plan = plan_store.get("meal_plan_20251228_101533_e4fcfb29.txt")
+    assert plan["legacy"]
+    assert plan["profile"]["sport"] == "Football"
+    assert plan["profile"]["allergies"] == ["Dairy", "Eggs"]
+    assert download(plan_store, plan["filename"]) == LEGACY  # served as it was
+
+    assert plan_store.import_files(patterns, remove=True) == 0
+    assert os.listdir(directory) == []
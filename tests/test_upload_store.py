@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from upload_store import UploadBudget, UploadLimitMiddleware, UploadTooLargeError
+
+LIMIT = 1000
+
+
+async def echo_app(scope, receive, send):
+    """Reads the whole body, then answers 200 with its size"""
+    size = 0
+    while True:
+        message = await receive()
+        size += len(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(size).encode()})
+
+
+def call(path, chunks, content_length=None):
+    """Status sent for a request streaming chunks, and whether the app saw it"""
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(1)
+        await echo_app(scope, receive, send)
+
+    headers = [] if content_length is None else [(b"content-length", str(content_length).encode())]
+    scope = {"type": "http", "path": path, "method": "POST", "headers": headers}
+    pending = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+               for i, chunk in enumerate(chunks)]
+    statuses = []
+
+    async def receive():
+        return pending.pop(0) if pending else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    middleware = UploadLimitMiddleware(app, ["/upload-image"], max_bytes=LIMIT)
+    asyncio.run(middleware(scope, receive, send))
+    return statuses, bool(calls)
+
+
+def test_large_content_length_is_refused_before_reading():
+    statuses, called = call("/upload-image", [b"x" * 10], content_length=LIMIT + 1)
+    assert statuses == [413]
+    assert not called
+
+
+def test_streamed_body_over_the_limit_is_cut_off():
+    statuses, called = call("/upload-image", [b"x" * 400] * 4)
+    assert statuses == [413]  # the app's own answer is suppressed
+    assert called
+
+
+def test_body_within_the_limit_passes():
+    assert call("/upload-image", [b"x" * 400] * 2, content_length=800) == ([200], True)
+
+
+def test_other_paths_are_not_limited():
+    assert call("/ask", [b"x" * 400] * 4) == ([200], True)
+
+
+def test_budget_limits_each_file_and_the_request():
+    budget = UploadBudget(max_file_bytes=100, max_request_bytes=150)
+    budget.charge(80, 80)
+    with pytest.raises(UploadTooLargeError):
+        budget.charge(101, 21)
+
+    budget = UploadBudget(max_file_bytes=100, max_request_bytes=150)
+    budget.charge(100, 100)
+    with pytest.raises(UploadTooLargeError):
+        budget.charge(60, 60)
@@ -0,0 +1,195 @@
+# ============================================================================
+# Upload Store - content-addressed storage for uploaded images
+# Files are named after the SHA-256 of their bytes, so the same photo
+# uploaded twice is stored once. Uploads are streamed to disk in chunks
+# under per-file and per-request size limits; disk writes run in the
+# thread pool, off the event loop.
+#
+# Multipart bodies are parsed (and spooled) before a route runs, so
+# UploadLimitMiddleware enforces the request limit on the raw body first:
+# a larger Content-Length is refused before anything is read, and a body
+# without one is cut off with 413 as soon as it goes over.
+# ============================================================================
+
+import asyncio
+import hashlib
+import os
+import threading
+from typing import Dict, Tuple
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+from config import UPLOAD_CHUNK_SIZE, MAX_UPLOAD_FILE_BYTES, MAX_UPLOAD_REQUEST_BYTES
+
+UPLOAD_DIR = "uploads"
+MULTIPART_OVERHEAD = 64 * 1024  # Boundaries and part headers on top of the image bytes
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the per-file or per-request limit"""
+
+
+class UploadBudget:
+    """Tracks how many bytes one request may still upload"""
+
+    def __init__(self, max_file_bytes: int = MAX_UPLOAD_FILE_BYTES,
+                 max_request_bytes: int = MAX_UPLOAD_REQUEST_BYTES):
+        self.max_file_bytes = max_file_bytes
+        self.remaining = max_request_bytes
+
+    def charge(self, file_bytes: int, chunk: int):
+        if file_bytes > self.max_file_bytes:
+            raise UploadTooLargeError(
+                f"Each image must be under {self.max_file_bytes // (1024 * 1024)} MB")
+        self.remaining -= chunk
+        if self.remaining < 0:
+            raise UploadTooLargeError("Too many images in one upload")
+
+
+class UploadStore:
+    """Stores uploads under <sha256>.<ext> and counts deduplicated bytes"""
+
+    def __init__(self, directory: str = UPLOAD_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.duplicates = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def clean_ext(filename: str) -> str:
+        filename = filename or ""
+        ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        return ext if ext.isalnum() and len(ext) <= 5 else "jpg"
+
+    def _commit(self, tmp_path: str, digest: str, filename: str, size: int) -> str:
+        """Move a fully written temp file to its content address"""
+        name = f"{digest}.{self.clean_ext(filename)}"
+        path = os.path.join(self.directory, name)
+
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            with self._lock:
+                self.duplicates += 1
+                self.bytes_saved += size
+            return name
+
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stored += 1
+        return name
+
+    def _tmp_path(self) -> str:
+        return os.path.join(self.directory, f".{os.urandom(8).hex()}.tmp")
+
+    def save(self, content: bytes, filename: str) -> Tuple[str, str]:
+        """Store in-memory bytes, returns (content_hash, public name)"""
+        digest = hashlib.sha256(content).hexdigest()
+        tmp_path = self._tmp_path()
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        return digest, self._commit(tmp_path, digest, filename, len(content))
+
+    async def save_stream(self, file: UploadFile, budget: UploadBudget) -> Tuple[str, str]:
+        """
+        Stream an upload to disk chunk by chunk, hashing as it goes.
+        Returns (content_hash, public name); raises UploadTooLargeError.
+        """
+        loop = asyncio.get_running_loop()
+        hasher = hashlib.sha256()
+        size = 0
+        tmp_path = self._tmp_path()
+        f = await loop.run_in_executor(None, open, tmp_path, "wb")
+
+        def write(chunk: bytes):
+            hasher.update(chunk)
+            f.write(chunk)
+
+        try:
+            try:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    budget.charge(size, len(chunk))
+                    await loop.run_in_executor(None, write, chunk)
+            finally:
+                await loop.run_in_executor(None, f.close)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        digest = hasher.hexdigest()
+        name = await loop.run_in_executor(None, self._commit, tmp_path, digest, file.filename, size)
+        return digest, name
+
+    async def read_and_save(self, file: UploadFile, budget: UploadBudget) -> Tuple[str, str, bytes]:
+        """
+        Read an upload in chunks into one buffer (for direct analysis) and
+        store it. Returns (content_hash, public name, bytes).
+        """
+        buffer = bytearray()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            buffer += chunk
+            budget.charge(len(buffer), len(chunk))
+        content = bytes(buffer)
+        digest, name = await asyncio.get_running_loop().run_in_executor(
+            None, self.save, content, file.filename)
+        return digest, name, content
+
+    def stats(self) -> Dict:
+        return {
+            "stored": self.stored,
+            "duplicates": self.duplicates,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class UploadLimitMiddleware:
+    """
+    413 for a request to one of `paths` whose body is larger than max_bytes,
+    checked on Content-Length up front and on the bytes actually received
+    """
+
+    def __init__(self, app, paths, max_bytes: int = MAX_UPLOAD_REQUEST_BYTES + MULTIPART_OVERHEAD):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+
+    def _too_large(self) -> JSONResponse:
+        return JSONResponse({"error": f"Uploads are limited to {self.max_bytes // (1024 * 1024)} MB "
+                                      "per request"}, status_code=413)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            return await self._too_large()(scope, receive, send)
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLargeError("Request body too large")
+            return message
+
+        async def guarded_send(message):
+            # Whatever the app answers to an aborted body is replaced by the 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLargeError:
+            if not exceeded:
+                raise
+        if exceeded:
+            await self._too_large()(scope, receive, send)
+
+
+upload_store = UploadStore()
@@ -3,7 +3,8 @@ import speech_recognition as sr
 from dotenv import load_dotenv
 from elevenlabs.client import ElevenLabs
 from elevenlabs import play
-from config import LISTEN_TIMEOUT, PHRASE_TIME_LIMIT
+from config import LISTEN_TIMEOUT, PHRASE_TIME_LIMIT, LLM_PROVIDERS
+from llm_governor import GovernorError, governor
 
 # Load environment variables
 load_dotenv()
@@ -21,7 +22,9 @@ class VoiceAssistant:
             print("[Voice] ⚠ Text-to-Speech will be DISABLED.")
         else:
             try:
-                self.elevenlabs_client = ElevenLabs(api_key=api_key)
+                # Client timeout matches the governor's deadline for ElevenLabs
+                self.elevenlabs_client = ElevenLabs(
+                    api_key=api_key, timeout=LLM_PROVIDERS["elevenlabs"]["timeout"])
                 self.tts_enabled = True
                 print("[Voice] ✓ ElevenLabs TTS initialized successfully")
             except Exception as e:
@@ -55,16 +58,15 @@ class VoiceAssistant:
         try:
             # print("[Voice] 🔊 Generating audio with ElevenLabs...")
 
-            # Generate audio stream
-            audio_stream = self.elevenlabs_client.text_to_speech.convert(
-                text=text,
-                voice_id="cgSgspJ2msm6clMCkdW9",  # 'Jessica' or similar standard voice
-                model_id="eleven_multilingual_v2",
-                output_format="mp3_44100_128"
-            )
-
-            # Consume generator to bytes to allow both saving and playing
-            audio_bytes = b"".join(audio_stream)
+            # Generate audio and consume the stream to bytes to allow both
+            # saving and playing (inside the governor, so retries re-request)
+            audio_bytes = governor["elevenlabs"].call_sync(lambda: b"".join(
+                self.elevenlabs_client.text_to_speech.convert(
+                    text=text,
+                    voice_id="cgSgspJ2msm6clMCkdW9",  # 'Jessica' or similar standard voice
+                    model_id="eleven_multilingual_v2",
+                    output_format="mp3_44100_128"
+                )))
 
             # Save to file
             with open("output.mp3", "wb") as f:
@@ -74,6 +76,11 @@ class VoiceAssistant:
             play(audio_bytes)
             return True
 
+        except GovernorError as e:
+            # Busy or failing provider: fall back to the printed text right away
+            print(f"[Voice] ⚠ TTS skipped: {e}")
+            return False
+
         except Exception as e:
             print(f"[Voice] ⚠ ElevenLabs TTS Error: {e}")
             return False